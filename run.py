@@ -1,5 +1,57 @@
+import hashlib
+import os
+import subprocess
+import sys
+import tempfile
+
+cwd = os.path.dirname(os.path.realpath(__file__))
+requirements = os.path.join(cwd, 'requirements.txt')
+# Hash of requirements.txt and the interpreter they were installed for
+stamp = os.path.join(cwd, '.requirements.stamp')
+
+def requirements_hash():
+    with open(requirements, 'rb') as f:
+        return hashlib.sha256(f.read()+sys.executable.encode('utf-8')).hexdigest()
+
+def install_requirements(force=False):
+    # pip only runs when requirements.txt (or the interpreter) changed
+    # since the last successful install
+    digest = requirements_hash()
+    if not force and os.path.exists(stamp):
+        with open(stamp) as f:
+            if f.read().strip() == digest:
+                return 0
+    result = subprocess.call([sys.executable, '-m', 'pip', 'install', '-r', requirements])
+    if result == 0:
+        with open(stamp, 'w') as f:
+            f.write(digest)
+    return result
+
+def profile_startup(top=20):
+    # Imports the client and creates the application under -X importtime,
+    # then lists the slowest imports by cumulative time. Runs in a temporary
+    # directory so the logs the client writes do not end up in the tree
+    src = os.path.join(cwd, 'src')
+    env = dict(os.environ, PYTHONPATH=os.pathsep.join(filter(None, [src, os.environ.get('PYTHONPATH')])))
+    code = ('import time; start = time.perf_counter()\n'
+            'from client import Game\n'
+            'Game.create_application()\n'
+            'print("Application created in %.1f ms" % ((time.perf_counter()-start)*1000))')
+    with tempfile.TemporaryDirectory() as directory:
+        process = subprocess.run([sys.executable, '-X', 'importtime', '-c', code], cwd=directory, env=env, capture_output=True, text=True)
+    imports = []
+    for line in process.stderr.splitlines():
+        if line.startswith('import time:') and not line.endswith('imported package'):
+            own, cumulative, name = line[len('import time:'):].split('|')
+            imports.append((int(cumulative), int(own), name.strip()))
+    imports.sort(reverse=True)
+    print(process.stdout.strip())
+    print('%12s %12s  %s' % ('cumulative', 'self', 'module'))
+    for cumulative, own, name in imports[:top]:
+        print('%9.1f ms %9.1f ms  %s' % (cumulative/1000.0, own/1000.0, name))
+    return process.returncode
 
 if __name__ == '__main__':
-    import subprocess, os
-    cwd = os.path.dirname(os.path.realpath(__file__))
-    subprocess.call('python -m pip install -r %s/requirements.txt'%cwd)
+    if '--profile-startup' in sys.argv:
+        sys.exit(profile_startup())
+    sys.exit(install_requirements(force='--force' in sys.argv))
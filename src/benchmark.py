@@ -0,0 +1,133 @@
+import sys
+import timeit
+
+import numpy as np
+
+from engine.maths import Vec3, Vec4, Mat4, Mat4Array
+from engine.render import VertexBuffer, Mesh, SoftwareRenderer, RenderQueue
+
+#   Microbenchmarks for engine.maths, and headless frame times through
+#   the software renderer
+#   Run with: python src/benchmark.py [repeat]
+#
+#   Each row times an operation on the Old types below, which behave
+#   like the maths types did before _wrap and __slots__, against the
+#   same operation on the current types.
+
+class OldVec3(Vec3):
+    #   No __slots__, so instances carry a __dict__, and results are built
+    #   through the validating constructor's isinstance chain
+    def _result(self, cls, value, out):
+        return out if out is not None else OLD[cls](value)
+
+class OldVec4(Vec4):
+    def _result(self, cls, value, out):
+        return out if out is not None else OLD[cls](value)
+
+class OldMat4(Mat4):
+    def _result(self, cls, value, out):
+        return out if out is not None else OLD[cls](value)
+
+    def column(self, key):
+        return OldVec4(self._column(key))
+
+OLD={Vec3: OldVec3, Vec4: OldVec4, Mat4: OldMat4}
+
+def run(stmt, setup, number, repeat):
+    return min(timeit.repeat(stmt, setup=setup, number=number, repeat=repeat, globals=globals()))/number
+
+def report(name, old, new):
+    print("%-24s %10.0f ns %10.0f ns %8.2fx"%(name, old*1e9, new*1e9, old/new))
+
+def construction(number, repeat):
+    # Internal results used to come from lists as well as arrays
+    setup="a=np.array([1.0, 2.0, 3.0]); l=[1.0, 2.0, 3.0]; m=np.identity(4); rows=m.tolist()"
+    report('Vec3 construct array', run('OldVec3(a)', setup, number, repeat), run('Vec3._wrap(a)', setup, number, repeat))
+    report('Vec3 construct list', run('OldVec3(l)', setup, number, repeat), run('Vec3._wrap(np.array(l))', setup, number, repeat))
+    report('Mat4 construct array', run('OldMat4(m)', setup, number, repeat), run('Mat4._wrap(m)', setup, number, repeat))
+    report('Mat4 construct list', run('OldMat4(rows)', setup, number, repeat), run('Mat4._wrap(np.array(rows))', setup, number, repeat))
+
+def operations(number, repeat):
+    setup=("a=Vec3([1.0, 2.0, 3.0]); b=Vec3([4.0, 5.0, 6.0]); m=Mat4.rotate(30.0, Vec3.YAXIS()); n=Mat4.translate(a); v=Vec4([1.0, 2.0, 3.0, 1.0]);"
+           "oa=OldVec3(a.value); ob=OldVec3(b.value); om=OldMat4(m.value); on=OldMat4(n.value); ov=OldVec4(v.value)")
+    cases=[
+        ('Vec3.add', 'oa.add(ob)', 'a.add(b)'),
+        ('Vec3.subtract', 'oa.subtract(ob)', 'a.subtract(b)'),
+        ('Vec3.scalar', 'oa.scalar(2.0)', 'a.scalar(2.0)'),
+        ('Vec3.cross_product', 'oa.cross_product(ob)', 'a.cross_product(b)'),
+        ('Vec3.normalize', 'oa.normalize()', 'a.normalize()'),
+        ('Mat4.multiply', 'om.multiply(on)', 'm.multiply(n)'),
+        ('Mat4.transpose', 'om.transpose()', 'm.transpose()'),
+        ('Mat4.transform', 'om.transform(ov)', 'm.transform(v)'),
+        ('Mat4.column', 'om.column(1)', 'm.column(1)'),
+    ]
+    for name, old, new in cases:
+        report(name, run(old, setup, number, repeat), run(new, setup, number, repeat))
+
+def factories(number, repeat):
+    setup="t=Vec3([1.0, 2.0, 3.0]); axis=Vec3.YAXIS(); m=Mat4.IDENTITY()"
+    for name, stmt in [('Mat4.translate', 'Mat4.translate(t)'),
+                       ('Mat4.rotate', 'Mat4.rotate(30.0, axis)'),
+                       ('Mat4.trs', 'Mat4.trs(t, 30.0, axis, t)'),
+                       ('Mat4.trs out=', 'Mat4.trs(t, 30.0, axis, t, out=m)'),
+                       ('Mat4.lookat', 'Mat4.lookat(t, Vec3.ZERO(), axis)'),
+                       ('Mat4.perspective', 'Mat4.perspective(1.0, 1.5, 0.1, 100.0)')]:
+        print("%-24s %10.0f ns"%(name, run(stmt, setup, number, repeat)*1e9))
+    count=10000
+    setup="t=np.random.rand(%s, 3); a=np.random.rand(%s)*360; axis=np.tile([0.0, 1.0, 0.0], (%s, 1)); out=Mat4Array(%s)"%(count, count, count, count)
+    print("%-24s %10.0f ns per matrix"%('Mat4Array.trs out=', run('Mat4Array.trs(t, a, axis, t, out=out)', setup, 20, repeat)/count*1e9))
+
+def memory():
+    a=np.array([1.0, 2.0, 3.0])
+    for name, obj in (('OldVec3', OldVec3(a)), ('Vec3', Vec3._wrap(a)), ('OldMat4', OldMat4(np.identity(4))), ('Mat4', Mat4._wrap(np.identity(4)))):
+        size=sys.getsizeof(obj)+(sys.getsizeof(obj.__dict__) if hasattr(obj, '__dict__') else 0)
+        print("%s instance: %s bytes, __dict__: %s"%(name, size, hasattr(obj, '__dict__')))
+
+def cube():
+    corners=np.array([[x, y, z] for x in (-0.5, 0.5) for y in (-0.5, 0.5) for z in (-0.5, 0.5)], dtype=np.float32)
+    # Counter clockwise seen from outside
+    indices=[0, 1, 3, 0, 3, 2, 4, 6, 7, 4, 7, 5, 0, 4, 5, 0, 5, 1,
+             2, 3, 7, 2, 7, 6, 0, 2, 6, 0, 6, 4, 1, 5, 7, 1, 7, 3]
+    return Mesh(VertexBuffer.from_arrays(position=corners), indices)
+
+def rendering(repeat, count=2000):
+    # Fixed scene so frame times compare between runs and machines
+    renderer=SoftwareRenderer(640, 480)
+    renderer.set_camera(Mat4.lookat(Vec3([0.0, 30.0, 60.0]), Vec3.ZERO(), Vec3.YAXIS()), Mat4.perspective(1.0, 640/480, 0.1, 500.0))
+    translations=np.random.default_rng(0).uniform(-40.0, 40.0, (count, 3))
+    models=Mat4Array.trs(translations, np.arange(count)*7.0 % 360.0, np.tile([0.0, 1.0, 0.0], (count, 1)), np.ones((count, 3)))
+    mesh=cube()
+    def frame():
+        renderer.begin_frame()
+        renderer.draw_instanced(mesh, models)
+        return renderer.end_frame()
+    stats=frame()
+    print("%-24s %10.2f ms per frame, %s"%('SoftwareRenderer', min(timeit.repeat(frame, number=1, repeat=repeat))*1e3, stats))
+
+def batching(repeat, count=100000):
+    # Sort and batch count draws over 8 meshes, 16 shaders and 256 materials
+    rng=np.random.default_rng(0)
+    meshes=[cube() for i in range(0, 8)]
+    models=Mat4Array(count, dtype=np.float32)
+    mesh, shader, material, depth = rng.integers(0, 8, count), rng.integers(0, 16, count), rng.integers(0, 256, count), rng.random(count)
+    queue=RenderQueue(count)
+    def frame():
+        queue.clear()
+        for m in range(0, 8):
+            selected=mesh == m
+            queue.submit_many(meshes[m], Mat4Array._wrap(models.value[selected]), 0, shader[selected], material[selected], depth[selected])
+        queue.sort()
+        return queue.stats
+    stats=frame()
+    print("%-24s %10.2f ms per frame, %s"%('RenderQueue.sort', min(timeit.repeat(frame, number=1, repeat=repeat))*1e3, stats))
+
+if __name__ == '__main__':
+    repeat=int(sys.argv[1]) if len(sys.argv) > 1 else 5
+    number=20000
+    print("%-24s %13s %13s %9s"%('operation', 'old', '_wrap', 'speedup'))
+    construction(number, repeat)
+    operations(number, repeat)
+    factories(number, repeat)
+    memory()
+    rendering(repeat)
+    batching(repeat)
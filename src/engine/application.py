@@ -1,9 +1,36 @@
+import logging
 from builtins import object
 
+from .clock import FrameClock
+from .modules import ModuleRegistry
+from .profiler import PROFILER
+
+def _disabled(*args, **kwargs):
+    pass
+
 class Application(object):
     #Application Modules
     logger_module = None
     event_handler_module = None
+    asset_manager = None
+
+    ##  Subsystems, name -> import path or class, or (target, dependencies).
+    ##  Subclasses add theirs with dict(Application.modules, audio=...).
+    ##  Modules that do not depend on each other initialize concurrently.
+    ##  Background asset loading is opt in, with
+    ##  assets=('.assets.manager:AssetManager', ('events',))
+    modules = {
+        'logging': '.log:Log',
+        'events': '.events.EventHandler:EventHandler',
+    }
+    init_workers = None         # Init thread pool size, None for the default
+    module_registry = None
+
+    ##  Frame loop
+    target_fps = 60             # Render rate, None or 0 to run unpaced
+    tick_rate = 60              # Fixed simulation updates per second
+    max_updates_per_frame = 5   # Catch-up cap, avoids the spiral of death
+    running = False
 
 
     ##  Logger shortcuts
@@ -18,28 +45,105 @@ class Application(object):
         self.logger_module = module()
         self.core_logger=self.logger_module.get_corelogger()
         clientlog=self.logger_module.get_clientlogger()
-        self.CORE_CRIT, self.CORE_ERROR, self.CORE_WARN, self.CORE_INFO, self.CORE_DEBUG = (self.core_logger.critical,
-                                                                                            self.core_logger.error,
-                                                                                            self.core_logger.warning,
-                                                                                            self.core_logger.info,
-                                                                                            self.core_logger.debug)
+        self.refresh_log_shortcuts()
         self.CORE_WARN("Initialized Logger!")
         clientlog.info('Initialized Logger!')
 
-    def initialize(self, logging_module=None):
-        if not logging_module:
-            from .default_modules.log import Log
-            logging_module=Log
-        self.initialize_logging_module(logging_module)
+    def refresh_log_shortcuts(self):
+        # Levels the core logger would drop are bound to a no-op, so a
+        # disabled CORE_DEBUG on the hot path costs one call and no record.
+        # Call again after changing the logger's level
+        logger=self.core_logger
+        self.CORE_CRIT, self.CORE_ERROR, self.CORE_WARN, self.CORE_INFO, self.CORE_DEBUG = (
+            getattr(logger, name) if logger.isEnabledFor(level) else _disabled
+            for name, level in (('critical', logging.CRITICAL),
+                                ('error', logging.ERROR),
+                                ('warning', logging.WARNING),
+                                ('info', logging.INFO),
+                                ('debug', logging.DEBUG)))
+
+    def initialize_event_module(self, module):
+        self.event_handler_module = module()
+
+    def initialize(self, logging_module=None, event_module=None):
+        registry = ModuleRegistry(self.modules)
+        if logging_module:
+            registry.register('logging', logging_module, registry.depends['logging'])
+        if event_module:
+            registry.register('events', event_module, registry.depends['events'])
+        self.module_registry = registry
+        registry.initialize(self.create_module, self.init_workers)
+
+    def create_module(self, name, module):
+        # Called on the init thread pool for each registered module
+        if name == 'logging':
+            self.initialize_logging_module(module)
+            return self.logger_module
+        if name == 'events':
+            self.initialize_event_module(module)
+            return self.event_handler_module
+        if name == 'assets':
+            self.asset_manager = module(event_handler=self.event_handler_module)
+            return self.asset_manager
+        return module()
+
+    def get_module(self, name):
+        return self.module_registry.instance(name)
+
+    def shutdown(self):
+        # Tears modules down in reverse dependency order
+        if self.module_registry is not None:
+            self.module_registry.teardown()
+
+    def on_update(self, dt):
+        # Fixed timestep simulation step, override in subclasses
+        pass
+
+    def on_render(self, alpha):
+        # alpha is how far between the last two updates this frame falls,
+        # for interpolating render state. Override in subclasses
+        pass
+
+    def stop(self):
+        self.running = False
 
     def run(self):
-        while True:
-            print('Ran!')
-            break
+        clock = FrameClock(self.target_fps)
+        dt = 1.0/self.tick_rate
+        accumulator = 0.0
+        previous = clock.now()
+        self.running = True
+        try:
+            while self.running:
+                frame_start = clock.now()
+                accumulator += frame_start-previous
+                previous = frame_start
+                with PROFILER.zone('Application.frame'):
+                    if self.asset_manager is not None:
+                        # Finished loads post their events before the flush
+                        with PROFILER.zone('AssetManager.update'):
+                            self.asset_manager.update()
+                    # Deferred events are dispatched once per frame
+                    with PROFILER.zone('EventHandler.flush'):
+                        self.event_handler_module.flush()
+                    updates = 0
+                    while accumulator >= dt and updates < self.max_updates_per_frame:
+                        with PROFILER.zone('Application.on_update'):
+                            self.on_update(dt)
+                        accumulator -= dt
+                        updates += 1
+                    if accumulator >= dt:
+                        # Too far behind to catch up, drop the backlog and run slow
+                        accumulator %= dt
+                    with PROFILER.zone('Application.on_render'):
+                        self.on_render(accumulator/dt)
+                clock.wait_for_next_frame(frame_start)
+        finally:
+            # Modules are torn down once the loop stops
+            self.shutdown()
 
     @classmethod
     def create_application(cls):
-        from .default_modules import log
         app = cls()
         app.initialize()
         return app
@@ -0,0 +1,3 @@
+from .container import AssetFile, write_asset, save_mesh, load_mesh, load_transforms
+from .obj import load_obj
+from .manager import AssetManager, AssetHandle, AssetLoaded, AssetFailed
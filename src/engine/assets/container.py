@@ -0,0 +1,127 @@
+import ast
+import struct
+
+import numpy as np
+
+from ..maths import Mat4Array
+from ..render.vertexbuffer import VertexAttribute, VertexLayout, VertexBuffer, Mesh, POSITION, NORMAL, UV, COLOR
+
+#   File layout, little endian:
+#       header          magic, version, section count, dtype strings size
+#       section table   per section: name, offset, size, where its dtype
+#                       string is, number of dimensions and shape
+#       dtype strings   numpy dtype descriptors, repr'd
+#       data            each section aligned to ALIGNMENT bytes, in the
+#                       byte order it was written with (the descriptor
+#                       records it)
+#   Sections are read back as views of one np.memmap, nothing is read
+#   from disk until a section's pages are touched.
+MAGIC=b'ASET'
+VERSION=1
+ALIGNMENT=64
+MAX_DIMENSIONS=4
+HEADER=struct.Struct('<4sHHI')
+SECTION=struct.Struct('<32sQQIHH%sQ'%MAX_DIMENSIONS)
+
+_ATTRIBUTES={a.name: a for a in (POSITION, NORMAL, UV, COLOR)}
+
+def _align(offset):
+    return (offset+ALIGNMENT-1)//ALIGNMENT*ALIGNMENT
+
+def write_asset(path, sections):
+    # sections is name -> NDARRAY, written in order
+    arrays=[]
+    strings=b''
+    for name, array in sections.items():
+        array=np.ascontiguousarray(array)
+        encoded=name.encode('utf-8')
+        assert len(encoded) <= 32, "Section name %s is longer than 32 bytes."%name
+        assert array.ndim <= MAX_DIMENSIONS, "Section %s has more than %s dimensions."%(name, MAX_DIMENSIONS)
+        descr=repr(np.lib.format.dtype_to_descr(array.dtype)).encode('utf-8')
+        arrays.append((encoded, array, len(strings), len(descr)))
+        strings+=descr
+    offset=_align(HEADER.size+SECTION.size*len(arrays)+len(strings))
+    table=[]
+    for encoded, array, string_offset, string_size in arrays:
+        shape=tuple(array.shape)+(0,)*(MAX_DIMENSIONS-array.ndim)
+        table.append(SECTION.pack(encoded, offset, array.nbytes, string_offset, string_size, array.ndim, *shape))
+        offset=_align(offset+array.nbytes)
+    with open(path, 'wb') as f:
+        f.write(HEADER.pack(MAGIC, VERSION, len(arrays), len(strings)))
+        f.write(b''.join(table))
+        f.write(strings)
+        for (encoded, array, string_offset, string_size), entry in zip(arrays, table):
+            f.write(b'\0'*(SECTION.unpack(entry)[1]-f.tell()))
+            f.write(memoryview(array).cast('B'))
+
+class AssetFile():
+    #   Read only, memory mapped view of a file written by write_asset.
+    #   Sections come back as NDARRAY views into the mapping.
+    def __init__(self, path):
+        self.path=path
+        self.map=np.memmap(path, dtype=np.uint8, mode='r')
+        magic, version, count, strings_size = HEADER.unpack_from(self.map, 0)
+        if magic != MAGIC or version != VERSION:
+            raise Exception("%s is not a version %s asset file!"%(path, VERSION))
+        strings_start=HEADER.size+SECTION.size*count
+        strings=bytes(self.map[strings_start:strings_start+strings_size])
+        # name -> (offset, size, dtype, shape)
+        self.sections={}
+        for i in range(0, count):
+            name, offset, size, string_offset, string_size, ndim, *shape = SECTION.unpack_from(self.map, HEADER.size+SECTION.size*i)
+            dtype=np.lib.format.descr_to_dtype(ast.literal_eval(strings[string_offset:string_offset+string_size].decode('utf-8')))
+            self.sections[name.rstrip(b'\0').decode('utf-8')]=(offset, size, dtype, tuple(shape[:ndim]))
+
+    def section(self, name):
+        if name not in self.sections:
+            raise Exception("Asset %s has no %s section!"%(self.path, name))
+        offset, size, dtype, shape = self.sections[name]
+        return self.map[offset:offset+size].view(dtype).reshape(shape)
+
+    def names(self):
+        return list(self.sections)
+
+    def __getitem__(self, name):
+        return self.section(name)
+
+    def __contains__(self, name):
+        return name in self.sections
+
+########################################
+#   Meshes and transforms
+########################################
+
+def save_mesh(path, mesh, transforms=None, name='mesh'):
+    # One mesh, with optional float32 instance transforms
+    write_asset(path, mesh_sections(mesh, transforms, name))
+
+def mesh_sections(mesh, transforms=None, name='mesh'):
+    sections={name+'/vertices': mesh.vertices.data, name+'/indices': mesh.indices}
+    if transforms is not None:
+        value=transforms.value if isinstance(transforms, Mat4Array) else transforms
+        sections[name+'/transforms']=np.asarray(value, dtype=np.float32)
+    return sections
+
+def load_mesh(asset, name='mesh'):
+    # Mesh whose vertices and indices are views into the mapped file
+    asset=asset if isinstance(asset, AssetFile) else AssetFile(asset)
+    vertices=asset.section(name+'/vertices')
+    return Mesh(VertexBuffer(layout_for(vertices.dtype), vertices), asset.section(name+'/indices'))
+
+def load_transforms(asset, name='mesh'):
+    asset=asset if isinstance(asset, AssetFile) else AssetFile(asset)
+    return Mat4Array._wrap(asset.section(name+'/transforms'))
+
+def layout_for(dtype):
+    # VertexLayout matching a stored vertex dtype, the standard attributes
+    # keep their maths wrappers
+    attributes=[]
+    for field in dtype.names:
+        base, offset = dtype.fields[field]
+        attribute=_ATTRIBUTES.get(field)
+        if attribute is None or attribute.field != (field, base.base, base.shape):
+            attribute=VertexAttribute(field, base.shape[0] if base.shape else 1, base.base)
+        attributes.append(attribute)
+    layout=VertexLayout(*attributes)
+    assert layout.dtype == dtype, "Stored vertices are not a packed vertex layout."
+    return layout
@@ -0,0 +1,39 @@
+import argparse
+import os
+import sys
+import time
+
+from .container import save_mesh
+from .obj import load_obj
+
+# Source extension -> loader returning a Mesh
+CONVERTERS={
+    '.obj': load_obj,
+}
+
+def convert(source, target=None, name='mesh'):
+    # Writes source as a binary asset next to it unless target is given
+    extension=os.path.splitext(source)[1].lower()
+    if extension not in CONVERTERS:
+        raise Exception("No converter for %s files!"%extension)
+    target=target or os.path.splitext(source)[0]+'.asset'
+    mesh=CONVERTERS[extension](source)
+    save_mesh(target, mesh, name=name)
+    return target, mesh
+
+def main(argv=None):
+    parser=argparse.ArgumentParser(prog='python -m engine.assets.convert', description='Convert text geometry to memory mapped binary assets.')
+    parser.add_argument('sources', nargs='+', help='files to convert (%s)'%', '.join(sorted(CONVERTERS)))
+    parser.add_argument('-o', '--output', help='output file, only with a single source')
+    parser.add_argument('--name', default='mesh', help='section name prefix (default mesh)')
+    args=parser.parse_args(argv)
+    if args.output and len(args.sources) > 1:
+        parser.error('--output needs exactly one source')
+    for source in args.sources:
+        start=time.perf_counter()
+        target, mesh = convert(source, args.output, args.name)
+        print('%s -> %s: %s vertices, %s triangles, %.1f ms'%(source, target, len(mesh.vertices), len(mesh.indices)//3, (time.perf_counter()-start)*1000))
+    return 0
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,237 @@
+import importlib
+import os
+import threading
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+
+from ..events.event import Event
+
+class AssetLoaded(Event):
+    #   Posted by AssetManager.update() on the main thread, handle.asset is
+    #   ready to use
+    handle=None
+    path=None
+
+class AssetFailed(Event):
+    handle=None
+    path=None
+    error=None
+
+class AssetHandle():
+    #   Returned straight away by AssetManager.load. The same handle is
+    #   shared by everyone asking for the same path while it stays loaded.
+    #   An unpinned asset can be evicted once it is over budget, pin() the
+    #   handle for as long as the asset has to stay resident.
+    LOADING='loading'
+    LOADED='loaded'
+    FAILED='failed'
+    EVICTED='evicted'
+
+    def __init__(self, manager, path):
+        self.manager=manager
+        self.path=path
+        self.state=AssetHandle.LOADING
+        self.asset=None
+        self.error=None
+        self.size=0
+        self.pins=0
+        self.future=None
+
+    def done(self):
+        return self.state != AssetHandle.LOADING
+
+    def result(self, timeout=None):
+        # Blocks until loaded, raises the loader's exception if it failed.
+        # None once the asset has been evicted
+        self.future.result(timeout)
+        return self.asset
+
+    def pin(self):
+        with self.manager.lock:
+            self.pins+=1
+        return self
+
+    def unpin(self):
+        with self.manager.lock:
+            assert self.pins > 0, "Asset %s is not pinned."%self.path
+            self.pins-=1
+
+    def __repr__(self):
+        return "<AssetHandle %s %s>"%(self.path, self.state)
+
+def _size(asset):
+    # Bytes an asset counts against the budget, from nbytes where it has
+    # it, else the sum over its mesh buffers
+    nbytes=getattr(asset, 'nbytes', None)
+    if nbytes is not None:
+        return int(nbytes)
+    vertices=getattr(asset, 'vertices', None)
+    if vertices is not None:
+        return int(vertices.nbytes+asset.indices.nbytes)
+    return 0
+
+class AssetManager():
+    #   Loads assets on a thread pool without blocking the frame. load()
+    #   returns a handle at once, a second load of a path already loading
+    #   or loaded returns the same handle. update(), called once per frame
+    #   on the main thread, accounts finished loads, posts AssetLoaded or
+    #   AssetFailed through the EventHandler and evicts the least recently
+    #   used unpinned assets until the resident total fits the budget.
+    #   Loaders are picked by file extension and given as import paths so
+    #   their dependencies load with the first asset, not at startup.
+    LOADERS={
+        '.asset': '.container:load_mesh',
+        '.obj': '.obj:load_obj',
+    }
+
+    def __init__(self, budget=256*1024*1024, max_workers=4, event_handler=None):
+        self.budget=budget
+        self.max_workers=max_workers
+        self.loaders=dict(AssetManager.LOADERS)
+        self.sizer=_size
+        self.lock=threading.Lock()
+        self.executor=None
+        # path -> handle, loading and resident, least recently used first
+        self.handles=OrderedDict()
+        self.finished=[]
+        self.resident=0
+        self.event_handler=None
+        if event_handler is not None:
+            self.attach(event_handler)
+
+    def attach(self, event_handler):
+        # Registers the asset events with the EventHandler if needed
+        for event in (AssetLoaded, AssetFailed):
+            if event not in event_handler.registered_events:
+                event_handler.register_event(event)
+        self.event_handler=event_handler
+
+    def register_loader(self, extension, loader):
+        # loader is a callable path -> asset, or 'module:function'
+        self.loaders[extension.lower()]=loader
+
+    ########################################
+    #   Loading
+    ########################################
+
+    def load(self, path, loader=None):
+        path=os.path.normpath(path)
+        with self.lock:
+            handle=self.handles.get(path)
+            if handle is not None:
+                self.handles.move_to_end(path)
+                return handle
+        # Resolved outside the lock, it may import the loader's module
+        loader=loader or self._loader(path)
+        with self.lock:
+            handle=self.handles.get(path)
+            if handle is not None:
+                self.handles.move_to_end(path)
+                return handle
+            # Submitted before the handle is published, so nobody sees a
+            # handle without a future
+            handle=AssetHandle(self, path)
+            handle.future=self._get_executor().submit(self._load, handle, loader)
+            self.handles[path]=handle
+        return handle
+
+    def get(self, path):
+        # The loaded asset, or None if it is not resident
+        with self.lock:
+            handle=self.handles.get(os.path.normpath(path))
+            if handle is None or handle.state != AssetHandle.LOADED:
+                return None
+            self.handles.move_to_end(handle.path)
+            return handle.asset
+
+    def update(self):
+        # Main thread, once per frame. Returns how many loads finished
+        with self.lock:
+            finished=self.finished
+            self.finished=[]
+        for handle in finished:
+            if self.event_handler is not None:
+                if handle.state == AssetHandle.LOADED:
+                    self.event_handler.post(AssetLoaded, handle=handle, path=handle.path)
+                else:
+                    self.event_handler.post(AssetFailed, handle=handle, path=handle.path, error=handle.error)
+        self.evict()
+        return len(finished)
+
+    def evict(self, budget=None):
+        # Drops unpinned assets, least recently used first, until the
+        # resident total fits. Returns the evicted handles
+        budget=self.budget if budget is None else budget
+        evicted=[]
+        with self.lock:
+            for handle in list(self.handles.values()):
+                if self.resident <= budget:
+                    break
+                if handle.state == AssetHandle.LOADED and not handle.pins:
+                    del self.handles[handle.path]
+                    self.resident-=handle.size
+                    handle.asset=None
+                    handle.state=AssetHandle.EVICTED
+                    evicted.append(handle)
+        return evicted
+
+    def unload(self, path):
+        with self.lock:
+            handle=self.handles.get(os.path.normpath(path))
+            if handle is None or handle.state == AssetHandle.LOADING:
+                return False
+            assert not handle.pins, "Asset %s is pinned."%handle.path
+            del self.handles[handle.path]
+            self.resident-=handle.size
+            handle.asset=None
+            handle.state=AssetHandle.EVICTED
+            return True
+
+    def shutdown(self, wait=True):
+        if self.executor is not None:
+            self.executor.shutdown(wait=wait)
+            self.executor=None
+
+    ########################################
+    #   Internals
+    ########################################
+
+    def _load(self, handle, loader):
+        # Worker thread. Returns nothing, only the handle holds the asset
+        # so evicting it frees the memory
+        try:
+            asset=loader(handle.path)
+        except Exception as error:
+            with self.lock:
+                handle.error=error
+                handle.state=AssetHandle.FAILED
+                # Failed loads are retried by the next load()
+                if self.handles.get(handle.path) is handle:
+                    del self.handles[handle.path]
+                self.finished.append(handle)
+            raise
+        size=self.sizer(asset)
+        with self.lock:
+            handle.asset=asset
+            handle.size=size
+            handle.state=AssetHandle.LOADED
+            self.resident+=size
+            self.finished.append(handle)
+
+    def _loader(self, path):
+        extension=os.path.splitext(path)[1].lower()
+        loader=self.loaders.get(extension)
+        if loader is None:
+            raise Exception("No asset loader for %s files!"%extension)
+        if isinstance(loader, str):
+            module, _, function = loader.partition(':')
+            loader=self.loaders[extension]=getattr(importlib.import_module(module, __package__), function)
+        return loader
+
+    def _get_executor(self):
+        if self.executor is None:
+            self.executor=ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix='asset-loader')
+        return self.executor
+
+    def __len__(self):
+        return len(self.handles)
@@ -0,0 +1,52 @@
+import numpy as np
+
+from ..render.vertexbuffer import VertexBuffer, Mesh
+
+def _index(value, count):
+    # OBJ indices start at 1, negative ones count back from the newest
+    if not value:
+        return -1
+    i=int(value)
+    return i-1 if i > 0 else count+i
+
+def load_obj(path):
+    #   Triangulated Mesh from a Wavefront OBJ file. Polygons are fanned,
+    #   every distinct position/uv/normal combination becomes one vertex.
+    #   Normals are generated when the file has none. Materials, groups
+    #   and everything else not geometry are ignored.
+    positions=[]
+    uvs=[]
+    normals=[]
+    corners=[]
+    with open(path) as f:
+        for line in f:
+            parts=line.split()
+            if not parts:
+                continue
+            tag=parts[0]
+            if tag == 'v':
+                positions.append(parts[1:4])
+            elif tag == 'vt':
+                uvs.append(parts[1:3])
+            elif tag == 'vn':
+                normals.append(parts[1:4])
+            elif tag == 'f':
+                face=[]
+                for corner in parts[1:]:
+                    fields=(corner.split('/')+['', ''])[:3]
+                    face.append((_index(fields[0], len(positions)), _index(fields[1], len(uvs)), _index(fields[2], len(normals))))
+                for i in range(1, len(face)-1):
+                    corners.extend((face[0], face[i], face[i+1]))
+    if not corners:
+        raise Exception("%s has no faces!"%path)
+    corners=np.array(corners, dtype=np.int64)
+    unique, indices = np.unique(corners, axis=0, return_inverse=True)
+    columns={'position': np.array(positions, dtype=np.float64)[unique[:, 0]]}
+    has_normals=bool(normals) and np.all(unique[:, 2] >= 0)
+    columns['normal']=np.array(normals, dtype=np.float64)[unique[:, 2]] if has_normals else np.zeros((len(unique), 3))
+    if uvs and np.all(unique[:, 1] >= 0):
+        columns['uv']=np.array(uvs, dtype=np.float64)[unique[:, 1]]
+    mesh=Mesh(VertexBuffer.from_arrays(**columns), indices.reshape(-1))
+    if not has_normals:
+        mesh.compute_normals()
+    return mesh
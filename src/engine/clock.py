@@ -0,0 +1,28 @@
+import time
+
+class FrameClock():
+    #   Paces a loop to a target frame rate. Waiting sleeps for most of the
+    #   remaining time and spins on perf_counter for the last spin_threshold
+    #   seconds, since sleep() can overshoot by a millisecond or more.
+    def __init__(self, target_fps=60, spin_threshold=0.001):
+        self.spin_threshold=spin_threshold
+        self.set_target_fps(target_fps)
+
+    def set_target_fps(self, target_fps):
+        # None or 0 runs unpaced
+        self.target_fps=target_fps
+        self.frame_time=1.0/target_fps if target_fps else 0.0
+
+    def now(self):
+        return time.perf_counter()
+
+    def wait_for_next_frame(self, frame_start):
+        if self.frame_time:
+            self.wait_until(frame_start+self.frame_time)
+
+    def wait_until(self, deadline):
+        remaining=deadline-time.perf_counter()
+        if remaining > self.spin_threshold:
+            time.sleep(remaining-self.spin_threshold)
+        while time.perf_counter() < deadline:
+            pass
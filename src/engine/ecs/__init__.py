@@ -0,0 +1,4 @@
+from .component import Component
+from .archetype import Archetype
+from .world import World
+from .system import System
@@ -0,0 +1,61 @@
+import numpy as np
+
+class Archetype():
+    #   Every entity with exactly this set of components. Rows live in one
+    #   structured array, a column per component, with the entity id of
+    #   each row alongside. Rows stay packed: removing one moves the last
+    #   row into its place.
+    def __init__(self, components, capacity=64):
+        self.components=tuple(sorted(components, key=lambda c: c.id))
+        self.names=frozenset(c.name for c in self.components)
+        self.dtype=np.dtype([c.field for c in self.components])
+        self.data=np.zeros(capacity, dtype=self.dtype)
+        self.entities=np.zeros(capacity, dtype=np.int64)
+        self.count=0
+        self._defaults()
+
+    def add(self, count=1):
+        # Appends default rows, returns the index of the first
+        start=self.count
+        if start+count > len(self.data):
+            self._grow(max(len(self.data)*2, start+count))
+        self.count+=count
+        return start
+
+    def remove(self, row):
+        # Returns the entity now at row, or None when row was the last
+        last=self.count-1
+        moved=None
+        if row != last:
+            self.data[row]=self.data[last]
+            self.entities[row]=self.entities[last]
+            moved=int(self.entities[row])
+        self.data[last]=self.blank
+        self.count=last
+        return moved
+
+    def column(self, name):
+        # View of the live rows of one component
+        return self.data[name][:self.count]
+
+    def _defaults(self):
+        self.blank=np.zeros((), dtype=self.dtype)
+        for c in self.components:
+            if c.default is not None:
+                self.blank[c.name]=c.default
+        self.data[...]=self.blank
+
+    def _grow(self, capacity):
+        data=np.empty(capacity, dtype=self.dtype)
+        data[...]=self.blank
+        data[:self.count]=self.data[:self.count]
+        self.data=data
+        entities=np.zeros(capacity, dtype=np.int64)
+        entities[:self.count]=self.entities[:self.count]
+        self.entities=entities
+
+    def __len__(self):
+        return self.count
+
+    def __repr__(self):
+        return "<Archetype (%s) %s entities>"%(', '.join(c.name for c in self.components), self.count)
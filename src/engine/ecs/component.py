@@ -0,0 +1,28 @@
+import numpy as np
+
+class Component():
+    #   One named field of an entity, stored as a column of its archetype's
+    #   structured array. dtype may itself be structured for components
+    #   with several fields, shape gives vector components their width.
+    #   A wrapper such as Vec3Array makes queries hand the column out
+    #   wrapped, still a view of the archetype's storage.
+    def __init__(self, name, dtype=np.float64, shape=(), wrapper=None, default=None):
+        self.name=name
+        self.dtype=np.dtype(dtype)
+        self.shape=shape if isinstance(shape, tuple) else (shape,)
+        self.wrapper=wrapper
+        self.default=default
+        # Set by World.register, orders columns and archetype keys
+        self.id=None
+
+    @property
+    def field(self):
+        return (self.name, self.dtype, self.shape)
+
+    def wrap(self, column):
+        if self.wrapper is None:
+            return column
+        return self.wrapper._wrap(column)
+
+    def __repr__(self):
+        return "<Component %s %s%s>"%(self.name, self.dtype, self.shape if self.shape else '')
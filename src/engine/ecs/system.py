@@ -0,0 +1,17 @@
+from ..profiler import PROFILER
+
+class System():
+    #   Logic over every entity with the components listed in components
+    #   and none of exclude. run() calls update() once per matching
+    #   archetype with the entity ids and the columns, in the order of
+    #   components, so the work is vectorized across each archetype.
+    components=()
+    exclude=()
+
+    def run(self, world, dt):
+        with PROFILER.zone(self.__class__.__name__):
+            for chunk in world.query(*self.components, exclude=self.exclude):
+                self.update(dt, *chunk)
+
+    def update(self, dt, entities, *columns):
+        pass
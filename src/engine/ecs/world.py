@@ -0,0 +1,216 @@
+import numpy as np
+
+from .archetype import Archetype
+from .component import Component
+
+INDEX_BITS=32
+INDEX_MASK=(1 << INDEX_BITS)-1
+
+class World():
+    #   Entities are ids with the slot index in the low 32 bits and the
+    #   slot's generation above, so an id kept after its entity was
+    #   destroyed never matches whatever reuses the slot. Each entity's
+    #   components live in the Archetype for its exact component set,
+    #   query() hands out whole columns of the matching archetypes so
+    #   systems work on arrays instead of per entity objects.
+    #   Adding or removing entities or components while iterating a query
+    #   moves rows around, collect the changes and apply them afterwards.
+    def __init__(self, capacity=256):
+        self.components={}
+        # frozenset of component names -> Archetype
+        self.archetypes={}
+        self.generations=np.zeros(capacity, dtype=np.int64)
+        # Per slot archetype and row, archetype None while the slot is free
+        self.locations=[None]*capacity
+        self.rows=np.zeros(capacity, dtype=np.int64)
+        self.free=[]
+        self.count=0
+        self.alive=0
+        self.query_cache={}
+
+    def register(self, component):
+        assert isinstance(component, Component), "component must be an instance of Component."
+        if component.name in self.components:
+            raise Exception("Component %s has already been registered!"%component.name)
+        component.id=len(self.components)
+        self.components[component.name]=component
+        return component
+
+    ########################################
+    #   Entities
+    ########################################
+
+    def create(self, **values):
+        # create(position=(0, 1, 0), health=100) gives the entity exactly
+        # those components
+        archetype=self._archetype(values.keys())
+        index=self._allocate()
+        row=archetype.add()
+        archetype.entities[row]=entity=self._id(index)
+        for name, value in values.items():
+            archetype.data[name][row]=value
+        self.locations[index]=archetype
+        self.rows[index]=row
+        return entity
+
+    def create_many(self, count, **columns):
+        # Each column is one value for all or an array of count values,
+        # returns the ids as an array
+        archetype=self._archetype(columns.keys())
+        indices=self._allocate_many(count)
+        start=archetype.add(count)
+        entities=(self.generations[indices] << INDEX_BITS) | indices
+        archetype.entities[start:start+count]=entities
+        for name, value in columns.items():
+            archetype.data[name][start:start+count]=value
+        for index in indices.tolist():
+            self.locations[index]=archetype
+        self.rows[indices]=np.arange(start, start+count)
+        return entities
+
+    def destroy(self, entity):
+        index=self._index(entity)
+        self._remove_row(self.locations[index], int(self.rows[index]))
+        self.locations[index]=None
+        self.generations[index]+=1
+        self.free.append(index)
+        self.alive-=1
+
+    def is_alive(self, entity):
+        index=entity & INDEX_MASK
+        return index < self.count and self.locations[index] is not None and int(self.generations[index]) == entity >> INDEX_BITS
+
+    def has(self, entity, name):
+        return name in self.locations[self._index(entity)].names
+
+    ########################################
+    #   Components
+    ########################################
+
+    def get(self, entity, name):
+        # The entity's value, a view for vector and structured components
+        index=self._index(entity)
+        archetype=self.locations[index]
+        if name not in archetype.names:
+            raise Exception("Entity %s has no %s component!"%(entity, name))
+        return archetype.data[name][self.rows[index]]
+
+    def set(self, entity, name, value):
+        index=self._index(entity)
+        archetype=self.locations[index]
+        if name not in archetype.names:
+            raise Exception("Entity %s has no %s component!"%(entity, name))
+        archetype.data[name][self.rows[index]]=value
+
+    def add_component(self, entity, name, value=None):
+        # Moves the entity to the archetype with the extra component
+        index=self._index(entity)
+        source=self.locations[index]
+        if name in source.names:
+            raise Exception("Entity %s already has a %s component!"%(entity, name))
+        self._move(index, source, self._archetype(source.names | {name}))
+        if value is not None:
+            self.set(entity, name, value)
+
+    def remove_component(self, entity, name):
+        index=self._index(entity)
+        source=self.locations[index]
+        if name not in source.names:
+            raise Exception("Entity %s has no %s component!"%(entity, name))
+        self._move(index, source, self._archetype(source.names-{name}))
+
+    ########################################
+    #   Queries
+    ########################################
+
+    def query(self, *names, exclude=()):
+        #   For each archetype with all of names and none of exclude yields
+        #   (entities, column, ...), every column a view over the same rows
+        #   in the order of names, wrapped when the component has a wrapper
+        components=[self.components[name] for name in names]
+        for archetype in self.archetypes_for(names, exclude):
+            if archetype.count:
+                yield (archetype.entities[:archetype.count],)+tuple(c.wrap(archetype.column(c.name)) for c in components)
+
+    def archetypes_for(self, names, exclude=()):
+        key=(frozenset(names), frozenset(exclude))
+        matches=self.query_cache.get(key)
+        if matches is None:
+            for name in key[0] | key[1]:
+                if name not in self.components:
+                    raise Exception("Component %s is not registered!"%name)
+            matches=[a for a in self.archetypes.values() if key[0] <= a.names and not key[1] & a.names]
+            self.query_cache[key]=matches
+        return matches
+
+    def count_entities(self, *names, exclude=()):
+        return sum(a.count for a in self.archetypes_for(names, exclude))
+
+    ########################################
+    #   Internals
+    ########################################
+
+    def _archetype(self, names):
+        key=frozenset(names)
+        archetype=self.archetypes.get(key)
+        if archetype is None:
+            for name in key:
+                if name not in self.components:
+                    raise Exception("Component %s is not registered!"%name)
+            archetype=self.archetypes[key]=Archetype([self.components[name] for name in key])
+            self.query_cache.clear()
+        return archetype
+
+    def _move(self, index, source, target):
+        row=int(self.rows[index])
+        new_row=target.add()
+        for name in source.names & target.names:
+            target.data[name][new_row]=source.data[name][row]
+        target.entities[new_row]=source.entities[row]
+        self._remove_row(source, row)
+        self.locations[index]=target
+        self.rows[index]=new_row
+
+    def _remove_row(self, archetype, row):
+        moved=archetype.remove(row)
+        if moved is not None:
+            self.rows[moved & INDEX_MASK]=row
+
+    def _allocate(self):
+        if self.free:
+            index=self.free.pop()
+        else:
+            if self.count == len(self.rows):
+                self._grow(len(self.rows)*2)
+            index=self.count
+            self.count+=1
+        self.alive+=1
+        return index
+
+    def _allocate_many(self, count):
+        reused=self.free[len(self.free)-min(count, len(self.free)):][::-1]
+        del self.free[len(self.free)-len(reused):]
+        fresh=count-len(reused)
+        if self.count+fresh > len(self.rows):
+            self._grow(max(len(self.rows)*2, self.count+fresh))
+        indices=np.array(reused+list(range(self.count, self.count+fresh)), dtype=np.int64)
+        self.count+=fresh
+        self.alive+=count
+        return indices
+
+    def _id(self, index):
+        return (int(self.generations[index]) << INDEX_BITS) | index
+
+    def _index(self, entity):
+        if not self.is_alive(entity):
+            raise Exception("Entity %s does not exist!"%entity)
+        return entity & INDEX_MASK
+
+    def _grow(self, capacity):
+        extra=capacity-len(self.rows)
+        self.generations=np.concatenate((self.generations, np.zeros(extra, dtype=np.int64)))
+        self.rows=np.concatenate((self.rows, np.zeros(extra, dtype=np.int64)))
+        self.locations.extend([None]*extra)
+
+    def __len__(self):
+        return self.alive
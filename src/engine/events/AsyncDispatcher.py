@@ -0,0 +1,88 @@
+import copy
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+class AsyncHandler():
+    #   Registration entry for a handler that runs off the main thread
+    __slots__=('callback', 'mode', 'on_complete')
+
+    def __init__(self, callback, mode, on_complete=None):
+        self.callback=callback
+        self.mode=mode
+        self.on_complete=on_complete
+
+class AsyncDispatcher():
+    #   Runs async-safe handlers on a thread pool or on an asyncio loop in a
+    #   background thread. Handlers get a copy of the event, so they can
+    #   neither cancel it nor see it reused by the pool. Results come back
+    #   to the main thread through collect(), which EventHandler.flush()
+    #   calls once per frame.
+    THREAD='thread'
+    ASYNCIO='asyncio'
+
+    def __init__(self, max_workers=None):
+        self.max_workers=max_workers
+        self.executor=None
+        self.loop=None
+        self.loop_thread=None
+        self.in_flight=[]
+
+    def submit(self, handler, event):
+        snapshot=copy.copy(event)
+        snapshot.pooled=False
+        if handler.mode == AsyncDispatcher.ASYNCIO:
+            import asyncio
+            future=asyncio.run_coroutine_threadsafe(handler.callback(snapshot), self._get_loop())
+        else:
+            future=self._get_executor().submit(handler.callback, snapshot)
+        self.in_flight.append((future, handler))
+
+    def collect(self):
+        # Delivers finished results on the calling thread. A handler that
+        # raised re-raises here, on the main thread
+        if not self.in_flight:
+            return 0
+        # One scan, so a future finishing meanwhile stays in flight for
+        # the next collect() instead of being dropped
+        done=[]
+        pending=[]
+        for entry in self.in_flight:
+            (done if entry[0].done() else pending).append(entry)
+        if not done:
+            return 0
+        self.in_flight=pending
+        for i, (future, handler) in enumerate(done):
+            try:
+                result=future.result()
+                if handler.on_complete is not None:
+                    handler.on_complete(result)
+            except BaseException:
+                # The rest are delivered by the next collect()
+                self.in_flight=done[i+1:]+self.in_flight
+                raise
+        return len(done)
+
+    def shutdown(self, wait=True):
+        if self.executor is not None:
+            self.executor.shutdown(wait=wait)
+            self.executor=None
+        if self.loop is not None:
+            self.loop.call_soon_threadsafe(self.loop.stop)
+            if wait:
+                self.loop_thread.join()
+            self.loop=None
+            self.loop_thread=None
+
+    def _get_executor(self):
+        if self.executor is None:
+            self.executor=ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix='event-handler')
+        return self.executor
+
+    def _get_loop(self):
+        if self.loop is None:
+            # asyncio is only imported by games that register ASYNCIO handlers
+            import asyncio
+            self.loop=asyncio.new_event_loop()
+            self.loop_thread=threading.Thread(target=self.loop.run_forever, name='event-loop', daemon=True)
+            self.loop_thread.start()
+        return self.loop
@@ -1,9 +1,22 @@
 class Event():
     id=None
     category=None
+    # One bit per registered EventCategory this event belongs to
+    category_mask=0
     callback=None
-    def __init__(self, category):
+    # Set on events handed out by an EventPool, so queues know to release them
+    pooled=False
+    # (attribute, struct format code) pairs an EventRecorder packs into the
+    # payload, e.g. (('x', 'd'), ('y', 'd'))
+    record_fields=()
+    def __init__(self, category=None):
         self.handled=False
+    def reset(self, **fields):
+        # Returns a pooled event to a fresh state. Subclasses with their own
+        # defaults should override this and call super().reset(**fields)
+        self.handled=False
+        for key, value in fields.items():
+            setattr(self, key, value)
     def getName(self):
         return self.__class__.__name__
     def getType(self):
@@ -11,7 +24,10 @@ class Event():
     def __str__(self):
         return self.getName()
     def inCategory(self, category):
-        return self.category & category
+        # category may be an EventCategory or a mask of several, in which
+        # case this is true when the event is in any of them
+        mask=category.mask if isinstance(category, EventCategory) else category
+        return (self.category_mask & mask) != 0
     def isCancelled(self):
         return self.handled == True
     @classmethod
@@ -19,9 +35,20 @@ class Event():
         if cls.category is None:
             if isinstance(category, list):
                 cls.category=set(category)
+            elif isinstance(category, EventCategory):
+                cls.category={category}
+            cls.updateCategoryMask()
         else:
             raise Exception("Event Category(s) for Event %s have already been set!"%cls.__name__)
     @classmethod
+    def updateCategoryMask(cls):
+        # Categories only get a bit once registered, so this is rerun
+        # by the EventHandler whenever a category is registered
+        mask=0
+        for category in cls.category or ():
+            mask|=category.mask
+        cls.category_mask=mask
+    @classmethod
     def register(cls, id, callback):
         if cls.id is None:
             cls.id=id
@@ -32,12 +59,19 @@ class Event():
 class EventCategory():
     def __init__(self, categoryName):
         self.id=None
+        self.mask=0
         self.name=categoryName
     def register(self, id):
         if self.id is None:
             self.id=id
+            self.mask=1 << id
         else:
             raise Exception("EventCategory %s has already been registered! Attempted Registration Failed."%self.name)
     @property
     def ID(self):
         return self.id
+    def __or__(self, category):
+        # Input | Keyboard gives a mask matching either category
+        return self.mask | (category.mask if isinstance(category, EventCategory) else category)
+    def __ror__(self, mask):
+        return self.__or__(mask)
@@ -1,48 +1,211 @@
+import inspect
+
 from .event import Event, EventCategory
+from .EventPool import EventPool
+from .EventQueue import EventQueue
+from .AsyncDispatcher import AsyncDispatcher, AsyncHandler
+from ..profiler import PROFILER
 
 class EventHandler():
     def __init__(self):
         self.registered_events=[]
         self.registered_categories=[]
         self.registered_event_handlers=[]
+        # Indexed by category bit, category.ID
         self.registered_category_handlers=[]
+        # (mask, callback) pairs for handlers subscribed to any of several categories
+        self.registered_mask_handlers=[]
+        # Per event type tuple of every handler that wants it, type handlers
+        # first then category handlers. Rebuilt only when registration changes
+        self.dispatch_table=None
+        # Per event type tuple of AsyncHandlers, submitted after the
+        # synchronous handlers have run if the event was not cancelled
+        self.async_table=None
+        self.pool=EventPool()
+        self.event_queue=EventQueue()
+        self.async_dispatcher=AsyncDispatcher()
+        # EventRecorder logging every dispatched event, see start_recording
+        self.recorder=None
 
     def onEvent(self, event):
         # OnEvent will assume the event is registered.
         # If the event is not registered, then it will
         # cause issues and crash and burn.
-        for handler in self.registered_event_handlers[event.getType()]: # For everything that wants this Specific Event!
-            if event.isCancelled(): #If the event has been cancelled, just stop
+        if PROFILER.enabled:
+            return self._profiled_onEvent(event)
+        if self.recorder is not None:
+            self.recorder.record_event(event)
+        table=self.dispatch_table
+        if table is None:
+            table=self._build_dispatch_table()
+        for handler in table[event.id]:
+            if event.handled: #If the event has been cancelled, just stop
                 break
             handler(event)
-        if not event.isCancelled(): #Continue to send to valid category handlers, if not cancelled
-            for category in self.registered_categories:
-                if event.isCancelled(): #Just stop already if canceled.
+        async_handlers=self.async_table[event.id]
+        if async_handlers and not event.handled:
+            for handler in async_handlers:
+                self.async_dispatcher.submit(handler, event)
+
+    def _profiled_onEvent(self, event):
+        # Same as onEvent, timed per event type and per handler
+        if self.recorder is not None:
+            self.recorder.record_event(event)
+        table=self.dispatch_table
+        if table is None:
+            table=self._build_dispatch_table()
+        with PROFILER.zone('event:%s'%event.getName()):
+            for handler in table[event.id]:
+                if event.handled:
                     break
-                elif event.inCategory(category): #If event is part of this category
-                    for handler in self.registered_category_handler[category.ID]: #For everything that wants this category of events
-                        if event.isCancelled(): #Stop it, Stop it, Stop it!
-                            break
-                        handler(event)
+                with PROFILER.zone('handler:%s'%getattr(handler, '__qualname__', handler)):
+                    handler(event)
+            async_handlers=self.async_table[event.id]
+            if async_handlers and not event.handled:
+                for handler in async_handlers:
+                    self.async_dispatcher.submit(handler, event)
+
+    def fire(self, event_type, **fields):
+        # Dispatches a pooled event, fields are set on it through Event.reset
+        event=self.pool.acquire(event_type, **fields)
+        try:
+            self.onEvent(event)
+        finally:
+            self.pool.release(event)
+
+    def queue(self, event, priority=EventQueue.NORMAL):
+        # Defers dispatch until the next flush()
+        for dropped in self.event_queue.push(event, priority):
+            if dropped.pooled:
+                self.pool.release(dropped)
+
+    def post(self, event_type, priority=EventQueue.NORMAL, **fields):
+        # Queues a pooled event, released back to the pool after the flush
+        self.queue(self.pool.acquire(event_type, **fields), priority)
+
+    def set_coalescing(self, event_type, rule):
+        self.event_queue.set_coalescing(event_type, rule)
+
+    def flush(self):
+        # Delivers finished off-thread results, then dispatches everything
+        # queued since the last flush. Called once per frame
+        if self.recorder is not None:
+            self.recorder.record_frame()
+        self.async_dispatcher.collect()
+        return self.event_queue.drain(self._dispatch_queued)
+
+    def shutdown(self, wait=True):
+        self.stop_recording()
+        self.async_dispatcher.shutdown(wait)
+
+    def start_recording(self, path):
+        # Records every event dispatched from now on, see EventRecorder
+        from .EventRecorder import EventRecorder
+        self.stop_recording()
+        self.recorder=EventRecorder(path)
+        return self.recorder
+
+    def stop_recording(self):
+        if self.recorder is not None:
+            self.recorder.close()
+            self.recorder=None
+
+    def _dispatch_queued(self, event):
+        try:
+            self.onEvent(event)
+        finally:
+            if event.pooled:
+                self.pool.release(event)
 
     def register_event(self, event):
         assert issubclass(event, Event), "Event to be registered must be child of Event."
         event.register(len(self.registered_events), self.onEvent)
         self.registered_events.append(event)
         self.registered_event_handlers.append([])
+        event.updateCategoryMask()
+        self.dispatch_table=None
 
     def register_category(self, category):
-        assert issubclass(category, EventCategory), "Category to be registered must be child of EventCategory."
-        category.registered(len(self.registered_categories))
+        assert isinstance(category, EventCategory), "Category to be registered must be an EventCategory."
+        category.register(len(self.registered_categories))
         self.registered_categories.append(category)
         self.registered_category_handlers.append([])
+        for event in self.registered_events:
+            event.updateCategoryMask()
+        self.dispatch_table=None
 
-    def register_handler(self, event, callback):
+    def register_handler(self, event, callback, async_mode=None, on_complete=None):
         #   This ties callback functions to specific event, so that
-        #   when an event fires, the call back is called with the event
+        #   when an event fires, the call back is called with the event.
+        #   A list of categories or an int mask subscribes the callback
+        #   once to every event in any of those categories.
+        #   async_mode AsyncDispatcher.THREAD or ASYNCIO (a coroutine
+        #   function) opts the handler into running off the main thread,
+        #   on_complete then receives its result during a later flush()
+        if async_mode is not None:
+            assert async_mode in (AsyncDispatcher.THREAD, AsyncDispatcher.ASYNCIO), "Unknown async_mode %s"%async_mode
+            assert async_mode != AsyncDispatcher.ASYNCIO or inspect.iscoroutinefunction(callback), "ASYNCIO handlers must be coroutine functions."
+            callback=AsyncHandler(callback, async_mode, on_complete)
+        if isinstance(event, (list, int)):
+            self.registered_mask_handlers.append((self.category_mask(event), callback))
+        else:
+            self._handlers_for(event).append(callback)
+        self.dispatch_table=None
+
+    def unregister_handler(self, event, callback):
+        if isinstance(event, (list, int)):
+            mask=self.category_mask(event)
+            handlers=[h for m, h in self.registered_mask_handlers if m == mask]
+        else:
+            handlers=self._handlers_for(event)
+        for handler in handlers:
+            if handler == callback or (isinstance(handler, AsyncHandler) and handler.callback == callback):
+                break
+        else:
+            raise Exception("Handler %s is not registered for %s!"%(callback, event))
+        if isinstance(event, (list, int)):
+            self.registered_mask_handlers.remove((mask, handler))
+        else:
+            handlers.remove(handler)
+        self.dispatch_table=None
+
+    def category_mask(self, categories):
+        if isinstance(categories, int):
+            return categories
+        mask=0
+        for category in categories:
+            assert category in self.registered_categories, "Category %s is not registered."%category.name
+            mask|=category.mask
+        return mask
+
+    def events_in_category(self, categories):
+        # Registered event types belonging to any of the given categories
+        mask=self.category_mask(categories) if not isinstance(categories, EventCategory) else categories.mask
+        return [event for event in self.registered_events if event.category_mask & mask]
+
+    def _handlers_for(self, event):
         if event in self.registered_events: # Is event registered as an event?
-            self.registered_event_handlers[event.getType()].append(callback)
+            return self.registered_event_handlers[event.id]
         elif event in self.registered_categories: #Is the event really a category?
-            self.registered_category_handlers[event.ID].append(callback)
+            return self.registered_category_handlers[event.ID]
         else: #Event is not registered, Can't register for non-existent event
             raise Exception("Received Non Registered Event! %s"%event)
+
+    def _build_dispatch_table(self):
+        table=[]
+        async_table=[]
+        for event in self.registered_events:
+            handlers=list(self.registered_event_handlers[event.id])
+            mask=event.category_mask
+            while mask: # Each set bit, lowest category first
+                low=mask & -mask
+                handlers.extend(self.registered_category_handlers[low.bit_length()-1])
+                mask^=low
+            for mask, callback in self.registered_mask_handlers:
+                if event.category_mask & mask:
+                    handlers.append(callback)
+            table.append(tuple(h for h in handlers if not isinstance(h, AsyncHandler)))
+            async_table.append(tuple(h for h in handlers if isinstance(h, AsyncHandler)))
+        self.async_table=async_table
+        self.dispatch_table=table
+        return table
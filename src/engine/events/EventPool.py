@@ -0,0 +1,35 @@
+class EventPool():
+    #   Recycles Event instances per event type so firing an event does not
+    #   allocate. Released events are reset on their next acquire, so a
+    #   handler must not keep a reference to a pooled event after it returns.
+    def __init__(self, capacity=64):
+        self.capacity=capacity
+        self.free={}
+
+    def acquire(self, event_type, **fields):
+        free=self.free.get(event_type)
+        if free:
+            event=free.pop()
+        else:
+            event=event_type.__new__(event_type)
+            event.pooled=True
+        event.reset(**fields)
+        return event
+
+    def release(self, event):
+        # Drops the payload fields so a released event does not keep what
+        # it carried alive, acquire() resets the rest
+        event.__dict__.clear()
+        event.pooled=True
+        free=self.free.get(event.__class__)
+        if free is None:
+            free=self.free[event.__class__]=[]
+        if len(free) < self.capacity:
+            free.append(event)
+
+    def prefill(self, event_type, count):
+        free=self.free.setdefault(event_type, [])
+        while len(free) < min(count, self.capacity):
+            event=event_type.__new__(event_type)
+            event.pooled=True
+            free.append(event)
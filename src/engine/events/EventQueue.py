@@ -0,0 +1,97 @@
+class RingBuffer():
+    #   FIFO over a fixed list that doubles when full. push returns a
+    #   sequence number that stays valid for replace() until it is popped.
+    def __init__(self, capacity=256):
+        self.items=[None]*capacity
+        self.head=0
+        self.count=0
+        self.head_seq=0
+
+    def push(self, item):
+        if self.count == len(self.items):
+            self._grow()
+        self.items[(self.head+self.count) % len(self.items)]=item
+        self.count+=1
+        return self.head_seq+self.count-1
+
+    def pop(self):
+        item=self.items[self.head]
+        self.items[self.head]=None
+        self.head=(self.head+1) % len(self.items)
+        self.count-=1
+        self.head_seq+=1
+        return item
+
+    def get(self, seq):
+        return self.items[(self.head+seq-self.head_seq) % len(self.items)]
+
+    def replace(self, seq, item):
+        self.items[(self.head+seq-self.head_seq) % len(self.items)]=item
+
+    def _grow(self):
+        n=len(self.items)
+        self.items=[self.items[(self.head+i) % n] for i in range(0, n)]+[None]*n
+        self.head=0
+
+    def __len__(self):
+        return self.count
+
+class EventQueue():
+    #   Deferred events, dispatched in one batch per frame by flush().
+    #   Lane 0 is the highest priority and is drained first. A coalescing
+    #   rule per event type folds a newly queued event into the one already
+    #   pending in the same lane: LATEST keeps only the newest, or a
+    #   callable merge(pending, new) returns the event to keep.
+    LATEST='latest'
+    HIGH=0
+    NORMAL=1
+    LOW=2
+
+    def __init__(self, lanes=3, capacity=256):
+        self.lanes=[RingBuffer(capacity) for i in range(0, lanes)]
+        self.rules={}
+        # (lane, event type) -> sequence number of the pending event
+        self.pending={}
+
+    def set_coalescing(self, event_type, rule):
+        if rule is None:
+            self.rules.pop(event_type, None)
+        else:
+            assert rule == EventQueue.LATEST or callable(rule), "Coalescing rule must be EventQueue.LATEST or a callable."
+            self.rules[event_type]=rule
+
+    def push(self, event, priority=NORMAL):
+        lane=self.lanes[priority]
+        rule=self.rules.get(event.__class__)
+        if rule is not None:
+            key=(priority, event.__class__)
+            seq=self.pending.get(key)
+            if seq is not None:
+                old=lane.get(seq)
+                keep=event if rule == EventQueue.LATEST else rule(old, event)
+                lane.replace(seq, keep)
+                # Hand back whichever events were dropped so they can be released
+                return tuple(e for e in (old, event) if e is not keep)
+            self.pending[key]=lane.push(event)
+            return ()
+        lane.push(event)
+        return ()
+
+    def drain(self, dispatch):
+        # Only events queued before the flush started are dispatched, events
+        # queued by handlers wait for the next flush
+        counts=[len(lane) for lane in self.lanes]
+        dispatched=0
+        for priority, lane in enumerate(self.lanes):
+            for i in range(0, counts[priority]):
+                seq=lane.head_seq
+                event=lane.pop()
+                key=(priority, event.__class__)
+                if self.pending.get(key) == seq:
+                    del self.pending[key]
+                dispatch(event)
+                dispatched+=1
+        return dispatched
+
+    def __len__(self):
+        return sum(len(lane) for lane in self.lanes)
@@ -0,0 +1,176 @@
+import mmap
+import queue
+import struct
+import threading
+import time
+
+import numpy as np
+
+from ..clock import FrameClock
+
+#   File layout, little endian:
+#       file header    magic, version, record header size, wall clock start
+#       records        header (kind, type id, frame, seconds since start,
+#                      payload size) followed by the payload
+#   A TYPE record naming each event type is written before its first
+#   EVENT record, so a log replays by name even if ids change between runs.
+MAGIC=b'EVLG'
+VERSION=1
+FILE_HEADER=struct.Struct('<4sHHd')
+RECORD_HEADER=struct.Struct('<HHIdI')
+
+EVENT=0
+FRAME=1
+TYPE=2
+
+class EventRecorder():
+    #   Appends every dispatched event and each frame boundary to a binary
+    #   log. Records are packed on the calling thread, since the event may
+    #   be pooled and reused as soon as dispatch returns, and written out
+    #   in batches by a background thread. The payload is the event's
+    #   record_fields packed with struct.
+    def __init__(self, path, batch_size=1024):
+        self.path=path
+        self.batch_size=batch_size
+        self.file=open(path, 'wb')
+        self.file.write(FILE_HEADER.pack(MAGIC, VERSION, RECORD_HEADER.size, time.time()))
+        self.start=time.perf_counter()
+        self.frame=0
+        self.events=0
+        # Event type -> (Struct of header and payload, field names)
+        self.layouts={}
+        self.queue=queue.SimpleQueue()
+        self.thread=threading.Thread(target=self._run, name='event-recorder', daemon=True)
+        self.thread.start()
+
+    def record_event(self, event):
+        layout=self.layouts.get(event.__class__)
+        if layout is None:
+            layout=self._add_type(event.__class__)
+        packer, names = layout
+        self.queue.put(packer.pack(EVENT, event.id, self.frame, time.perf_counter()-self.start, packer.size-RECORD_HEADER.size,
+                                   *[getattr(event, name) for name in names]))
+        self.events+=1
+
+    def record_frame(self):
+        self.queue.put(RECORD_HEADER.pack(FRAME, 0, self.frame, time.perf_counter()-self.start, 0))
+        self.frame+=1
+
+    def close(self):
+        # Writes out everything still queued
+        if self.thread is not None:
+            self.queue.put(None)
+            self.thread.join()
+            self.thread=None
+            self.file.close()
+
+    def _add_type(self, event_type):
+        fields=event_type.record_fields
+        name=event_type.__name__.encode('utf-8')
+        self.queue.put(RECORD_HEADER.pack(TYPE, event_type.id, self.frame, time.perf_counter()-self.start, len(name))+name)
+        layout=self.layouts[event_type]=(struct.Struct(RECORD_HEADER.format+''.join(code for field, code in fields)),
+                                          tuple(field for field, code in fields))
+        return layout
+
+    def _run(self):
+        running=True
+        while running:
+            batch=[self.queue.get()]
+            while len(batch) < self.batch_size and batch[-1] is not None:
+                try:
+                    batch.append(self.queue.get_nowait())
+                except queue.Empty:
+                    break
+            if batch[-1] is None:
+                batch.pop()
+                running=False
+            self.file.write(b''.join(batch))
+        self.file.flush()
+
+class EventLog():
+    #   Memory mapped reader for a file written by EventRecorder. A log cut
+    #   short by a crash reads up to its last complete record.
+    def __init__(self, path):
+        self.path=path
+        with open(path, 'rb') as f:
+            self.map=mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        magic, version, header_size, self.wall_start = FILE_HEADER.unpack_from(self.map, 0)
+        if magic != MAGIC or version != VERSION or header_size != RECORD_HEADER.size:
+            raise Exception("%s is not a version %s event log!"%(path, VERSION))
+        # Type id -> event type name, filled in as TYPE records are read
+        self.types={}
+
+    def records(self):
+        # (kind, type id, frame, seconds since start, payload memoryview)
+        view=memoryview(self.map)
+        offset=FILE_HEADER.size
+        end=len(self.map)
+        while offset+RECORD_HEADER.size <= end:
+            kind, type_id, frame, timestamp, size = RECORD_HEADER.unpack_from(self.map, offset)
+            offset+=RECORD_HEADER.size
+            if offset+size > end:
+                break
+            payload=view[offset:offset+size]
+            offset+=size
+            if kind == TYPE:
+                self.types[type_id]=bytes(payload).decode('utf-8')
+            yield kind, type_id, frame, timestamp, payload
+
+    def frame_times(self):
+        # Seconds between consecutive frame boundaries
+        marks=np.array([timestamp for kind, type_id, frame, timestamp, payload in self.records() if kind == FRAME])
+        return np.diff(marks)
+
+    def close(self):
+        self.map.close()
+
+class EventReplay():
+    #   Feeds a recorded log back through an EventHandler. Events are
+    #   matched to the handler's registered types by name and rebuilt from
+    #   the pool with their recorded fields. By default the log runs as
+    #   fast as possible, speed scales the recorded timing instead.
+    #   Events the handlers queue during replay are dropped at each frame,
+    #   they were recorded when they were first dispatched.
+    def __init__(self, log, event_handler):
+        self.log=log if isinstance(log, EventLog) else EventLog(log)
+        self.event_handler=event_handler
+        self.names={event.__name__: event for event in event_handler.registered_events}
+        # Dispatch time of each replayed frame, filled in by run()
+        self.frame_times=None
+
+    def run(self, speed=None):
+        # Returns (events dispatched, seconds taken)
+        handler=self.event_handler
+        types={}
+        frame_times=[]
+        clock=FrameClock()
+        start=clock.now()
+        frame_start=start
+        dispatched=0
+        for kind, type_id, frame, timestamp, payload in self.log.records():
+            if kind == EVENT:
+                event_type, unpacker, names = types[type_id]
+                handler.fire(event_type, **dict(zip(names, unpacker.unpack(payload))))
+                dispatched+=1
+            elif kind == FRAME:
+                handler.async_dispatcher.collect()
+                handler.event_queue.drain(self._drop)
+                now=clock.now()
+                frame_times.append(now-frame_start)
+                frame_start=now
+                if speed is not None:
+                    clock.wait_until(start+timestamp/speed)
+                    frame_start=clock.now()
+            elif kind == TYPE:
+                name=self.log.types[type_id]
+                event_type=self.names.get(name)
+                if event_type is None:
+                    raise Exception("Recorded event %s is not registered with the EventHandler!"%name)
+                types[type_id]=(event_type, struct.Struct('<'+''.join(code for field, code in event_type.record_fields)),
+                                tuple(field for field, code in event_type.record_fields))
+        self.frame_times=np.array(frame_times)
+        return dispatched, clock.now()-start
+
+    def _drop(self, event):
+        if event.pooled:
+            self.event_handler.pool.release(event)
@@ -1,11 +1,172 @@
+import atexit
 import logging
+import queue
+import threading
+import time
+from logging.handlers import QueueHandler
 import pygogo as gogo
 
+class RateLimitFilter(logging.Filter):
+    #   Lets through at most burst records per period seconds for each
+    #   distinct (logger, level, formatted message). Past that only every
+    #   sample-th repeat is kept, the next record let through reports how
+    #   many were dropped. Windows that expire with drops still pending
+    #   are pruned once a period and report them in a summary record of
+    #   their own, flush() does the same for all of them at shutdown.
+    #   Records arrive from any thread, the windows are guarded by a lock.
+    def __init__(self, burst=10, period=1.0, sample=100):
+        super().__init__()
+        self.burst=burst
+        self.period=period
+        self.sample=sample
+        # key -> [start, count, suppressed, last suppressed record]
+        self.windows={}
+        self.pruned=0.0
+        self.lock=threading.Lock()
+
+    def filter(self, record):
+        with self.lock:
+            summaries=self._prune(record.created) if record.created-self.pruned >= self.period else ()
+            result=self._filter(record)
+        # Outside the lock, the handlers may log themselves
+        self._emit(summaries)
+        return result
+
+    def flush(self):
+        # Reports every pending drop, called when logging shuts down
+        with self.lock:
+            summaries=[self._summary(window) for window in self.windows.values() if window[2]]
+        self._emit(summaries)
+
+    def _filter(self, record):
+        key=(record.name, record.levelno, record.getMessage())
+        now=record.created
+        window=self.windows.get(key)
+        if window is None or now-window[0] >= self.period:
+            suppressed=window[2] if window is not None else 0
+            self.windows[key]=[now, 1, 0, None]
+            if suppressed:
+                self._annotate(record, suppressed)
+            return True
+        window[1]+=1
+        if window[1] <= self.burst or (window[1]-self.burst) % self.sample == 0:
+            if window[2]:
+                self._annotate(record, window[2])
+                window[2]=0
+            return True
+        window[2]+=1
+        window[3]=record
+        return False
+
+    def _prune(self, now):
+        # Drops windows whose period is over, returning the records that
+        # report what they still had suppressed
+        summaries=[]
+        windows={}
+        for key, window in self.windows.items():
+            if now-window[0] < self.period:
+                windows[key]=window
+            elif window[2]:
+                summaries.append(self._summary(window))
+        self.windows=windows
+        self.pruned=now
+        return summaries
+
+    def _summary(self, window):
+        # Writes the last dropped record, counting the others
+        record=window[3]
+        if window[2] > 1:
+            self._annotate(record, window[2]-1)
+        window[2]=0
+        window[3]=None
+        return record
+
+    def _emit(self, summaries):
+        for record in summaries:
+            # Straight to the handlers, past this filter
+            logging.getLogger(record.name).callHandlers(record)
+
+    def _annotate(self, record, suppressed):
+        record.msg='%s (%s similar messages suppressed)'%(record.getMessage(), suppressed)
+        record.args=None
+
+class LogQueueHandler(QueueHandler):
+    #   Enqueues records along with the handlers that should write them,
+    #   so one writer thread can serve several loggers
+    def __init__(self, log_queue, handlers):
+        super().__init__(log_queue)
+        self.targets=handlers
+
+    def enqueue(self, record):
+        self.queue.put_nowait((self.targets, record))
+
+class BatchWriter():
+    #   Background thread draining the log queue. Records are grouped per
+    #   handler and stream handlers get one write and one flush per batch
+    #   instead of per record.
+    def __init__(self, log_queue, batch_size=512, interval=0.05):
+        self.queue=log_queue
+        self.batch_size=batch_size
+        self.interval=interval
+        self.thread=None
+
+    def start(self):
+        self.thread=threading.Thread(target=self._run, name='log-writer', daemon=True)
+        self.thread.start()
+
+    def stop(self):
+        if self.thread is not None:
+            self.queue.put(None)
+            self.thread.join()
+            self.thread=None
+
+    def _run(self):
+        running=True
+        while running:
+            batch=[self.queue.get()]
+            # Give a burst of logging a moment to pile up before writing
+            deadline=time.perf_counter()+self.interval
+            while len(batch) < self.batch_size and batch[-1] is not None:
+                try:
+                    batch.append(self.queue.get(timeout=max(0.0, deadline-time.perf_counter())))
+                except queue.Empty:
+                    break
+            if batch[-1] is None:
+                batch.pop()
+                running=False
+            self._write(batch)
+
+    def _write(self, batch):
+        per_handler={}
+        for handlers, record in batch:
+            for handler in handlers:
+                if record.levelno >= handler.level:
+                    per_handler.setdefault(handler, []).append(record)
+        for handler, records in per_handler.items():
+            try:
+                if isinstance(handler, logging.StreamHandler):
+                    handler.acquire()
+                    try:
+                        if handler.stream is None:
+                            handler.stream=handler._open()
+                        handler.stream.write(''.join(handler.format(r)+handler.terminator for r in records if handler.filter(r)))
+                        handler.flush()
+                    finally:
+                        handler.release()
+                else:
+                    for record in records:
+                        handler.handle(record)
+            except Exception:
+                handler.handleError(records[-1])
+
 class Log():
     corelogger=None
     clientlogger=None
 
-    def __init__(self):
+    def __init__(self, asynchronous=True, rate_limit=True):
+        #   asynchronous moves file and console writes onto a background
+        #   writer thread, the calling thread only formats and enqueues.
+        #   rate_limit drops floods of the same message, see RateLimitFilter
         log_format = '[%(asctime)s] [%(levelname)s] - %(name)s: %(message)s'
         formatter =logging.Formatter(log_format)
         self.corelogger=gogo.Gogo('core',
@@ -18,9 +179,40 @@ class Log():
                                     low_formatter=formatter,
                                     high_level='info',
                                     high_formatter=formatter).logger
+        self.writer=None
+        self.rate_limit=None
+        if asynchronous:
+            self.queue=queue.SimpleQueue()
+            self.writer=BatchWriter(self.queue)
+            for logger in (self.corelogger, self.clientlogger):
+                handlers=list(logger.handlers)
+                for handler in handlers:
+                    logger.removeHandler(handler)
+                logger.addHandler(LogQueueHandler(self.queue, handlers))
+            self.writer.start()
+        if rate_limit:
+            # On the logger, so it runs once per record on the calling thread
+            self.rate_limit=RateLimitFilter()
+            for logger in (self.corelogger, self.clientlogger):
+                logger.addFilter(self.rate_limit)
+        if asynchronous or rate_limit:
+            atexit.register(self.shutdown)
 
     def get_corelogger(self):
         return self.corelogger
 
     def get_clientlogger(self):
         return self.clientlogger
+
+    def set_level(self, level):
+        for logger in (self.corelogger, self.clientlogger):
+            logger.setLevel(level)
+
+    def shutdown(self):
+        # Reports pending rate limited drops and writes out everything
+        # still queued
+        if self.rate_limit is not None:
+            self.rate_limit.flush()
+        if self.writer is not None:
+            self.writer.stop()
+            self.writer=None
@@ -1,3 +1,5 @@
 from .common import Vector, Matrix
 from .vectors import Vec2, Vec3, Vec4
 from .matrix import Mat4
+from .arrays import VectorArray, Vec2Array, Vec3Array, Vec4Array, Mat4Array
+from .quaternion import Quat, QuatArray
@@ -0,0 +1,466 @@
+import numpy as np
+
+from .common import MathObject, Vector
+from .vectors import Vec2, Vec3, Vec4
+from .matrix import Mat4
+from ..profiler import profile
+
+class VectorArray(MathObject):
+    __slots__=('value',)
+    #   Structure of arrays for vectors. Every element lives in one
+    #   contiguous (N, dimension) buffer so operations are a single
+    #   vectorized call instead of N Vector objects.
+    vector_type=Vector
+
+    def __init__(self, values, dimension, dtype=None):
+        if isinstance(values, VectorArray):
+            assert values.dimensions == dimension, "Invalid VectorArray type! Requires %s but received %s"%(self.__class__.__name__, values.__class__.__name__)
+            values=values.value
+        if isinstance(values, int):
+            self.value=np.zeros((values, dimension), dtype=dtype or np.float64)
+        elif isinstance(values, np.ndarray):
+            assert values.ndim == 2 and values.shape[1] == dimension, "Array of shape (N, %s) is required for %s"%(dimension, self.__class__.__name__)
+            if dtype is None:
+                dtype = values.dtype if values.dtype in (np.float32, np.float64) else np.float64
+            self.value=np.ascontiguousarray(values, dtype=dtype)
+        elif isinstance(values, list):
+            rows=[]
+            for v in values:
+                if isinstance(v, Vector):
+                    assert v.dimensions == dimension, "list of %s is required for %s"%(self.vector_type.__name__, self.__class__.__name__)
+                    rows.append(v.value)
+                else:
+                    assert len(v) == dimension, "list of length %s lists is required for %s"%(dimension, self.__class__.__name__)
+                    rows.append(v)
+            self.value=np.array(rows, dtype=dtype or np.float64).reshape((-1, dimension))
+        else:
+            self.invalidTypeException(['VectorArray', 'int', 'list', 'Numpy.NDARRAY'])
+
+    ########################################
+    #   Returns New VectorArrays
+    ########################################
+
+    def add(self, vectors):
+        return self._new(np.add(self.value, self._operand(vectors)))
+
+    def subtract(self, vectors):
+        return self._new(np.subtract(self.value, self._operand(vectors)))
+
+    def scalar(self, scalar):
+        return self._new(np.multiply(self.value, self._scalar_operand(scalar)))
+
+    def hadamard_product(self, vectors):
+        return self._new(np.multiply(self.value, self._operand(vectors)))
+
+    def divide(self, vectors):
+        return self._new(np.divide(self.value, self._operand(vectors)))
+
+    def inverse(self):
+        return self._new(np.negative(self.value))
+
+    @profile('VectorArray.normalize')
+    def normalize(self):
+        m = self.magnitude
+        # Zero length vectors are left as zero rather than becoming NaN
+        np.place(m, m == 0, 1)
+        return self._new(np.divide(self.value, m[:, np.newaxis]))
+
+    @profile('VectorArray.transform')
+    def transform(self, matrix):
+        self.assert_matrix(matrix)
+        assert matrix.dimensions[1] == self.dimensions, "Matrix must have same amount of columns as the dimension of these vectors"
+        return self._new(np.matmul(self.value, matrix.value.T))
+
+    def __repr__(self):
+        return "<%s \n%s\n>"%(self.__class__.__name__, self.value)
+
+    ######################################
+    #   Reductions, return NDARRAY of (N,)
+    ######################################
+    def dot_product(self, vectors):
+        other = self._operand(vectors)
+        if other.ndim == 1:
+            return np.dot(self.value, other)
+        return np.einsum('ij,ij->i', self.value, other)
+
+    @profile('VectorArray.distance')
+    def distance(self, vectors):
+        d = np.subtract(self.value, self._operand(vectors))
+        return np.sqrt(np.einsum('ij,ij->i', d, d))
+
+    @property
+    def magnitude(self):
+        return np.sqrt(np.einsum('ij,ij->i', self.value, self.value))
+
+    @property
+    def dimensions(self):
+        return self.value.shape[1]
+
+    @property
+    def count(self):
+        return self.value.shape[0]
+
+    @property
+    def elements(self):
+        return self.value
+
+    ######################################
+    #   Element access, views not copies
+    ######################################
+    def element(self, key):
+        return self.vector_type._wrap(self.value[key])
+
+    def set_element(self, key, vector):
+        self.value[key]=self._operand(vector)
+
+    def _new(self, value):
+        return self.__class__._wrap(value)
+
+    def _operand(self, obj):
+        if isinstance(obj, (VectorArray, Vector)):
+            assert obj.dimensions == self.dimensions, "Vectors must be of same dimension"
+            return obj.value
+        elif isinstance(obj, np.ndarray):
+            return obj
+        self.invalidTypeException(['VectorArray', 'Vector', 'Numpy.NDARRAY'])
+
+    def _scalar_operand(self, scalar):
+        # Per element scalars of shape (N,) broadcast across each row
+        if isinstance(scalar, np.ndarray) and scalar.ndim == 1:
+            return scalar[:, np.newaxis]
+        return scalar
+
+    @classmethod
+    def DIMENSIONS(cls):
+        return cls.vector_type.DIMENSIONS()
+
+    ########################################
+    #   Builtin Operations
+    ########################################
+    def __iter__(self):
+        for i in range(0, self.count):
+            yield self.element(i)
+
+    def __getitem__(self, key):
+        if isinstance(key, (int, np.integer)):
+            return self.element(key)
+        return self.__class__(self.value[key])
+
+    def __setitem__(self, key, vector):
+        self.set_element(key, vector)
+
+    def __len__(self):
+        return self.count
+
+    def __add__(self, vectors):
+        return self.add(vectors)
+
+    def __sub__(self, vectors):
+        return self.subtract(vectors)
+
+    def __mul__(self, vectors):
+        return self.dot_product(vectors)
+
+    def __truediv__(self, vectors):
+        return self.divide(vectors)
+
+    def __invert__(self):
+        return self.inverse()
+
+    def __xor__(self, scalar):
+        return self.scalar(scalar)
+
+class Vec2Array(VectorArray):
+    __slots__=()
+    vector_type=Vec2
+
+    def __init__(self, values, dtype=None):
+        super().__init__(values, 2, dtype)
+
+    @property
+    def x(self):
+        return self.value[:, 0]
+    @property
+    def y(self):
+        return self.value[:, 1]
+
+    @classmethod
+    def ZERO(cls, count, dtype=np.float64):
+        return Vec2Array._wrap(np.zeros((count, 2), dtype=dtype))
+
+class Vec3Array(VectorArray):
+    __slots__=()
+    vector_type=Vec3
+
+    def __init__(self, values, dtype=None):
+        super().__init__(values, 3, dtype)
+
+    def cross_product(self, vectors):
+        return Vec3Array._wrap(np.cross(self.value, self._operand(vectors)))
+
+    @property
+    def x(self):
+        return self.value[:, 0]
+    @property
+    def y(self):
+        return self.value[:, 1]
+    @property
+    def z(self):
+        return self.value[:, 2]
+
+    @classmethod
+    def ZERO(cls, count, dtype=np.float64):
+        return Vec3Array._wrap(np.zeros((count, 3), dtype=dtype))
+
+class Vec4Array(VectorArray):
+    __slots__=()
+    vector_type=Vec4
+
+    def __init__(self, values, dtype=None):
+        super().__init__(values, 4, dtype)
+
+    @property
+    def x(self):
+        return self.value[:, 0]
+    @property
+    def y(self):
+        return self.value[:, 1]
+    @property
+    def z(self):
+        return self.value[:, 2]
+    @property
+    def w(self):
+        return self.value[:, 3]
+
+    @classmethod
+    def ZERO(cls, count, dtype=np.float64):
+        return Vec4Array._wrap(np.zeros((count, 4), dtype=dtype))
+
+    @classmethod
+    def VEC3ARRAY(cls, vec3array, w=0.0):
+        assert isinstance(vec3array, Vec3Array), "VEC3ARRAY requires a Vec3Array instance"
+        result=np.empty((vec3array.count, 4), dtype=vec3array.value.dtype)
+        result[:, :3]=vec3array.value
+        result[:, 3]=w
+        return Vec4Array._wrap(result)
+
+class Mat4Array(MathObject):
+    __slots__=('value',)
+    #   Stack of Mat4 in one contiguous (N, 4, 4) buffer. Like Mat4 the
+    #   matrices act on column vectors, so a point p becomes M.p
+    def __init__(self, values, dtype=None):
+        if isinstance(values, Mat4Array):
+            values=values.value
+        elif isinstance(values, Mat4):
+            # Single matrix as a stack of one, shares memory with the Mat4
+            values=values.value[np.newaxis]
+        if isinstance(values, int):
+            self.value=np.zeros((values, 4, 4), dtype=dtype or np.float64)
+            self.value[:, [0, 1, 2, 3], [0, 1, 2, 3]]=1.0
+        elif isinstance(values, np.ndarray):
+            assert values.ndim == 3 and values.shape[1:] == (4, 4), "Array of shape (N, 4, 4) is required for %s"%self.__class__.__name__
+            if dtype is None:
+                dtype = values.dtype if values.dtype in (np.float32, np.float64) else np.float64
+            self.value=np.ascontiguousarray(values, dtype=dtype)
+        elif isinstance(values, list):
+            for v in values:
+                assert isinstance(v, Mat4), "list of Mat4 is required for %s"%self.__class__.__name__
+            self.value=np.array([v.value for v in values], dtype=dtype or np.float64).reshape((-1, 4, 4))
+        else:
+            self.invalidTypeException(['Mat4Array', 'Mat4', 'int', 'list', 'Numpy.NDARRAY'])
+
+    ########################################
+    #   Returns New Mat4Arrays
+    ########################################
+
+    @profile('Mat4Array.multiply')
+    def multiply(self, matrices):
+        return Mat4Array._wrap(np.matmul(self.value, self._operand(matrices)))
+
+    @profile('Mat4Array.inverse')
+    def inverse(self):
+        return Mat4Array._wrap(np.linalg.inv(self.value))
+
+    @profile('Mat4Array.inverse_affine')
+    def inverse_affine(self, orthonormal=False):
+        # Only valid when the bottom row of every matrix is [0, 0, 0, 1].
+        # Inverts the 3x3 part and back-transforms the translation, which
+        # is far cheaper than a general 4x4 inverse. Rigid transforms
+        # (rotation + translation only) can skip the 3x3 inverse as well.
+        linear=self.value[:, :3, :3]
+        translation=self.value[:, :3, 3]
+        if orthonormal:
+            inv=linear.transpose(0, 2, 1)
+        else:
+            inv=np.linalg.inv(linear)
+        result=np.zeros_like(self.value)
+        result[:, :3, :3]=inv
+        result[:, :3, 3]=-np.einsum('nij,nj->ni', inv, translation)
+        result[:, 3, 3]=1.0
+        return Mat4Array._wrap(result)
+
+    def transpose(self):
+        return Mat4Array._wrap(np.ascontiguousarray(self.value.transpose(0, 2, 1)))
+
+    def __repr__(self):
+        return "<Mat4Array \n%s\n>"%self.value
+
+    ########################################
+    #   Vertex Transforms, return NDARRAY
+    ########################################
+
+    @profile('Mat4Array.transform')
+    def transform(self, vertices):
+        # Every matrix applied to every vertex: (M, 4) -> (N, M, 4)
+        v=self._vertices(vertices, 4)
+        return np.matmul(v, self.value.transpose(0, 2, 1))
+
+    @profile('Mat4Array.transform_points')
+    def transform_points(self, points):
+        # (M, 3) points with an implied w of 1 -> (N, M, 3)
+        p=self._vertices(points, 3)
+        return np.matmul(p, self.value[:, :3, :3].transpose(0, 2, 1)) + self.value[:, np.newaxis, :3, 3]
+
+    @profile('Mat4Array.transform_directions')
+    def transform_directions(self, directions):
+        # (M, 3) directions with an implied w of 0 -> (N, M, 3)
+        d=self._vertices(directions, 3)
+        return np.matmul(d, self.value[:, :3, :3].transpose(0, 2, 1))
+
+    @profile('Mat4Array.transform_each')
+    def transform_each(self, vertices):
+        # Matrix i applied to vertex i only: (N, 4) -> (N, 4)
+        v=self._vertices(vertices, 4)
+        assert len(v) == self.count, "transform_each requires one vertex per matrix"
+        return np.einsum('nij,nj->ni', self.value, v)
+
+    ######################################
+    #   Element access, views not copies
+    ######################################
+    @property
+    def count(self):
+        return self.value.shape[0]
+
+    @property
+    def dimensions(self):
+        return self.value.shape
+
+    @property
+    def elements(self):
+        return self.transpose().value
+
+    def element(self, key):
+        return Mat4._wrap(self.value[key])
+
+    def set_element(self, key, matrix):
+        self.value[key]=self._operand(matrix)
+
+    def _operand(self, obj):
+        if isinstance(obj, (Mat4Array, Mat4)):
+            return obj.value
+        elif isinstance(obj, np.ndarray):
+            return obj
+        self.invalidTypeException(['Mat4Array', 'Mat4', 'Numpy.NDARRAY'])
+
+    def _vertices(self, obj, dimension):
+        if isinstance(obj, (VectorArray, Vector)):
+            obj=obj.value
+        assert isinstance(obj, np.ndarray) and obj.shape[-1] == dimension, "Vertices of shape (M, %s) are required"%dimension
+        return obj
+
+    @classmethod
+    def IDENTITY(cls, count, dtype=np.float64):
+        return Mat4Array(count, dtype)
+
+    ########################################
+    #   Batched Transform Factories
+    #   Vectorized versions of the Mat4 factories over (N, 3) inputs.
+    #   out may be an existing Mat4Array to write into.
+    ########################################
+
+    @classmethod
+    def translate(cls, translations, out=None):
+        t=_rows(translations, 3)
+        result=_target(out, len(t))
+        result.value[...]=0.0
+        result.value[:, [0, 1, 2, 3], [0, 1, 2, 3]]=1.0
+        result.value[:, :3, 3]=t
+        return result
+
+    @classmethod
+    def scale(cls, scales, out=None):
+        s=_rows(scales, 3)
+        result=_target(out, len(s))
+        result.value[...]=0.0
+        result.value[:, [0, 1, 2], [0, 1, 2]]=s
+        result.value[:, 3, 3]=1.0
+        return result
+
+    @classmethod
+    @profile('Mat4Array.trs')
+    def trs(cls, translations, angles, axes, scales, out=None):
+        # Mat4.trs for every row, angles in degrees with an (N,) shape
+        t=_rows(translations, 3)
+        a=_rows(axes, 3)
+        s=_rows(scales, 3)
+        r=np.radians(angles)
+        c=np.cos(r)
+        sn=np.sin(r)
+        omc=1.0-c
+        x, y, z = a[:, 0], a[:, 1], a[:, 2]
+        result=_target(out, len(t))
+        m=result.value
+        m[:, 0, 0]=x*x*omc+c
+        m[:, 0, 1]=x*y*omc-z*sn
+        m[:, 0, 2]=x*z*omc+y*sn
+        m[:, 1, 0]=x*y*omc+z*sn
+        m[:, 1, 1]=y*y*omc+c
+        m[:, 1, 2]=y*z*omc-x*sn
+        m[:, 2, 0]=x*z*omc-y*sn
+        m[:, 2, 1]=y*z*omc+x*sn
+        m[:, 2, 2]=z*z*omc+c
+        m[:, :3, :3]*=s[:, np.newaxis, :]
+        m[:, :3, 3]=t
+        m[:, 3, :3]=0.0
+        m[:, 3, 3]=1.0
+        return result
+
+    @classmethod
+    def ZERO(cls, count, dtype=np.float64):
+        return Mat4Array._wrap(np.zeros((count, 4, 4), dtype=dtype))
+
+    ########################################
+    #   Builtin Operations
+    ########################################
+    def __iter__(self):
+        for i in range(0, self.count):
+            yield self.element(i)
+
+    def __getitem__(self, key):
+        if isinstance(key, (int, np.integer)):
+            return self.element(key)
+        return Mat4Array(self.value[key])
+
+    def __setitem__(self, key, matrix):
+        self.set_element(key, matrix)
+
+    def __len__(self):
+        return self.count
+
+    def __mul__(self, matrices):
+        return self.multiply(matrices)
+
+    def __invert__(self):
+        return self.inverse()
+
+def _rows(obj, dimension):
+    if isinstance(obj, VectorArray):
+        obj=obj.value
+    assert isinstance(obj, np.ndarray) and obj.ndim == 2 and obj.shape[1] == dimension, "Array of shape (N, %s) is required"%dimension
+    return obj
+
+def _target(out, count):
+    if out is None:
+        return Mat4Array._wrap(np.empty((count, 4, 4)))
+    assert isinstance(out, Mat4Array) and out.count == count, "out must be a Mat4Array of %s matrices"%count
+    return out
@@ -3,25 +3,45 @@ from abc import ABC
 from builtins import object
 
 class MathObject(object):
+    __slots__=()
+
+    @classmethod
+    def _wrap(cls, value):
+        # Trusted constructor for internal use. Skips type checks, dimension
+        # asserts and list conversion, value must already be the right ndarray
+        obj=cls.__new__(cls)
+        obj.value=value
+        return obj
+
     def invalidTypeException(self, validTypes):
-        raise Exception("Invalid type given to %s! Valid types: %s"%(obj.__class__.__name__, validTypes))
+        raise Exception("Invalid type given to %s! Valid types: %s"%(self.__class__.__name__, validTypes))
 
     def assert_vector(self, obj):
         if isinstance(obj, Vector):
             return True
-        self.invalidTypeException(self, ['Vector'])
+        self.invalidTypeException(['Vector'])
 
     def assert_matrix(self, obj):
         if isinstance(obj, Matrix):
             return True
-        self.invalidTypeException(self, ['Matrix'])
+        self.invalidTypeException(['Matrix'])
 
-    def assert_array(obj):
+    def assert_array(self, obj):
         if isinstance(obj, np.ndarray):
             return True
-        self.invalidTypeException(self, ['Numpy.NDARRAY'])
+        self.invalidTypeException(['Numpy.NDARRAY'])
+
+    def _out(self, out):
+        # Resolves an optional out= target into the array to write into
+        return None if out is None else out.value
+
+    def _result(self, cls, value, out):
+        # out= targets have already been written into, so hand them back
+        return out if out is not None else cls._wrap(value)
 
 class Vector(MathObject):
+    __slots__=('value',)
+
     def __init__(self, values, dimension):
         if isinstance(values, np.ndarray):
             assert len(values) == dimension, "Array of length %s is required for %s"%(dimension, self.__class__.__name__)
@@ -31,54 +51,110 @@ class Vector(MathObject):
             self.value=values.value
         elif isinstance(values, list):
             assert len(values) == dimension, "List of length %s is required for %s"%(dimension, self.__class__.__name__)
-            self.value=np.array(list(values))
+            # Always float so in-place operations can write into the buffer
+            self.value=np.array(values, dtype=np.float64)
         else:
-            invalidTypeException(self, ['Vector','list','Numpy.NDARRAY'])
+            self.invalidTypeException(['Vector','list','Numpy.NDARRAY'])
 
     ########################################
     #   Returns New Vectors. Override These
     ########################################
 
-    def cross_product(self, vector):
+    def cross_product(self, vector, out=None):
         self.assert_vector(vector)
-        return Vector(self._cross(vector))
+        return self._result(Vector, self._cross(vector.value, self._out(out)), out)
 
-    def hadamard_product(self, vector):
+    def hadamard_product(self, vector, out=None):
         self.assert_vector(vector)
         assert self._is_same_dimension(vector), "Vectors must be of same dimension"
-        return Vector(self._hadamard(vector.value))
+        return self._result(Vector, self._hadamard(vector.value, self._out(out)), out)
 
-    def inverse(self):
-        return Vector(self._inverse())
+    def inverse(self, out=None):
+        return self._result(Vector, self._inverse(self._out(out)), out)
 
-    def transform(self, matrix):
+    def transform(self, matrix, out=None):
         self.assert_matrix(matrix)
-        return Vector(self._transform(matrix.value))
+        return self._result(Vector, self._transform(matrix.value, self._out(out)), out)
 
-    def normalize(self):
-        return Vector(self._normalize())
+    def normalize(self, out=None):
+        return self._result(Vector, self._normalize(self._out(out)), out)
 
-    def divide(self, vector):
+    def divide(self, vector, out=None):
         self.assert_vector(vector)
-        self._is_same_dimension(vector)
-        return Vector(self._divide(vector.value))
+        assert self._is_same_dimension(vector), "Vectors must be of same dimension"
+        return self._result(Vector, self._divide(vector.value, self._out(out)), out)
 
-    def add(self, vector):
+    def add(self, vector, out=None):
         self.assert_vector(vector)
-        self._is_same_dimension(vector)
-        return Vector(self._add(vector.value))
+        assert self._is_same_dimension(vector), "Vectors must be of same dimension"
+        return self._result(Vector, self._add(vector.value, self._out(out)), out)
 
-    def subtract(self, vector):
+    def subtract(self, vector, out=None):
         self.assert_vector(vector)
-        self._is_same_dimension(vector)
-        return Vector(self._subtract(vector.value))
+        assert self._is_same_dimension(vector), "Vectors must be of same dimension"
+        return self._result(Vector, self._subtract(vector.value, self._out(out)), out)
 
-    def scalar(self, scalar):
-        return Vector(self._scalar(scalar))
+    def scalar(self, scalar, out=None):
+        return self._result(Vector, self._scalar(scalar, self._out(out)), out)
 
     def __repr__(self):
         return "<Vector %s>"%self.value
 
+    ########################################
+    #   In-place Operations, return self
+    ########################################
+
+    def iadd(self, vector):
+        self.assert_vector(vector)
+        assert self._is_same_dimension(vector), "Vectors must be of same dimension"
+        self._add(vector.value, self.value)
+        return self
+
+    def isub(self, vector):
+        self.assert_vector(vector)
+        assert self._is_same_dimension(vector), "Vectors must be of same dimension"
+        self._subtract(vector.value, self.value)
+        return self
+
+    def iscale(self, scalar):
+        self._scalar(scalar, self.value)
+        return self
+
+    def ihadamard(self, vector):
+        self.assert_vector(vector)
+        assert self._is_same_dimension(vector), "Vectors must be of same dimension"
+        self._hadamard(vector.value, self.value)
+        return self
+
+    def idivide(self, vector):
+        self.assert_vector(vector)
+        assert self._is_same_dimension(vector), "Vectors must be of same dimension"
+        self._divide(vector.value, self.value)
+        return self
+
+    def iinverse(self):
+        self._inverse(self.value)
+        return self
+
+    def inormalize(self):
+        self._normalize(self.value)
+        return self
+
+    def icross(self, vector):
+        self.assert_vector(vector)
+        self._cross(vector.value, self.value)
+        return self
+
+    def itransform(self, matrix):
+        self.assert_matrix(matrix)
+        self._transform(matrix.value, self.value)
+        return self
+
+    def assign(self, values):
+        # Copies values into this vector's existing buffer
+        self.value[...]=values.value if isinstance(values, Vector) else values
+        return self
+
     ######################################
     #   Actual Operations, do not override
     ######################################
@@ -90,7 +166,8 @@ class Vector(MathObject):
     def distance(self, vector):
         self.assert_vector(vector)
         self._is_same_dimension(vector)
-        return np.sqrt(np.sum(self._hadamard(vector)))
+        d=np.subtract(self.value, vector.value)
+        return np.sqrt(np.dot(d, d))
 
     @property
     def magnitude(self):
@@ -104,44 +181,56 @@ class Vector(MathObject):
         return self.dimensions == vector.dimensions
 
     # Do not override or use below for expected behavior
+    # Each takes raw arrays and writes into out when it is given
 
-    def _cross(self, vector):
+    def _cross(self, vector, out=None):
         self.assert_array(vector)
-        if self._is_same_dimension(vector):
-            assert len(self.value) == 3, "Cross Product may only be calculated with two 3 dimensional vectors"
-        else:
+        if len(self.value) != 3 or len(vector) != 3:
             raise Exception("Vectors are not same size! Cross Product may only be calculated with two 3 dimensional vectors")
-        return np.cross(self.value, vector)
-
-    def _hadamard(self, vector):
+        # Scalar closed form, np.cross has a lot of per call overhead for one pair
+        if out is None:
+            out=np.empty(3, dtype=np.result_type(self.value, vector))
+        ax, ay, az = self.value
+        bx, by, bz = vector
+        out[0]=ay*bz-az*by
+        out[1]=az*bx-ax*bz
+        out[2]=ax*by-ay*bx
+        return out
+
+    def _hadamard(self, vector, out=None):
         self.assert_array(vector)
-        return np.multiply(self.value, vector)
+        return np.multiply(self.value, vector, out=out)
 
-    def _scalar(self, scalar):
-        return np.multiply(self.value, scalar)
+    def _scalar(self, scalar, out=None):
+        return np.multiply(self.value, scalar, out=out)
 
-    def _inverse(self):
-        return self._scalar(-1)
+    def _inverse(self, out=None):
+        return np.negative(self.value, out=out)
 
-    def _transform(self, matrix):
-        self.assert_array(vector)
-        assert self.dimensions == matrix.dimensions[1], "Matrix must have same amount of columns as the dimension of this vector"
-        return matrix.dot(self.value)
+    def _transform(self, matrix, out=None):
+        self.assert_array(matrix)
+        assert self.dimensions == matrix.shape[1], "Matrix must have same amount of columns as the dimension of this vector"
+        return np.matmul(matrix, self.value, out=out)
 
-    def _normalize(self):
+    def _normalize(self, out=None):
         m = self.magnitude
-        return np.divide(self.value, m) if m != 0 else 0
-
-    def _divide(self, vector):
+        if m == 0:
+            if out is None:
+                return np.zeros(self.value.shape)
+            out.fill(0)
+            return out
+        return np.divide(self.value, m, out=out)
+
+    def _divide(self, vector, out=None):
         self.assert_array(vector)
-        return np.divide(self.value, vector)
+        return np.divide(self.value, vector, out=out)
 
-    def _add(self, vector):
-        return np.add(self.value, vector)
+    def _add(self, vector, out=None):
+        return np.add(self.value, vector, out=out)
 
-    def _subtract(self, vector):
+    def _subtract(self, vector, out=None):
         self.assert_array(vector)
-        return np.subtract(self.value, vector)
+        return np.subtract(self.value, vector, out=out)
 
     @property
     def elements(self):
@@ -170,8 +259,11 @@ class Vector(MathObject):
     def __sub__(self, vector):
         return self.subtract(vector)
 
-    def __mul__(self, vector):
-        return self.dot_product(vector)
+    def __mul__(self, other):
+        # Vector * Vector is the dot product, Vector * scalar scales
+        if isinstance(other, Vector):
+            return self.dot_product(other)
+        return self.scalar(other)
 
     def __truediv__(self, vector):
         return self.divide(vector)
@@ -182,6 +274,18 @@ class Vector(MathObject):
     def __xor__(self, scalar):
         return self.scalar(scalar)
 
+    def __iadd__(self, vector):
+        return self.iadd(vector)
+
+    def __isub__(self, vector):
+        return self.isub(vector)
+
+    def __imul__(self, other):
+        # Means the same as *, and a dot product is not a Vector
+        if isinstance(other, Vector):
+            raise Exception("%s *= Vector would be a dot product, use ihadamard for the element-wise product!"%self.__class__.__name__)
+        return self.iscale(other)
+
     def __eq__(self, vector):
         if self.dimensions==vector.dimensions:
             for i in range(0,len(self)):
@@ -238,80 +342,136 @@ class Vector(MathObject):
         return False
 
 class Matrix(MathObject):
+    __slots__=('value',)
 
     def __init__(self, values, dimensions):
         if isinstance(values, np.ndarray):
-            assert values.shape == dimensions, "Array of length %s is required for %s"%(dimension, self.__class__.__name__)
+            assert values.shape == dimensions, "Array of shape %s is required for %s"%(dimensions, self.__class__.__name__)
             self.value=values
         elif isinstance(values, Matrix):
             self.value=values.value
         elif isinstance(values, list):
-            assert len(values) == dimensions[0], "list of length %s containing list of length %s is required for %s"%(dimension[0],dimension[1], self.__class__.__name__)
+            assert len(values) == dimensions[0], "list of length %s containing list of length %s is required for %s"%(dimensions[0],dimensions[1], self.__class__.__name__)
             val=[]
             for v in values:
                 if isinstance(v, list):
-                    assert len(v) == dimensions[1], "list of length %s containing list of length %s is required for %s"%(dimension[0],dimension[1], self.__class__.__name__)
+                    assert len(v) == dimensions[1], "list of length %s containing list of length %s is required for %s"%(dimensions[0],dimensions[1], self.__class__.__name__)
                     val.append(v)
                 elif isinstance(v, Vector):
-                    assert v.dimensions == dimensions[1], "list of length %s containing list of length %s is required for %s"%(dimension[0],dimension[1], self.__class__.__name__)
+                    assert v.dimensions == dimensions[1], "list of length %s containing list of length %s is required for %s"%(dimensions[0],dimensions[1], self.__class__.__name__)
                     val.append(v.value)
                 else:
                     self.invalidTypeException(['list(list)', 'list(Vector)'])
-            self.value=np.array(val)
+            # Always float so in-place operations can write into the buffer
+            self.value=np.array(val, dtype=np.float64)
         else:
-            raise self.invalidTypeException(['Matrix','list','Numpy.NDARRAY'])
+            self.invalidTypeException(['Matrix','list','Numpy.NDARRAY'])
 
     ########################################
     #   Returns New Matricies. Override These
     ########################################
 
-    def add(self, matrix):
-        return Matrix(self._add(matrix))
+    def add(self, matrix, out=None):
+        return self._result(Matrix, self._add(matrix, self._out(out)), out)
 
-    def subtract(self, matrix):
-        return Matrix(self._subtract(matrix))
+    def subtract(self, matrix, out=None):
+        return self._result(Matrix, self._subtract(matrix, self._out(out)), out)
 
-    def scalar(self, scalar):
-        return Matrix(self._scalar(scalar))
+    def scalar(self, scalar, out=None):
+        return self._result(Matrix, self._scalar(scalar, self._out(out)), out)
 
-    def multiply(self, matrix):
-        return Matrix(self._multiply(matrix))
+    def multiply(self, matrix, out=None):
+        return self._result(Matrix, self._multiply(matrix, self._out(out)), out)
 
     def column(self, key):
-        return Vector(self._column(key))
+        return Vector._wrap(self._column(key))
 
-    def set_column(self, key, value):
-        return Matrix(self._set_column(key, value))
+    def set_column(self, key, value, out=None):
+        return self._result(Matrix, self._set_column(key, value, self._out(out)), out)
 
     def row(self, key):
-        return Vector(self._row(key))
+        return Vector._wrap(self._row(key))
 
-    def set_row(self, key, value):
-        return Matrix(self._set_row(key, value))
+    def set_row(self, key, value, out=None):
+        return self._result(Matrix, self._set_row(key, value, self._out(out)), out)
 
     def diagonal(self):
-        return Vector(self._diagonal())
+        return Vector._wrap(self._diagonal())
 
-    def _set_diagonal(self, value):
-        return Matrix(self._set_diagonal(value))
+    def set_diagonal(self, value, out=None):
+        return self._result(Matrix, self._set_diagonal(value, self._out(out)), out)
 
-    def inverse(self):
-        return Matrix(self._inverse())
+    def inverse(self, out=None):
+        return self._result(Matrix, self._inverse(self._out(out)), out)
 
-    def transform(self, vector):
-        return Vector(self._transform(vector))
+    def transform(self, vector, out=None):
+        return self._result(Vector, self._transform(vector, self._out(out)), out)
 
-    def hadamard(self, matrix):
-        return Matrix(self._hadamard(matrix))
+    def hadamard(self, matrix, out=None):
+        return self._result(Matrix, self._hadamard(matrix, self._out(out)), out)
 
-    def divide(self, matrix):
-        return Matrix(self._divide(matrix))
+    def divide(self, matrix, out=None):
+        return self._result(Matrix, self._divide(matrix, self._out(out)), out)
 
-    def transpose(self):
-        return Matrix(self._transpose())
+    def transpose(self, out=None):
+        return self._result(Matrix, self._transpose(self._out(out)), out)
 
     def __repr__(self):
         return "<Matrix \n%s\n>"%self.value
+
+    ########################################
+    #   In-place Operations, return self
+    ########################################
+
+    def iadd(self, matrix):
+        self._add(matrix, self.value)
+        return self
+
+    def isub(self, matrix):
+        self._subtract(matrix, self.value)
+        return self
+
+    def iscale(self, scalar):
+        self._scalar(scalar, self.value)
+        return self
+
+    def imultiply(self, matrix):
+        self._multiply(matrix, self.value)
+        return self
+
+    def ihadamard(self, matrix):
+        self._hadamard(matrix, self.value)
+        return self
+
+    def idivide(self, matrix):
+        self._divide(matrix, self.value)
+        return self
+
+    def iinverse(self):
+        self._inverse(self.value)
+        return self
+
+    def itranspose(self):
+        self._transpose(self.value)
+        return self
+
+    def set_column_(self, key, vector):
+        self._set_column(key, vector, self.value)
+        return self
+
+    def set_row_(self, key, vector):
+        self._set_row(key, vector, self.value)
+        return self
+
+    def set_diagonal_(self, vector):
+        self._set_diagonal(vector, self.value)
+        return self
+
+    def assign(self, values):
+        # Copies values into this matrix's existing buffer
+        self.value[...]=values.value if isinstance(values, Matrix) else values
+        return self
+
     ######################################
     #   Actual Operations, do not override
     ######################################
@@ -325,86 +485,100 @@ class Matrix(MathObject):
 
     @property
     def is_singular(self):
-        return self.determinant() == 0
+        return self.determinant == 0
 
     @property
     def is_square(self):
         return self.value.shape[0] == self.value.shape[1]
 
     # Do not override or use below for expected behavior
+    # Each writes into out when it is given instead of allocating
     def _is_same_dimension(self, matrix):
         assert self.dimensions == matrix.dimensions, "Matricies must be the same dimension for this operation"
 
-    def _add(self, matrix):
+    def _copy_into(self, out):
+        # Setters start from a copy of this matrix, unless writing in place
+        if out is None:
+            return np.copy(self.value)
+        if out is not self.value:
+            out[...]=self.value
+        return out
+
+    def _add(self, matrix, out=None):
         self.assert_matrix(matrix)
         self._is_same_dimension(matrix)
-        return np.add(self.value, matrix.value)
+        return np.add(self.value, matrix.value, out=out)
 
-    def _subtract(self, matrix):
+    def _subtract(self, matrix, out=None):
         self.assert_matrix(matrix)
         self._is_same_dimension(matrix)
-        return np.subtract(self.value, matrix.value)
+        return np.subtract(self.value, matrix.value, out=out)
 
-    def _scalar(self, scalar):
-        return np.multiply(self.value, scalar)
+    def _scalar(self, scalar, out=None):
+        return np.multiply(self.value, scalar, out=out)
 
-    def _multiply(self, matrix):
+    def _multiply(self, matrix, out=None):
         self.assert_matrix(matrix)
         assert self.dimensions[1] == matrix.dimensions[0], "Other Matrix must have same number of Columns as this matrix has Rows"
-        return np.matmul(self.value, matrix.value)
+        return np.matmul(self.value, matrix.value, out=out)
 
     def _column(self, key):
         return self.value.T[key]
 
-    def _set_column(self, key, vector):
+    def _set_column(self, key, vector, out=None):
         self.assert_vector(vector)
-        t=np.copy(self._transpose())
-        assert vector.dimensions == len(t[key]), "Invalid length to set column"
-        t[key]=vector.value
-        return np.copy(t.T)
+        assert vector.dimensions == self.dimensions[0], "Invalid length to set column"
+        v=self._copy_into(out)
+        v[:, key]=vector.value
+        return v
 
     def _row(self, key):
         return self.value[key]
 
-    def _set_row(self, key, vector):
+    def _set_row(self, key, vector, out=None):
         self.assert_vector(vector)
-        v = np.copy(self.value)
-        assert vector.dimensions == len(v[key]), "Invalid length to set row"
+        assert vector.dimensions == self.dimensions[1], "Invalid length to set row"
+        v=self._copy_into(out)
         v[key]=vector.value
         return v
 
     def _diagonal(self):
         return np.diag(self.value)
 
-    def _set_diagonal(self, vector):
+    def _set_diagonal(self, vector, out=None):
         self.assert_vector(vector)
-        v=np.copy(self.value)
-        diag=len(np.diag(v))
-        assert len(d)==diag, "Invalid Length to set Diagonal"
-        for i in range(0, diag):
-            v[i][i]=vector[i]
+        assert vector.dimensions == min(self.dimensions), "Invalid Length to set Diagonal"
+        v=self._copy_into(out)
+        np.fill_diagonal(v, vector.value)
         return v
 
-    def _inverse(self):
-        return self.value.getI()
+    def _inverse(self, out=None):
+        if out is None:
+            return np.linalg.inv(self.value)
+        out[...]=np.linalg.inv(self.value)
+        return out
 
-    def _transform(self, vector):
+    def _transform(self, vector, out=None):
         self.assert_vector(vector)
         assert vector.dimensions == self.dimensions[1], "Matrix must have same amount of columns as the dimension of this vector"
-        return self.value.dot(vector.value)
+        return np.matmul(self.value, vector.value, out=out)
 
-    def _hadamard(self, matrix):
+    def _hadamard(self, matrix, out=None):
         self.assert_matrix(matrix)
         self._is_same_dimension(matrix)
-        return np.multiply(self.value, matrix.value)
+        return np.multiply(self.value, matrix.value, out=out)
 
-    def _divide(self, matrix):
+    def _divide(self, matrix, out=None):
         self.assert_matrix(matrix)
         self._is_same_dimension(matrix)
-        return np.divide(self.value, matrix.value)
+        return np.divide(self.value, matrix.value, out=out)
 
-    def _transpose(self):
-        return np.copy(self.value.T)
+    def _transpose(self, out=None):
+        if out is None:
+            return np.copy(self.value.T)
+        # Overlapping assignment is buffered by numpy, so out may be self.value
+        out[...]=self.value.T
+        return out
 
     @property
     def elements(self):
@@ -429,8 +603,13 @@ class Matrix(MathObject):
     def __sub__(self, vector):
         return self.subtract(vector)
 
-    def __mul__(self, vector):
-        return self.multiply(vector)
+    def __mul__(self, other):
+        # Matrix * Matrix is the matrix product, Matrix * scalar scales
+        if isinstance(other, Matrix):
+            return self.multiply(other)
+        if isinstance(other, Vector):
+            self.invalidTypeException(['Matrix', 'scalar'])
+        return self.scalar(other)
 
     def __truediv__(self, vector):
         return self.divide(vector)
@@ -441,6 +620,20 @@ class Matrix(MathObject):
     def __xor__(self, scalar):
         return self.scalar(scalar)
 
+    def __iadd__(self, matrix):
+        return self.iadd(matrix)
+
+    def __isub__(self, matrix):
+        return self.isub(matrix)
+
+    def __imul__(self, other):
+        # Means the same as *
+        if isinstance(other, Matrix):
+            return self.imultiply(other)
+        if isinstance(other, Vector):
+            self.invalidTypeException(['Matrix', 'scalar'])
+        return self.iscale(other)
+
     def __eq__(self, matrix):
         if self.dimensions==matrix.dimensions:
             for i in range(0,len(self)[0]):
@@ -1,10 +1,12 @@
 import numpy as np
-from math import radians, cos, sin
+from math import radians, cos, sin, tan, sqrt
 
 from .common import Matrix
 from .vectors import Vec4, Vec3
 
 class Mat4(Matrix):
+    __slots__=()
+
     def __init__(self, values):
         super().__init__(values, (4,4))
 
@@ -12,137 +14,174 @@ class Mat4(Matrix):
     #   Returns New Matricies. Override These
     ########################################
 
-    def add(self, matrix):
+    def add(self, matrix, out=None):
         assert isinstance(matrix, Mat4), "matrix must be an instance of Mat4."
-        return Mat4(self._add(matrix))
+        return self._result(Mat4, self._add(matrix, self._out(out)), out)
 
-    def subtract(self, matrix):
+    def subtract(self, matrix, out=None):
         assert isinstance(matrix, Mat4), "matrix must be an instance of Mat4."
-        return Mat4(self._subtract(matrix))
+        return self._result(Mat4, self._subtract(matrix, self._out(out)), out)
 
-    def scalar(self, scalar):
-        return Mat4(self._scalar(scalar))
+    def scalar(self, scalar, out=None):
+        return self._result(Mat4, self._scalar(scalar, self._out(out)), out)
 
-    def multiply(self, matrix):
+    def multiply(self, matrix, out=None):
         assert isinstance(matrix, Mat4), "matrix must be an instance of Mat4."
-        return Mat4(self._multiply(matrix))
+        return self._result(Mat4, self._multiply(matrix, self._out(out)), out)
 
     def column(self, key):
-        return Vec4(self._column(key))
+        return Vec4._wrap(self._column(key))
 
-    def set_column(self, key, vector):
+    def set_column(self, key, vector, out=None):
         assert isinstance(vector, Vec4), "vector must be an instance of Vec4."
-        return Mat4(self._set_column(key, vector))
+        return self._result(Mat4, self._set_column(key, vector, self._out(out)), out)
 
     def row(self, key):
-        return Vec4(self._row(key))
+        return Vec4._wrap(self._row(key))
 
-    def set_row(self, key, vector):
+    def set_row(self, key, vector, out=None):
         assert isinstance(vector, Vec4), "vector must be an instance of Vec4."
-        return Mat4(self._set_row(key, vector))
+        return self._result(Mat4, self._set_row(key, vector, self._out(out)), out)
 
     def diagonal(self):
-        return Vec4(self._diagonal())
+        return Vec4._wrap(self._diagonal())
 
-    def set_diagonal(self, vector):
+    def set_diagonal(self, vector, out=None):
         assert isinstance(vector, Vec4), "vector must be an instance of Vec4."
-        return Mat4(self._set_diagonal(vector))
+        return self._result(Mat4, self._set_diagonal(vector, self._out(out)), out)
 
-    def inverse(self):
-        return Mat4(self._inverse())
+    def inverse(self, out=None):
+        return self._result(Mat4, self._inverse(self._out(out)), out)
 
-    def transform(self, vector):
+    def transform(self, vector, out=None):
         assert isinstance(vector, Vec4), "vector must be an instance of Vec4."
-        return Vec4(self._transform(vector))
+        return self._result(Vec4, self._transform(vector, self._out(out)), out)
 
-    def hadamard(self, matrix):
+    def hadamard(self, matrix, out=None):
         assert isinstance(matrix, Mat4), "matrix must be an instance of Mat4."
-        return Mat4(self._hadamard(matrix))
+        return self._result(Mat4, self._hadamard(matrix, self._out(out)), out)
 
-    def divide(self, matrix):
+    def divide(self, matrix, out=None):
         assert isinstance(matrix, Mat4), "matrix must be an instance of Mat4."
-        return Mat4(self._divide(matrix))
+        return self._result(Mat4, self._divide(matrix, self._out(out)), out)
 
-    def transpose(self):
-        return Mat4(self._transpose())
+    def transpose(self, out=None):
+        return self._result(Mat4, self._transpose(self._out(out)), out)
 
     def __repr__(self):
         return "<Mat4 \n%s\n>"%self.value
 
     @classmethod
     def ZERO(cls):
-        return Mat4(np.zeros((4,4)))
+        return Mat4._wrap(np.zeros((4,4)))
     @classmethod
     def IDENTITY(cls):
-        return Mat4(np.identity(4))
+        return Mat4._wrap(np.identity(4))
     @classmethod
     def DIAGONAL(cls, value):
         z = np.zeros((4,4))
         np.fill_diagonal(z, value)
-        return Mat4(z)
+        return Mat4._wrap(z)
     @classmethod
     def FILLED(cls, value):
-        return Mat4(np.full((4,4), value))
+        return Mat4._wrap(np.full((4,4), value, dtype=np.float64))
     @classmethod
     def VEC4(cls, row1, row2, row3, row4):
         assert isinstance(row1, Vec4) and isinstance(row2, Vec4) and isinstance(row3, Vec4) and isinstance(row4, Vec4)
-        return Mat4([row1.elements, row2.elements, row3.elements, row4.elements])
+        return Mat4._wrap(np.array([row1.value, row2.value, row3.value, row4.value], dtype=np.float64))
+    ########################################
+    #   Transform Factories
+    #   Elements are computed in closed form with scalar math and written
+    #   once. out may be a Mat4 or a (4, 4) ndarray, such as one row of a
+    #   Mat4Array buffer, in which case nothing new is allocated for it.
+    ########################################
+
     @classmethod
-    def orthographic(cls, left, right, bottom, top, near, far):
-        matrix=Mat4.ZERO()
-        matrix.value[0][0]=np.divide(2.0,(right-left))
-        matrix.value[1][1]=np.divide(2.0,(top-bottom))
-        matrix.value[2][2]=np.divide(-2.0,(far-near))
-        matrix=matrix.set_column(3, Vec4([-np.divide((right+left),(right-left)), -np.divide((top+bottom),(top-bottom)), -np.divide((far+near),(far-near)),1.0]))
-        return matrix
+    def orthographic(cls, left, right, bottom, top, near, far, out=None):
+        rl=1.0/(right-left)
+        tb=1.0/(top-bottom)
+        fn=1.0/(far-near)
+        return _write(out, ((2.0*rl, 0.0, 0.0, -(right+left)*rl),
+                            (0.0, 2.0*tb, 0.0, -(top+bottom)*tb),
+                            (0.0, 0.0, -2.0*fn, -(far+near)*fn),
+                            (0.0, 0.0, 0.0, 1.0)))
 
     @classmethod
-    def perspective(cls, fov, aspectRatio, near, far):
-        matrix=Mat4.FILLED(1.0)
-        a=np.tan(np.divide(fov, 2.0))
-        b=(far-near)
-        matrix.value[0,0]=np.divide(1.0, np.multiply(aspectRatio,a))
-        matrix.value[1,1]=np.divide(1.0, a)
-        matrix.value[2,2]=-np.divide((far+near),b)
-        matrix.value[2,3]=-1.0
-        matrix.value[3,2]=-np.divide(np.prod([2.0, far, near]),b)
-        return matrix
+    def perspective(cls, fov, aspectRatio, near, far, out=None):
+        # fov is in radians. Laid out for column vectors like the other factories
+        f=1.0/tan(fov/2.0)
+        nf=1.0/(near-far)
+        return _write(out, ((f/aspectRatio, 0.0, 0.0, 0.0),
+                            (0.0, f, 0.0, 0.0),
+                            (0.0, 0.0, (far+near)*nf, 2.0*far*near*nf),
+                            (0.0, 0.0, -1.0, 0.0)))
 
     @classmethod
-    def lookat(cls, camera, object, up):
+    def lookat(cls, camera, object, up, out=None):
         assert isinstance(camera,Vec3) and isinstance(object,Vec3) and isinstance(up,Vec3), "Camera, Object, and Up must be instances of Vec3"
-        result = Mat4.IDENTITY()
-        f = (object-camera).normalize()
-        s = f.cross_product(up.normalize())
-        u = s.cross_product(f)
-        result = result.set_row(Vec4.VEC3(s))
-        result = result.set_row(Vec4.VEC3(u))
-        result = result.set_row(Vec4.Vec3(f.scalar(-1)))
-        return result * Mat4.translate(camera.scalar(-1))
-
+        ex, ey, ez = camera.value.tolist()
+        ox, oy, oz = object.value.tolist()
+        ux, uy, uz = up.value.tolist()
+        fx, fy, fz = ox-ex, oy-ey, oz-ez
+        m=sqrt(fx*fx+fy*fy+fz*fz)
+        fx, fy, fz = fx/m, fy/m, fz/m
+        # s = f x up, u = s x f
+        sx, sy, sz = fy*uz-fz*uy, fz*ux-fx*uz, fx*uy-fy*ux
+        m=sqrt(sx*sx+sy*sy+sz*sz)
+        sx, sy, sz = sx/m, sy/m, sz/m
+        vx, vy, vz = sy*fz-sz*fy, sz*fx-sx*fz, sx*fy-sy*fx
+        return _write(out, ((sx, sy, sz, -(sx*ex+sy*ey+sz*ez)),
+                            (vx, vy, vz, -(vx*ex+vy*ey+vz*ez)),
+                            (-fx, -fy, -fz, fx*ex+fy*ey+fz*ez),
+                            (0.0, 0.0, 0.0, 1.0)))
 
     @classmethod
-    def translate(cls, translation):
+    def translate(cls, translation, out=None):
         assert isinstance(translation, Vec3), "Translation must be instance of Vec3"
-        return Mat4.IDENTITY().set_column(3, Vec4([translation[0],translation[1],translation[2],1]))
+        x, y, z = translation.value.tolist()
+        return _write(out, ((1.0, 0.0, 0.0, x),
+                            (0.0, 1.0, 0.0, y),
+                            (0.0, 0.0, 1.0, z),
+                            (0.0, 0.0, 0.0, 1.0)))
 
     @classmethod
-    def scale(cls, scale):
+    def scale(cls, scale, out=None):
         assert isinstance(scale, Vec3), "Scale must be instance of Vec3"
-        return Mat4(np.multiply(Mat4.IDENTITY().value, Matrix([[scale[0]],[scale[1]], [scale[2]], [1]]).value))
+        x, y, z = scale.value.tolist()
+        return _write(out, ((x, 0.0, 0.0, 0.0),
+                            (0.0, y, 0.0, 0.0),
+                            (0.0, 0.0, z, 0.0),
+                            (0.0, 0.0, 0.0, 1.0)))
+
+    @classmethod
+    def rotate(cls, angle, axis, out=None):
+        assert isinstance(axis, Vec3), "Axis must be instance of Vec3"
+        return Mat4.trs(None, angle, axis, None, out)
 
     @classmethod
-    def rotate(cls, angle, axis):
+    def trs(cls, translation, angle, axis, scale, out=None):
+        # translate(translation) * rotate(angle, axis) * scale(scale) as one
+        # matrix. translation and scale may be None to leave them out
         assert isinstance(axis, Vec3), "Axis must be instance of Vec3"
-        result = Mat4.IDENTITY()
         r=radians(angle)
         c=cos(r)
         s=sin(r)
         omc=1.0-c
-        x=axis[0]
-        y=axis[1]
-        z=axis[2]
-        result=result.set_column(0, Vec4([np.prod([x,x,omc])+c,np.prod([y,x,omc])+np.prod([z, s]),np.prod([x,z,omc])-np.prod([y, s]), 0]))
-        result=result.set_column(1, Vec4([np.prod([x,y,omc])-np.prod([z, s]),np.prod([y,y,omc])+c,np.prod([y,z,omc])+np.prod([x, s]), 0]))
-        result=result.set_column(2, Vec4([np.prod([x,z,omc])+np.prod([y, s]),np.prod([y,z,omc])-np.prod([x, s]),np.prod([z,z,omc])+c, 0]))
-        return result
+        x, y, z = axis.value.tolist()
+        tx, ty, tz = translation.value.tolist() if translation is not None else (0.0, 0.0, 0.0)
+        sx, sy, sz = scale.value.tolist() if scale is not None else (1.0, 1.0, 1.0)
+        xs, ys, zs = x*s, y*s, z*s
+        xy, xz, yz = x*y*omc, x*z*omc, y*z*omc
+        return _write(out, (((x*x*omc+c)*sx, (xy-zs)*sy, (xz+ys)*sz, tx),
+                            ((xy+zs)*sx, (y*y*omc+c)*sy, (yz-xs)*sz, ty),
+                            ((xz-ys)*sx, (yz+xs)*sy, (z*z*omc+c)*sz, tz),
+                            (0.0, 0.0, 0.0, 1.0)))
+
+def _write(out, rows):
+    if out is None:
+        return Mat4._wrap(np.array(rows, dtype=np.float64))
+    if isinstance(out, Mat4):
+        out.value[...]=rows
+        return out
+    out[...]=rows
+    return Mat4._wrap(out)
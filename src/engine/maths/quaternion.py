@@ -0,0 +1,316 @@
+import numpy as np
+from math import radians, degrees, cos, sin, acos, sqrt
+
+from .common import Vector
+from .vectors import Vec3
+from .matrix import Mat4
+from .arrays import VectorArray, Vec3Array, Mat4Array
+from ..profiler import profile
+
+class Quat(Vector):
+    #   Rotation quaternion stored as [x, y, z, w]. Angles are in degrees
+    #   to match Mat4.rotate.
+    __slots__=()
+
+    def __init__(self, values):
+        super().__init__(values, 4)
+
+    ########################################
+    #   Returns New Quats. Override These
+    ########################################
+
+    def multiply(self, quat, out=None):
+        assert isinstance(quat, Quat), "quat must be an instance of Quat."
+        x1, y1, z1, w1 = self.value.tolist()
+        x2, y2, z2, w2 = quat.value.tolist()
+        return _write(out, (w1*x2+x1*w2+y1*z2-z1*y2,
+                            w1*y2-x1*z2+y1*w2+z1*x2,
+                            w1*z2+x1*y2-y1*x2+z1*w2,
+                            w1*w2-x1*x2-y1*y2-z1*z2))
+
+    def conjugate(self, out=None):
+        x, y, z, w = self.value.tolist()
+        return _write(out, (-x, -y, -z, w))
+
+    def inverse(self, out=None):
+        x, y, z, w = self.value.tolist()
+        n=x*x+y*y+z*z+w*w
+        return _write(out, (-x/n, -y/n, -z/n, w/n))
+
+    def normalize(self, out=None):
+        return self._result(Quat, self._normalize(self._out(out)), out)
+
+    def add(self, quat, out=None):
+        assert isinstance(quat, Quat), "quat must be an instance of Quat."
+        return self._result(Quat, self._add(quat.value, self._out(out)), out)
+
+    def subtract(self, quat, out=None):
+        assert isinstance(quat, Quat), "quat must be an instance of Quat."
+        return self._result(Quat, self._subtract(quat.value, self._out(out)), out)
+
+    def scalar(self, scalar, out=None):
+        return self._result(Quat, self._scalar(scalar, self._out(out)), out)
+
+    def nlerp(self, quat, t, out=None):
+        assert isinstance(quat, Quat), "quat must be an instance of Quat."
+        a=self.value.tolist()
+        b=quat.value.tolist()
+        # Take the short way round
+        if a[0]*b[0]+a[1]*b[1]+a[2]*b[2]+a[3]*b[3] < 0.0:
+            b=[-v for v in b]
+        r=[a[i]+(b[i]-a[i])*t for i in range(0, 4)]
+        m=sqrt(r[0]*r[0]+r[1]*r[1]+r[2]*r[2]+r[3]*r[3])
+        return _write(out, (r[0]/m, r[1]/m, r[2]/m, r[3]/m))
+
+    def slerp(self, quat, t, out=None):
+        assert isinstance(quat, Quat), "quat must be an instance of Quat."
+        a=self.value.tolist()
+        b=quat.value.tolist()
+        d=a[0]*b[0]+a[1]*b[1]+a[2]*b[2]+a[3]*b[3]
+        if d < 0.0:
+            b=[-v for v in b]
+            d=-d
+        if d > 0.9995:
+            # Nearly parallel, nlerp is accurate and avoids dividing by ~0
+            return self.nlerp(Quat._wrap(np.array(b)), t, out)
+        theta=acos(d)
+        s=sin(theta)
+        wa=sin((1.0-t)*theta)/s
+        wb=sin(t*theta)/s
+        return _write(out, tuple(a[i]*wa+b[i]*wb for i in range(0, 4)))
+
+    def rotate(self, vector, out=None):
+        # Rotates a Vec3, or every element of a Vec3Array, by this quaternion
+        if isinstance(vector, Vec3Array):
+            return QuatArray._rotate(self.value[np.newaxis], vector, out)
+        assert isinstance(vector, Vec3), "vector must be an instance of Vec3 or Vec3Array."
+        qx, qy, qz, qw = self.value.tolist()
+        vx, vy, vz = vector.value.tolist()
+        # t = 2 * (q x v), v' = v + w * t + q x t
+        tx, ty, tz = 2.0*(qy*vz-qz*vy), 2.0*(qz*vx-qx*vz), 2.0*(qx*vy-qy*vx)
+        rotated=(vx+qw*tx+qy*tz-qz*ty, vy+qw*ty+qz*tx-qx*tz, vz+qw*tz+qx*ty-qy*tx)
+        if out is None:
+            return Vec3._wrap(np.array(rotated))
+        out.value[...]=rotated
+        return out
+
+    def to_mat4(self, translation=None, scale=None, out=None):
+        # translate(translation) * rotation * scale(scale), where either may be None
+        x, y, z, w = self.value.tolist()
+        tx, ty, tz = translation.value.tolist() if translation is not None else (0.0, 0.0, 0.0)
+        sx, sy, sz = scale.value.tolist() if scale is not None else (1.0, 1.0, 1.0)
+        xx, yy, zz = x*x, y*y, z*z
+        xy, xz, yz = x*y, x*z, y*z
+        wx, wy, wz = w*x, w*y, w*z
+        rows=(((1.0-2.0*(yy+zz))*sx, 2.0*(xy-wz)*sy, 2.0*(xz+wy)*sz, tx),
+              (2.0*(xy+wz)*sx, (1.0-2.0*(xx+zz))*sy, 2.0*(yz-wx)*sz, ty),
+              (2.0*(xz-wy)*sx, 2.0*(yz+wx)*sy, (1.0-2.0*(xx+yy))*sz, tz),
+              (0.0, 0.0, 0.0, 1.0))
+        if out is None:
+            return Mat4._wrap(np.array(rows))
+        if isinstance(out, Mat4):
+            out.value[...]=rows
+            return out
+        out[...]=rows
+        return Mat4._wrap(out)
+
+    def to_axis_angle(self):
+        x, y, z, w = self.normalize().value.tolist()
+        w=max(-1.0, min(1.0, w))
+        s=sqrt(1.0-w*w)
+        if s < 1e-8:
+            return 0.0, Vec3.XAXIS()
+        return degrees(2.0*acos(w)), Vec3._wrap(np.array([x/s, y/s, z/s]))
+
+    def __repr__(self):
+        return "<Quat %s>"%self.value
+
+    def __mul__(self, quat):
+        return self.multiply(quat)
+
+    @property
+    def x(self):
+        return self.value[0]
+    @property
+    def y(self):
+        return self.value[1]
+    @property
+    def z(self):
+        return self.value[2]
+    @property
+    def w(self):
+        return self.value[3]
+
+    @classmethod
+    def IDENTITY(cls):
+        return Quat._wrap(np.array([0.0, 0.0, 0.0, 1.0]))
+    @classmethod
+    def AXISANGLE(cls, angle, axis):
+        assert isinstance(axis, Vec3), "Axis must be instance of Vec3"
+        x, y, z = axis.value.tolist()
+        m=sqrt(x*x+y*y+z*z)
+        h=radians(angle)/2.0
+        s=sin(h)/m
+        return Quat._wrap(np.array([x*s, y*s, z*s, cos(h)]))
+    @classmethod
+    def MAT4(cls, mat4):
+        assert isinstance(mat4, Mat4), "MAT4 requires a Mat4 instance"
+        return QuatArray.MAT4ARRAY(Mat4Array(mat4)).element(0)
+
+    @classmethod
+    def DIMENSIONS(cls):
+        return 4
+
+class QuatArray(VectorArray):
+    __slots__=()
+    vector_type=Quat
+
+    def __init__(self, values, dtype=None):
+        super().__init__(values, 4, dtype)
+
+    ########################################
+    #   Returns New QuatArrays
+    ########################################
+
+    @profile('QuatArray.multiply')
+    def multiply(self, quats):
+        a=self.value
+        b=self._operand(quats)
+        x1, y1, z1, w1 = a[..., 0], a[..., 1], a[..., 2], a[..., 3]
+        x2, y2, z2, w2 = b[..., 0], b[..., 1], b[..., 2], b[..., 3]
+        return QuatArray._wrap(np.stack((w1*x2+x1*w2+y1*z2-z1*y2,
+                                         w1*y2-x1*z2+y1*w2+z1*x2,
+                                         w1*z2+x1*y2-y1*x2+z1*w2,
+                                         w1*w2-x1*x2-y1*y2-z1*z2), axis=-1))
+
+    def conjugate(self):
+        result=np.negative(self.value)
+        result[:, 3]=self.value[:, 3]
+        return QuatArray._wrap(result)
+
+    def nlerp(self, quats, t):
+        b=self._short_path(quats)
+        r=self.value+(b-self.value)*self._scalar_operand(np.asarray(t, dtype=self.value.dtype))
+        return QuatArray._wrap(r/np.linalg.norm(r, axis=1)[:, np.newaxis])
+
+    @profile('QuatArray.slerp')
+    def slerp(self, quats, t):
+        b=self._short_path(quats)
+        t=np.broadcast_to(np.asarray(t, dtype=self.value.dtype), (self.count,))
+        d=np.clip(np.einsum('ij,ij->i', self.value, b), -1.0, 1.0)
+        theta=np.arccos(d)
+        s=np.sin(theta)
+        # Nearly parallel rows fall back to a linear blend to avoid dividing by ~0
+        linear=s < 1e-6
+        s=np.where(linear, 1.0, s)
+        wa=np.where(linear, 1.0-t, np.sin((1.0-t)*theta)/s)
+        wb=np.where(linear, t, np.sin(t*theta)/s)
+        r=self.value*wa[:, np.newaxis]+b*wb[:, np.newaxis]
+        return QuatArray._wrap(r/np.linalg.norm(r, axis=1)[:, np.newaxis])
+
+    @profile('QuatArray.rotate')
+    def rotate(self, vectors, out=None):
+        # Quaternion i rotates vector i, or one Vec3 is rotated by every quaternion
+        return QuatArray._rotate(self.value, vectors, out)
+
+    @profile('QuatArray.to_mat4array')
+    def to_mat4array(self, translations=None, scales=None, out=None):
+        q=self.value
+        x, y, z, w = q[:, 0], q[:, 1], q[:, 2], q[:, 3]
+        if out is None:
+            out=Mat4Array._wrap(np.empty((self.count, 4, 4)))
+        m=out.value
+        m[:, 0, 0]=1.0-2.0*(y*y+z*z)
+        m[:, 0, 1]=2.0*(x*y-w*z)
+        m[:, 0, 2]=2.0*(x*z+w*y)
+        m[:, 1, 0]=2.0*(x*y+w*z)
+        m[:, 1, 1]=1.0-2.0*(x*x+z*z)
+        m[:, 1, 2]=2.0*(y*z-w*x)
+        m[:, 2, 0]=2.0*(x*z-w*y)
+        m[:, 2, 1]=2.0*(y*z+w*x)
+        m[:, 2, 2]=1.0-2.0*(x*x+y*y)
+        if scales is not None:
+            m[:, :3, :3]*=self._vec3_operand(scales)[:, np.newaxis, :]
+        m[:, :3, 3]=self._vec3_operand(translations) if translations is not None else 0.0
+        m[:, 3, :3]=0.0
+        m[:, 3, 3]=1.0
+        return out
+
+    def to_axis_angle(self):
+        q=self.normalize().value
+        w=np.clip(q[:, 3], -1.0, 1.0)
+        s=np.sqrt(1.0-w*w)
+        axes=np.divide(q[:, :3], s[:, np.newaxis], out=np.tile([1.0, 0.0, 0.0], (self.count, 1)), where=s[:, np.newaxis] > 1e-8)
+        return np.degrees(2.0*np.arccos(w)), Vec3Array._wrap(axes)
+
+    def _short_path(self, quats):
+        b=np.broadcast_to(self._operand(quats), self.value.shape)
+        return np.where((np.einsum('ij,ij->i', self.value, b) < 0.0)[:, np.newaxis], -b, b)
+
+    def _vec3_operand(self, obj):
+        if isinstance(obj, (Vec3Array, Vec3)):
+            return obj.value
+        return obj
+
+    @classmethod
+    def _rotate(cls, q, vectors, out):
+        v=vectors.value if isinstance(vectors, (Vec3Array, Vec3)) else vectors
+        u=q[..., :3]
+        t=2.0*np.cross(u, v)
+        rotated=v+q[..., 3:4]*t+np.cross(u, t)
+        if out is None:
+            return Vec3Array._wrap(np.atleast_2d(rotated))
+        out.value[...]=rotated
+        return out
+
+    @classmethod
+    def IDENTITY(cls, count, dtype=np.float64):
+        result=np.zeros((count, 4), dtype=dtype)
+        result[:, 3]=1.0
+        return QuatArray._wrap(result)
+
+    @classmethod
+    def AXISANGLE(cls, angles, axes):
+        a=axes.value if isinstance(axes, Vec3Array) else np.asarray(axes, dtype=np.float64)
+        h=np.radians(angles)/2.0
+        result=np.empty((len(a), 4))
+        result[:, :3]=a*(np.sin(h)/np.linalg.norm(a, axis=1))[:, np.newaxis]
+        result[:, 3]=np.cos(h)
+        return QuatArray._wrap(result)
+
+    @classmethod
+    def MAT4ARRAY(cls, mat4array):
+        # Rotation part of each matrix, which must not contain scale
+        assert isinstance(mat4array, Mat4Array), "MAT4ARRAY requires a Mat4Array instance"
+        m=mat4array.value
+        m00, m11, m22 = m[:, 0, 0], m[:, 1, 1], m[:, 2, 2]
+        trace=m00+m11+m22
+        # Shepperd's method, pick the largest of w, x, y, z to divide by
+        candidates=np.stack((trace, m00, m11, m22), axis=1)
+        pick=np.argmax(candidates, axis=1)
+        result=np.empty((len(m), 4))
+        for case in range(0, 4):
+            rows=pick == case
+            if not np.any(rows):
+                continue
+            r=m[rows]
+            if case == 0:
+                s=np.sqrt(trace[rows]+1.0)*2.0
+                q=(r[:, 2, 1]-r[:, 1, 2], r[:, 0, 2]-r[:, 2, 0], r[:, 1, 0]-r[:, 0, 1], s*s/4.0)
+            elif case == 1:
+                s=np.sqrt(1.0+r[:, 0, 0]-r[:, 1, 1]-r[:, 2, 2])*2.0
+                q=(s*s/4.0, r[:, 0, 1]+r[:, 1, 0], r[:, 0, 2]+r[:, 2, 0], r[:, 2, 1]-r[:, 1, 2])
+            elif case == 2:
+                s=np.sqrt(1.0+r[:, 1, 1]-r[:, 0, 0]-r[:, 2, 2])*2.0
+                q=(r[:, 0, 1]+r[:, 1, 0], s*s/4.0, r[:, 1, 2]+r[:, 2, 1], r[:, 0, 2]-r[:, 2, 0])
+            else:
+                s=np.sqrt(1.0+r[:, 2, 2]-r[:, 0, 0]-r[:, 1, 1])*2.0
+                q=(r[:, 0, 2]+r[:, 2, 0], r[:, 1, 2]+r[:, 2, 1], s*s/4.0, r[:, 1, 0]-r[:, 0, 1])
+            result[rows]=np.stack(q, axis=1)/s[:, np.newaxis]
+        return QuatArray._wrap(result)
+
+def _write(out, values):
+    if out is None:
+        return Quat._wrap(np.array(values))
+    out.value[...]=values
+    return out
@@ -3,6 +3,7 @@ import numpy as np
 from .common import Vector
 
 class Vec2(Vector):
+    __slots__=()
 
     def __init__(self, values):
         super().__init__(values, 2)
@@ -11,36 +12,38 @@ class Vec2(Vector):
     #   Returns New Vectors. Override These
     ########################################
 
-    def cross_product(self, vector):
-        return Vec2(self._cross(vector))
+    def cross_product(self, vector, out=None):
+        assert isinstance(vector, Vec2), "vector must be an instance of Vec2."
+        return self._result(Vec2, self._cross(vector.value, self._out(out)), out)
 
-    def hadamard_product(self, vector):
+    def hadamard_product(self, vector, out=None):
         assert isinstance(vector, Vec2), "vector must be an instance of Vec2."
-        return Vec2(self._hadamard(vector))
+        return self._result(Vec2, self._hadamard(vector.value, self._out(out)), out)
 
-    def inverse(self):
-        return Vec2(self._inverse())
+    def inverse(self, out=None):
+        return self._result(Vec2, self._inverse(self._out(out)), out)
 
-    def transform(self, matrix):
-        return Vec2(self._transform(matrix))
+    def transform(self, matrix, out=None):
+        self.assert_matrix(matrix)
+        return self._result(Vec2, self._transform(matrix.value, self._out(out)), out)
 
-    def normalize(self):
-        return Vec2(self._normalize())
+    def normalize(self, out=None):
+        return self._result(Vec2, self._normalize(self._out(out)), out)
 
-    def divide(self, vector):
+    def divide(self, vector, out=None):
         assert isinstance(vector, Vec2), "vector must be an instance of Vec2."
-        return Vec2(self._divide(vector))
+        return self._result(Vec2, self._divide(vector.value, self._out(out)), out)
 
-    def add(self, vector):
+    def add(self, vector, out=None):
         assert isinstance(vector, Vec2), "vector must be an instance of Vec2."
-        return Vec2(self._add(vector))
+        return self._result(Vec2, self._add(vector.value, self._out(out)), out)
 
-    def subtract(self, vector):
+    def subtract(self, vector, out=None):
         assert isinstance(vector, Vec2), "vector must be an instance of Vec2."
-        return Vec2(self._subtract(vector))
+        return self._result(Vec2, self._subtract(vector.value, self._out(out)), out)
 
-    def scalar(self, scalar):
-        return Vec2(self._scalar(scalar))
+    def scalar(self, scalar, out=None):
+        return self._result(Vec2, self._scalar(scalar, self._out(out)), out)
 
     def __repr__(self):
         return "<Vec2 %s>"%self.value
@@ -54,26 +57,27 @@ class Vec2(Vector):
 
     @classmethod
     def ZERO(cls):
-        return Vec2([0,0])
+        return Vec2._wrap(np.array([0,0], dtype=np.float64))
     @classmethod
     def SCALAR(cls, scalar):
-        return Vec2([scalar, scalar])
+        return Vec2._wrap(np.array([scalar, scalar], dtype=np.float64))
     @classmethod
     def VEC3(cls, vec3):
         assert isinstance(vec3, Vec3), "VEC3 requires a Vec3 instance"
-        return Vec2([vec3.value[0], vec3.value[1]])
+        return Vec2._wrap(np.array([vec3.value[0], vec3.value[1]], dtype=np.float64))
     @classmethod
     def XAXIS(cls):
-        return Vec2([1,0])
+        return Vec2._wrap(np.array([1,0], dtype=np.float64))
     @classmethod
     def YAXIS(cls):
-        return Vec2([0,1])
+        return Vec2._wrap(np.array([0,1], dtype=np.float64))
 
     @classmethod
     def DIMENSIONS(cls):
         return 2
 
 class Vec3(Vector):
+    __slots__=()
 
     def __init__(self, values):
         super().__init__(values, 3)
@@ -82,37 +86,38 @@ class Vec3(Vector):
     #   Returns New Vectors. Override These
     ########################################
 
-    def cross_product(self, vector):
+    def cross_product(self, vector, out=None):
         assert isinstance(vector, Vec3), "vector must be an instance of Vec3."
-        return Vec3(self._cross(vector))
+        return self._result(Vec3, self._cross(vector.value, self._out(out)), out)
 
-    def hadamard_product(self, vector):
+    def hadamard_product(self, vector, out=None):
         assert isinstance(vector, Vec3), "vector must be an instance of Vec3."
-        return Vec3(self._hadamard(vector))
+        return self._result(Vec3, self._hadamard(vector.value, self._out(out)), out)
 
-    def inverse(self):
-        return Vec3(self._inverse())
+    def inverse(self, out=None):
+        return self._result(Vec3, self._inverse(self._out(out)), out)
 
-    def transform(self, matrix):
-        return Vec3(self._transform(matrix))
+    def transform(self, matrix, out=None):
+        self.assert_matrix(matrix)
+        return self._result(Vec3, self._transform(matrix.value, self._out(out)), out)
 
-    def normalize(self):
-        return Vec3(self._normalize())
+    def normalize(self, out=None):
+        return self._result(Vec3, self._normalize(self._out(out)), out)
 
-    def divide(self, vector):
+    def divide(self, vector, out=None):
         assert isinstance(vector, Vec3), "vector must be an instance of Vec3."
-        return Vec3(self._divide(vector))
+        return self._result(Vec3, self._divide(vector.value, self._out(out)), out)
 
-    def add(self, vector):
+    def add(self, vector, out=None):
         assert isinstance(vector, Vec3), "vector must be an instance of Vec3."
-        return Vec3(self._add(vector))
+        return self._result(Vec3, self._add(vector.value, self._out(out)), out)
 
-    def subtract(self, vector):
+    def subtract(self, vector, out=None):
         assert isinstance(vector, Vec3), "vector must be an instance of Vec3."
-        return Vec3(self._subtract(vector))
+        return self._result(Vec3, self._subtract(vector.value, self._out(out)), out)
 
-    def scalar(self, scalar):
-        return Vec3(self._scalar(scalar))
+    def scalar(self, scalar, out=None):
+        return self._result(Vec3, self._scalar(scalar, self._out(out)), out)
 
     def __repr__(self):
         return "<Vec3 %s>"%self.value
@@ -129,45 +134,46 @@ class Vec3(Vector):
 
     @classmethod
     def SCALAR(cls, scalar):
-        return Vec3([scalar, scalar, scalar])
+        return Vec3._wrap(np.array([scalar, scalar, scalar], dtype=np.float64))
     @classmethod
     def VEC2(cls, vec2):
         assert isinstance(vec2, Vec2), "VEC2 requires a Vec2 instance"
-        return Vec3([vec2.value[0], vec2.value[1], 0.0])
+        return Vec3._wrap(np.array([vec2.value[0], vec2.value[1], 0.0], dtype=np.float64))
     @classmethod
     def VEC4(cls, vec4):
         assert isinstance(vec4, Vec4), "VEC4 requires a Vec4 instance"
-        return Vec3([vec4.value[0], vec4.value[1], vec4.value[2]])
+        return Vec3._wrap(np.array([vec4.value[0], vec4.value[1], vec4.value[2]], dtype=np.float64))
     @classmethod
     def ZERO(cls):
-        return Vec3([0,0,0])
+        return Vec3._wrap(np.array([0,0,0], dtype=np.float64))
     @classmethod
     def UP(cls):
-        return Vec3([0,1,0])
+        return Vec3._wrap(np.array([0,1,0], dtype=np.float64))
     @classmethod
     def DOWN(cls):
-        return Vec3([0,-1,0])
+        return Vec3._wrap(np.array([0,-1,0], dtype=np.float64))
     @classmethod
     def LEFT(cls):
-        return Vec3([-1,0,0])
+        return Vec3._wrap(np.array([-1,0,0], dtype=np.float64))
     @classmethod
     def RIGHT(cls):
-        return Vec3([1,0,0])
+        return Vec3._wrap(np.array([1,0,0], dtype=np.float64))
     @classmethod
     def XAXIS(cls):
-        return Vec3([1,0,0])
+        return Vec3._wrap(np.array([1,0,0], dtype=np.float64))
     @classmethod
     def YAXIS(cls):
-        return Vec3([0,1,0])
+        return Vec3._wrap(np.array([0,1,0], dtype=np.float64))
     @classmethod
     def ZAXIS(cls):
-        return Vec3([0,0,1])
+        return Vec3._wrap(np.array([0,0,1], dtype=np.float64))
 
     @classmethod
     def DIMENSIONS(cls):
         return 3
 
 class Vec4(Vector):
+    __slots__=()
 
     def __init__(self, values):
         super().__init__(values, 4)
@@ -176,39 +182,38 @@ class Vec4(Vector):
     #   Returns New Vectors. Override These
     ########################################
 
-    def cross_product(self, vector):
-        return Vec4(self._cross(vector))
-
-    def hadamard_product(self, vector):
+    def cross_product(self, vector, out=None):
         assert isinstance(vector, Vec4), "vector must be an instance of Vec4."
-        return Vec4(self._hadamard(vector))
+        return self._result(Vec4, self._cross(vector.value, self._out(out)), out)
 
-    def inverse(self):
+    def hadamard_product(self, vector, out=None):
         assert isinstance(vector, Vec4), "vector must be an instance of Vec4."
-        return Vec4(self._inverse())
+        return self._result(Vec4, self._hadamard(vector.value, self._out(out)), out)
 
-    def transform(self, matrix):
-        assert isinstance(vector, Vec4), "vector must be an instance of Vec4."
-        return Vec4(self._transform(matrix))
+    def inverse(self, out=None):
+        return self._result(Vec4, self._inverse(self._out(out)), out)
 
-    def normalize(self):
-        assert isinstance(vector, Vec4), "vector must be an instance of Vec4."
-        return Vec4(self._normalize())
+    def transform(self, matrix, out=None):
+        self.assert_matrix(matrix)
+        return self._result(Vec4, self._transform(matrix.value, self._out(out)), out)
+
+    def normalize(self, out=None):
+        return self._result(Vec4, self._normalize(self._out(out)), out)
 
-    def divide(self, vector):
+    def divide(self, vector, out=None):
         assert isinstance(vector, Vec4), "vector must be an instance of Vec4."
-        return Vec4(self._divide(vector))
+        return self._result(Vec4, self._divide(vector.value, self._out(out)), out)
 
-    def add(self, vector):
+    def add(self, vector, out=None):
         assert isinstance(vector, Vec4), "vector must be an instance of Vec4."
-        return Vec4(self._add(vector))
+        return self._result(Vec4, self._add(vector.value, self._out(out)), out)
 
-    def subtract(self, vector):
+    def subtract(self, vector, out=None):
         assert isinstance(vector, Vec4), "vector must be an instance of Vec4."
-        return Vec4(self._subtract(vector))
+        return self._result(Vec4, self._subtract(vector.value, self._out(out)), out)
 
-    def scalar(self, scalar):
-        return Vec4(self._scalar(scalar))
+    def scalar(self, scalar, out=None):
+        return self._result(Vec4, self._scalar(scalar, self._out(out)), out)
 
     def __repr__(self):
         return "<Vec4 %s>"%self.value
@@ -228,14 +233,14 @@ class Vec4(Vector):
 
     @classmethod
     def ZERO(cls):
-        return Vec4([0,0,0,0])
+        return Vec4._wrap(np.array([0,0,0,0], dtype=np.float64))
     @classmethod
     def SCALAR(cls, scalar):
-        return Vec4([scalar, scalar, scalar, scalar])
+        return Vec4._wrap(np.array([scalar, scalar, scalar, scalar], dtype=np.float64))
     @classmethod
     def VEC3(cls, vec3):
         assert isinstance(vec3, Vec3), "VEC3 requires a Vec3 instance"
-        return Vec4([vec3.value[0], vec3.value[1], vec3.value[2], 0.0])
+        return Vec4._wrap(np.array([vec3.value[0], vec3.value[1], vec3.value[2], 0.0], dtype=np.float64))
 
     @classmethod
     def DIMENSIONS(cls):
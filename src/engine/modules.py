@@ -0,0 +1,130 @@
+import importlib
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+
+class ModuleRegistry():
+    #   Subsystems by name, given as 'package.module:attribute' (relative
+    #   to the engine package when it starts with a dot) and only
+    #   imported the first time they are asked for, so startup pays for
+    #   numpy, asyncio and friends only once something actually needs them.
+    #   Each module declares the modules it depends on. initialize() runs
+    #   them as a dependency graph, independent modules concurrently on a
+    #   thread pool, and teardown() shuts them down dependents first.
+    def __init__(self, modules=None):
+        self.targets={}
+        self.depends={}
+        self.loaded={}
+        self.instances={}
+        # Names in the order they finished initializing
+        self.initialized=[]
+        for name, target in (modules or {}).items():
+            if isinstance(target, tuple):
+                self.register(name, *target)
+            else:
+                self.register(name, target)
+
+    def register(self, name, target, depends=()):
+        # target is an import path or an already imported object
+        if name in self.instances:
+            raise Exception("Module %s is already initialized!"%name)
+        self.targets[name]=target
+        self.depends[name]=tuple(depends)
+        self.loaded.pop(name, None)
+
+    def get(self, name):
+        if name in self.loaded:
+            return self.loaded[name]
+        if name not in self.targets:
+            raise Exception("Module %s is not registered!"%name)
+        target=self.targets[name]
+        if isinstance(target, str):
+            path, _, attribute = target.partition(':')
+            target=importlib.import_module(path, __package__)
+            if attribute:
+                target=getattr(target, attribute)
+        self.loaded[name]=target
+        return target
+
+    def instance(self, name):
+        return self.instances[name]
+
+    def is_loaded(self, name):
+        return name in self.loaded
+
+    def order(self):
+        # Dependencies before dependents, raises on missing modules or cycles
+        order=[]
+        state={}
+        for root in self.targets:
+            if state.get(root):
+                continue
+            state[root]=1
+            stack=[(root, iter(self.depends[root]))]
+            while stack:
+                name, pending = stack[-1]
+                for dependency in pending:
+                    if dependency not in self.targets:
+                        raise Exception("Module %s depends on unregistered module %s!"%(name, dependency))
+                    if state.get(dependency) == 1:
+                        raise Exception("Module dependency cycle through %s and %s!"%(name, dependency))
+                    if not state.get(dependency):
+                        state[dependency]=1
+                        stack.append((dependency, iter(self.depends[dependency])))
+                        break
+                else:
+                    stack.pop()
+                    state[name]=2
+                    order.append(name)
+        return order
+
+    def initialize(self, create=None, max_workers=None):
+        #   create(name, module) builds the instance, by default module().
+        #   A module starts as soon as everything it depends on is done.
+        #   If one fails, the ones already up are torn down and the
+        #   exception is raised here.
+        create=create or (lambda name, module: module())
+        remaining={name: set(self.depends[name]) for name in self.order() if name not in self.instances}
+        for dependencies in remaining.values():
+            dependencies.difference_update(self.instances)
+        running={}
+        error=None
+        with ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix='module-init') as executor:
+            while remaining or running:
+                if error is None:
+                    for name in [name for name, dependencies in remaining.items() if not dependencies]:
+                        del remaining[name]
+                        running[executor.submit(self._create, create, name)]=name
+                if not running:
+                    break
+                done, pending = wait(running, return_when=FIRST_COMPLETED)
+                for future in done:
+                    name=running.pop(future)
+                    if future.exception() is not None:
+                        error=error or future.exception()
+                        continue
+                    self.instances[name]=future.result()
+                    self.initialized.append(name)
+                    for dependencies in remaining.values():
+                        dependencies.discard(name)
+        if error is not None:
+            self.teardown()
+            raise error
+        return self.instances
+
+    def teardown(self):
+        # Dependents before their dependencies, calls shutdown() where the
+        # instance has one. Returns the names in the order they were shut down
+        names=[]
+        while self.initialized:
+            name=self.initialized.pop()
+            instance=self.instances.pop(name)
+            shutdown=getattr(instance, 'shutdown', None)
+            if callable(shutdown):
+                shutdown()
+            names.append(name)
+        return names
+
+    def _create(self, create, name):
+        return create(name, self.get(name))
+
+    def __contains__(self, name):
+        return name in self.targets
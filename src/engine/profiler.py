@@ -0,0 +1,142 @@
+import json
+import os
+import threading
+from functools import wraps
+from time import perf_counter_ns
+
+class Zone():
+    #   Preallocated ring buffer of the most recent timings for one named zone
+    __slots__=('name', 'starts', 'durations', 'threads', 'index', 'total')
+
+    def __init__(self, name, capacity):
+        # numpy is only imported once something is profiled, the disabled
+        # profiler is on every startup path
+        import numpy as np
+        self.name=name
+        self.starts=np.zeros(capacity, dtype=np.int64)
+        self.durations=np.zeros(capacity, dtype=np.int64)
+        self.threads=np.zeros(capacity, dtype=np.uint64)
+        self.index=0
+        self.total=0
+
+    def record(self, start, duration):
+        i=self.index
+        self.starts[i]=start
+        self.durations[i]=duration
+        self.threads[i]=threading.get_ident()
+        self.index=(i+1) % len(self.starts)
+        self.total+=1
+
+    @property
+    def count(self):
+        return min(self.total, len(self.starts))
+
+    def samples(self):
+        # (starts, durations, threads) oldest first
+        import numpy as np
+        n=self.count
+        order=np.arange(self.index-n, self.index) % len(self.starts)
+        return self.starts[order], self.durations[order], self.threads[order]
+
+class Scope():
+    __slots__=('zone', 'start')
+
+    def __init__(self, zone):
+        self.zone=zone
+
+    def __enter__(self):
+        self.start=perf_counter_ns()
+        return self
+
+    def __exit__(self, *exc):
+        end=perf_counter_ns()
+        self.zone.record(self.start, end-self.start)
+        return False
+
+class NullScope():
+    __slots__=()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+NULL_SCOPE=NullScope()
+
+class Profiler():
+    #   Scoped timers backed by perf_counter_ns. While disabled zone()
+    #   returns a shared no-op scope, and profile() decorators applied
+    #   while disabled return the function untouched, so they cost nothing.
+    #   Set ENGINE_PROFILE=1 before import to have the decorated engine
+    #   hot paths (maths batches, transform updates) instrumented.
+    def __init__(self, enabled=False, capacity=4096):
+        self.enabled=enabled
+        self.capacity=capacity
+        self.zones={}
+
+    def enable(self):
+        self.enabled=True
+
+    def disable(self):
+        self.enabled=False
+
+    def get_zone(self, name):
+        zone=self.zones.get(name)
+        if zone is None:
+            zone=self.zones[name]=Zone(name, self.capacity)
+        return zone
+
+    def zone(self, name):
+        if not self.enabled:
+            return NULL_SCOPE
+        return Scope(self.get_zone(name))
+
+    def profile(self, name=None):
+        def decorator(function):
+            if not self.enabled:
+                return function
+            zone=self.get_zone(name or function.__qualname__)
+            @wraps(function)
+            def profiled(*args, **kwargs):
+                if not self.enabled:
+                    return function(*args, **kwargs)
+                start=perf_counter_ns()
+                try:
+                    return function(*args, **kwargs)
+                finally:
+                    zone.record(start, perf_counter_ns()-start)
+            return profiled
+        return decorator
+
+    def reset(self):
+        # Zones are cleared rather than dropped, decorators hold on to theirs
+        for zone in self.zones.values():
+            zone.index=0
+            zone.total=0
+
+    def report(self):
+        # name -> (samples, mean ms, max ms) over what is still in the buffers
+        result={}
+        for name, zone in self.zones.items():
+            if zone.count:
+                durations=zone.samples()[1]
+                result[name]=(zone.count, float(durations.mean())/1e6, float(durations.max())/1e6)
+        return result
+
+    def export_chrome_trace(self, path):
+        # Complete ("X") events in microseconds, loadable in chrome://tracing
+        # or Perfetto
+        pid=os.getpid()
+        events=[]
+        for name, zone in self.zones.items():
+            starts, durations, threads = zone.samples()
+            for start, duration, thread in zip(starts.tolist(), durations.tolist(), threads.tolist()):
+                events.append({'name': name, 'cat': 'engine', 'ph': 'X', 'ts': start/1000.0, 'dur': duration/1000.0, 'pid': pid, 'tid': thread})
+        events.sort(key=lambda e: e['ts'])
+        with open(path, 'w') as f:
+            json.dump({'traceEvents': events, 'displayTimeUnit': 'ms'}, f)
+        return len(events)
+
+PROFILER=Profiler(enabled=os.environ.get('ENGINE_PROFILE') == '1')
+profile=PROFILER.profile
@@ -0,0 +1,4 @@
+from .vertexbuffer import VertexAttribute, VertexLayout, VertexBuffer, Mesh, POSITION, NORMAL, UV, COLOR
+from .backend import RenderBackend, FrameStats
+from .software import SoftwareRenderer, Framebuffer
+from .queue import RenderQueue, RenderStats, Batch, make_keys, decode_key
@@ -0,0 +1,71 @@
+from ..maths import Mat4, Mat4Array
+
+class FrameStats():
+    #   Per frame counters kept by every backend, reset by begin_frame()
+    __slots__=('draws', 'instances', 'triangles', 'rasterized', 'fragments')
+
+    def __init__(self):
+        self.reset()
+
+    def reset(self):
+        self.draws=0
+        self.instances=0
+        # Submitted, and left after clipping and back face culling
+        self.triangles=0
+        self.rasterized=0
+        # Pixels written after the depth test
+        self.fragments=0
+
+    def as_dict(self):
+        return {name: getattr(self, name) for name in FrameStats.__slots__}
+
+    def __repr__(self):
+        return "<FrameStats %s>"%', '.join("%s %s"%item for item in self.as_dict().items())
+
+class RenderBackend():
+    #   What the frame loop draws through. A frame is
+    #       begin_frame(), set_camera(view, projection),
+    #       draw()/draw_instanced() per mesh, end_frame()
+    #   with Mat4 model, view and projection matrices in the engine's
+    #   column vector convention. The software backend renders into NumPy
+    #   arrays without a display, an OpenGL backend implements the same
+    #   methods so the code submitting draws does not change.
+    def __init__(self, width, height):
+        self.width=width
+        self.height=height
+        self.view=Mat4.IDENTITY()
+        self.projection=Mat4.IDENTITY()
+        self.view_projection=Mat4.IDENTITY()
+        self.stats=FrameStats()
+
+    def begin_frame(self, clear_color=(0, 0, 0, 255)):
+        self.stats.reset()
+
+    def set_camera(self, view, projection):
+        assert isinstance(view, Mat4) and isinstance(projection, Mat4), "view and projection must be instances of Mat4."
+        self.view=view
+        self.projection=projection
+        self.view_projection=projection.multiply(view)
+
+    def bind(self, shader, material):
+        # Called by RenderQueue.execute when the shader or material changes
+        pass
+
+    def draw(self, mesh, model, color=(255, 255, 255, 255)):
+        assert isinstance(model, Mat4), "model must be an instance of Mat4."
+        self.draw_instanced(mesh, Mat4Array._wrap(model.value.reshape((1, 4, 4))), color)
+
+    def draw_instanced(self, mesh, models, color=(255, 255, 255, 255)):
+        # One mesh drawn once per matrix of the Mat4Array models
+        raise Exception("%s does not implement draw_instanced!"%self.__class__.__name__)
+
+    def end_frame(self):
+        # Returns the frame's FrameStats
+        return self.stats
+
+    def resize(self, width, height):
+        self.width=width
+        self.height=height
+
+    def shutdown(self):
+        pass
@@ -0,0 +1,247 @@
+import numpy as np
+
+from ..maths import Mat4, Mat4Array
+from ..profiler import profile
+
+#   64 bit sort keys, most significant first:
+#       layer 8 | shader 12 | material 20 | depth 24
+#   Sorting the keys orders draws by layer, then by the state that is
+#   expensive to change, then by depth. depth is quantized from [0, 1].
+LAYER_BITS=8
+SHADER_BITS=12
+MATERIAL_BITS=20
+DEPTH_BITS=24
+DEPTH_SHIFT=0
+MATERIAL_SHIFT=DEPTH_BITS
+SHADER_SHIFT=MATERIAL_SHIFT+MATERIAL_BITS
+LAYER_SHIFT=SHADER_SHIFT+SHADER_BITS
+DEPTH_MAX=(1 << DEPTH_BITS)-1
+
+def make_keys(layer, shader, material, depth, back_to_front=False):
+    # Scalars or arrays, returns uint64 keys. back_to_front inverts the
+    # depth bits so farther draws sort first, for blended layers
+    depth=np.rint(np.clip(np.asarray(depth, dtype=np.float64), 0.0, 1.0)*DEPTH_MAX).astype(np.uint64)
+    if back_to_front:
+        depth=np.uint64(DEPTH_MAX)-depth
+    for value, bits, name in ((layer, LAYER_BITS, 'layer'), (shader, SHADER_BITS, 'shader'), (material, MATERIAL_BITS, 'material')):
+        assert np.all((np.asarray(value) >= 0) & (np.asarray(value) < (1 << bits))), "%s must fit in %s bits."%(name, bits)
+    layer, shader, material = (np.asarray(value, dtype=np.uint64) for value in (layer, shader, material))
+    return (layer << np.uint64(LAYER_SHIFT)) | (shader << np.uint64(SHADER_SHIFT)) | (material << np.uint64(MATERIAL_SHIFT)) | depth
+
+def decode_key(key):
+    # (layer, shader, material, depth bits) of one key
+    key=int(key)
+    return (key >> LAYER_SHIFT,
+            (key >> SHADER_SHIFT) & ((1 << SHADER_BITS)-1),
+            (key >> MATERIAL_SHIFT) & ((1 << MATERIAL_BITS)-1),
+            key & DEPTH_MAX)
+
+def _radix_argsort(passes, count):
+    #   LSD radix sort. passes are arrays of digits, least significant
+    #   first, each at most 16 bits so NumPy's stable sort runs it as a
+    #   counting sort. Passes where every digit is equal are skipped
+    order=None
+    for digits in passes:
+        if order is not None:
+            digits=digits[order]
+        if len(digits) and digits.min() == digits.max():
+            continue
+        step=np.argsort(digits, kind='stable')
+        order=step if order is None else order[step]
+    return order if order is not None else np.arange(count)
+
+class RenderStats():
+    #   Per frame counters of a RenderQueue, reset by clear()
+    __slots__=('submitted', 'batches', 'state_changes', 'layer_changes', 'shader_changes', 'material_changes', 'mesh_changes')
+
+    def __init__(self):
+        self.reset()
+
+    def reset(self):
+        self.submitted=0
+        self.batches=0
+        # Binds of a new shader or material, what the sort order minimizes
+        self.state_changes=0
+        self.layer_changes=0
+        self.shader_changes=0
+        self.material_changes=0
+        self.mesh_changes=0
+
+    def as_dict(self):
+        return {name: getattr(self, name) for name in RenderStats.__slots__}
+
+    def __repr__(self):
+        return "<RenderStats %s>"%', '.join("%s %s"%item for item in self.as_dict().items())
+
+class Batch():
+    #   One instanced draw, count instances of mesh sharing the same layer,
+    #   shader and material, starting at start in the packed instances
+    __slots__=('layer', 'shader', 'material', 'mesh', 'start', 'count', 'instances')
+
+    def __init__(self, layer, shader, material, mesh, start, count, instances):
+        self.layer=layer
+        self.shader=shader
+        self.material=material
+        self.mesh=mesh
+        self.start=start
+        self.count=count
+        self.instances=instances
+
+    @property
+    def models(self):
+        # Mat4Array view of the batch's matrices, no copy
+        return Mat4Array._wrap(self.instances[self.start:self.start+self.count])
+
+    def __repr__(self):
+        return "<Batch layer %s shader %s material %s %s instances>"%(self.layer, self.shader, self.material, self.count)
+
+class RenderQueue():
+    #   Collects draws for one frame and turns them into as few instanced
+    #   draws and state changes as possible. Each submission stores its
+    #   sort key, mesh and model matrix in preallocated arrays. sort()
+    #   radix sorts the keys and groups the draws into Batches, each
+    #   batch's matrices packed contiguously into one float32 (N, 4, 4)
+    #   instances array ready to upload. Within one layer, shader and
+    #   material, draws of the same mesh are grouped together, front to
+    #   back, except in back_to_front layers where depth order is kept
+    #   and only neighbouring draws of a mesh are merged.
+    def __init__(self, capacity=1024, back_to_front=()):
+        self.back_to_front=set(back_to_front)
+        self.keys=np.zeros(capacity, dtype=np.uint64)
+        self.mesh_ids=np.zeros(capacity, dtype=np.int64)
+        self.models=np.zeros((capacity, 4, 4), dtype=np.float32)
+        self.count=0
+        # Meshes submitted this frame, index -> Mesh and id(Mesh) -> index
+        self.meshes=[]
+        self.mesh_index={}
+        self.instances=np.zeros((0, 4, 4), dtype=np.float32)
+        self.batches=[]
+        self.stats=RenderStats()
+
+    def clear(self):
+        self.count=0
+        self.meshes=[]
+        self.mesh_index={}
+        self.batches=[]
+        self.stats.reset()
+
+    ########################################
+    #   Submission
+    ########################################
+
+    def submit(self, mesh, model, layer=0, shader=0, material=0, depth=0.0):
+        # depth is the draw's distance normalized to [0, 1]
+        assert isinstance(model, Mat4), "model must be an instance of Mat4."
+        index=self._allocate(1)
+        self.keys[index]=make_keys(layer, shader, material, depth, layer in self.back_to_front)
+        self.mesh_ids[index]=self._mesh_id(mesh)
+        self.models[index]=model.value
+
+    def submit_many(self, mesh, models, layer=0, shader=0, material=0, depths=0.0):
+        # Every matrix of the Mat4Array models, depths one value or one each
+        assert isinstance(models, Mat4Array), "models must be an instance of Mat4Array."
+        count=len(models.value)
+        start=self._allocate(count)
+        self.keys[start:start+count]=make_keys(layer, shader, material, depths, layer in self.back_to_front)
+        self.mesh_ids[start:start+count]=self._mesh_id(mesh)
+        self.models[start:start+count]=models.value
+
+    ########################################
+    #   Sorting and batching
+    ########################################
+
+    @profile('RenderQueue.sort')
+    def sort(self):
+        # Builds self.batches and self.instances from this frame's draws
+        count=self.count
+        keys=self.keys[:count]
+        mesh_ids=self.mesh_ids[:count]
+        state=keys >> np.uint64(DEPTH_BITS)
+        # The mesh sorts between depth and state, except where depth
+        # order has to hold
+        grouped=mesh_ids.copy()
+        if self.back_to_front:
+            layers=(keys >> np.uint64(LAYER_SHIFT)).astype(np.int64)
+            grouped[np.isin(layers, list(self.back_to_front))]=0
+        mask=np.uint64(0xFFFF)
+        order=_radix_argsort([(keys & mask).astype(np.uint16),
+                              ((keys >> np.uint64(16)) & np.uint64(0xFF)).astype(np.uint16),
+                              (grouped & 0xFFFF).astype(np.uint16),
+                              (grouped >> 16).astype(np.uint16),
+                              (state & mask).astype(np.uint16),
+                              ((state >> np.uint64(16)) & mask).astype(np.uint16),
+                              (state >> np.uint64(32)).astype(np.uint16)], count)
+        state=state[order]
+        mesh_ids=mesh_ids[order]
+        self.instances=self.models[:count][order]
+        # A batch starts wherever the state or the mesh changes
+        starts=np.flatnonzero(np.concatenate(([count > 0], (state[1:] != state[:-1]) | (mesh_ids[1:] != mesh_ids[:-1]))))
+        ends=np.append(starts[1:], count)
+        state, mesh_ids = state[starts], mesh_ids[starts]
+        layer=state >> np.uint64(LAYER_SHIFT-DEPTH_BITS)
+        shader=(state >> np.uint64(SHADER_SHIFT-DEPTH_BITS)) & np.uint64((1 << SHADER_BITS)-1)
+        material=state & np.uint64((1 << MATERIAL_BITS)-1)
+        meshes=self.meshes
+        instances=self.instances
+        self.batches=[Batch(l, s, m, meshes[i], start, end-start, instances)
+                      for l, s, m, i, start, end in zip(layer.tolist(), shader.tolist(), material.tolist(), mesh_ids.tolist(), starts.tolist(), ends.tolist())]
+        self._count_changes(layer, shader, material, mesh_ids)
+        return self.batches
+
+    def execute(self, backend):
+        # Sorts if needed and draws every batch through a RenderBackend,
+        # binding shader and material only when they change
+        if self.count and not self.batches:
+            self.sort()
+        bound=None
+        for batch in self.batches:
+            if (batch.shader, batch.material) != bound:
+                bound=(batch.shader, batch.material)
+                backend.bind(batch.shader, batch.material)
+            backend.draw_instanced(batch.mesh, batch.models)
+        return self.stats
+
+    ########################################
+    #   Internals
+    ########################################
+
+    def _count_changes(self, layer, shader, material, mesh_ids):
+        # Per batch arrays, in draw order
+        stats=self.stats
+        stats.batches=len(layer)
+        if not len(layer):
+            return
+        # The first batch binds everything
+        stats.layer_changes=1+int(np.count_nonzero(layer[1:] != layer[:-1]))
+        shader_changed=shader[1:] != shader[:-1]
+        material_changed=material[1:] != material[:-1]
+        stats.shader_changes=1+int(np.count_nonzero(shader_changed))
+        stats.material_changes=1+int(np.count_nonzero(material_changed))
+        stats.state_changes=1+int(np.count_nonzero(shader_changed | material_changed))
+        stats.mesh_changes=1+int(np.count_nonzero(mesh_ids[1:] != mesh_ids[:-1]))
+
+    def _mesh_id(self, mesh):
+        index=self.mesh_index.get(id(mesh))
+        if index is None:
+            assert len(self.meshes) < (1 << 32), "Too many meshes in one frame."
+            index=self.mesh_index[id(mesh)]=len(self.meshes)
+            self.meshes.append(mesh)
+        return index
+
+    def _allocate(self, count):
+        start=self.count
+        if start+count > len(self.keys):
+            self._grow(max(len(self.keys)*2, start+count))
+        self.count+=count
+        self.batches=[]
+        self.stats.submitted+=count
+        return start
+
+    def _grow(self, capacity):
+        extra=capacity-len(self.keys)
+        self.keys=np.concatenate((self.keys, np.zeros(extra, dtype=np.uint64)))
+        self.mesh_ids=np.concatenate((self.mesh_ids, np.zeros(extra, dtype=np.int64)))
+        self.models=np.concatenate((self.models, np.zeros((extra, 4, 4), dtype=np.float32)))
+
+    def __len__(self):
+        return self.count
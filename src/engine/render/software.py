@@ -0,0 +1,174 @@
+import numpy as np
+
+from ..maths import Mat4Array
+from ..profiler import profile
+from .backend import RenderBackend
+from .vertexbuffer import Mesh
+
+class Framebuffer():
+    #   RGBA uint8 color and float32 depth, row 0 at the top. Either array
+    #   can be passed in to render straight into it.
+    def __init__(self, width, height, color=None, depth=None):
+        self.width=width
+        self.height=height
+        if color is None:
+            color=np.zeros((height, width, 4), dtype=np.uint8)
+        assert isinstance(color, np.ndarray) and color.shape == (height, width, 4) and color.dtype == np.uint8 and color.flags.c_contiguous, "color must be a contiguous (height, width, 4) uint8 NDARRAY."
+        if depth is None:
+            depth=np.ones((height, width), dtype=np.float32)
+        assert isinstance(depth, np.ndarray) and depth.shape == (height, width) and depth.dtype == np.float32 and depth.flags.c_contiguous, "depth must be a contiguous (height, width) float32 NDARRAY."
+        self.color=color
+        self.depth=depth
+
+    def clear(self, color=(0, 0, 0, 255), depth=1.0):
+        self.color[...]=color
+        self.depth[...]=depth
+
+    def __repr__(self):
+        return "<Framebuffer %sx%s>"%(self.width, self.height)
+
+class SoftwareRenderer(RenderBackend):
+    #   Headless RenderBackend rasterizing with NumPy, for machines without
+    #   a GPU or display. Every stage works on all triangles of a draw at
+    #   once:
+    #       vertices to clip space by projection.view.model per instance
+    #       triangles off screen or crossing the near plane are dropped,
+    #       there is no clipping, then back faces are culled
+    #       each triangle's pixel bounding box is expanded into candidate
+    #       fragments, FRAGMENT_BATCH at a time, and kept where all three
+    #       edge functions are positive
+    #       per pixel the nearest fragment is found by sorting on (pixel,
+    #       depth) and written if it passes the depth test
+    #   Triangles are flat shaded, color scaled by a directional light on
+    #   the world space face normal. Output only depends on the inputs, so
+    #   frames are reproducible for benchmarks and image comparisons.
+    FRAGMENT_BATCH=1 << 20
+
+    def __init__(self, width, height, framebuffer=None, cull_back_faces=True):
+        super().__init__(width, height)
+        if isinstance(framebuffer, np.ndarray):
+            framebuffer=Framebuffer(width, height, framebuffer)
+        self.framebuffer=framebuffer if framebuffer is not None else Framebuffer(width, height)
+        self.cull_back_faces=cull_back_faces
+        # Direction the light travels in, and the unlit fraction of color
+        self.light=np.array([-0.3, -1.0, -0.5])/np.linalg.norm([-0.3, -1.0, -0.5])
+        self.ambient=0.25
+
+    def begin_frame(self, clear_color=(0, 0, 0, 255)):
+        super().begin_frame(clear_color)
+        self.framebuffer.clear(clear_color)
+
+    def resize(self, width, height):
+        super().resize(width, height)
+        self.framebuffer=Framebuffer(width, height)
+
+    def read_pixels(self):
+        return self.framebuffer.color.copy()
+
+    ########################################
+    #   Drawing
+    ########################################
+
+    @profile('SoftwareRenderer.draw_instanced')
+    def draw_instanced(self, mesh, models, color=(255, 255, 255, 255)):
+        assert isinstance(mesh, Mesh), "mesh must be an instance of Mesh."
+        assert isinstance(models, Mat4Array), "models must be an instance of Mat4Array."
+        positions=mesh.vertices.data['position'].astype(np.float64)
+        triangles=mesh.triangles
+        count=len(models.value)
+        self.stats.draws+=1
+        self.stats.instances+=count
+        self.stats.triangles+=len(triangles)*count
+        if not count or not len(triangles):
+            return
+        # (K, N, 4) clip and (K, N, 3) world positions for every instance
+        mvp=np.matmul(self.view_projection.value, models.value)
+        clip=np.matmul(positions, mvp[:, :3, :3].transpose(0, 2, 1))+mvp[:, np.newaxis, :3, 3]
+        w=np.matmul(positions, mvp[:, 3, :3, np.newaxis])[..., 0]+mvp[:, np.newaxis, 3, 3]
+        world=models.transform_points(positions)
+        # Per instance triangles, flattened to (K*T, 3, ...)
+        clip=clip[:, triangles].reshape((-1, 3, 3))
+        w=w[:, triangles].reshape((-1, 3))
+        world=world[:, triangles].reshape((-1, 3, 3))
+        self._rasterize(clip, w, world, np.asarray(color, dtype=np.float64))
+
+    def _rasterize(self, clip, w, world, color):
+        width, height = self.framebuffer.width, self.framebuffer.height
+        # Drop triangles with a vertex in front of the near plane, and
+        # those entirely outside one of the other frustum planes
+        keep=np.all(clip[:, :, 2] >= -w, axis=1)
+        for axis in (0, 1):
+            keep&=~np.all(clip[:, :, axis] < -w, axis=1)
+            keep&=~np.all(clip[:, :, axis] > w, axis=1)
+        keep&=~np.all(clip[:, :, 2] > w, axis=1)
+        clip, w, world = clip[keep], w[keep], world[keep]
+        # Screen space, pixel centers at +0.5 and y pointing down
+        ndc=clip/w[:, :, np.newaxis]
+        x=(ndc[:, :, 0]+1.0)*0.5*width
+        y=(1.0-ndc[:, :, 1])*0.5*height
+        z=ndc[:, :, 2]*0.5+0.5
+        # Counter clockwise in NDC is clockwise once y is flipped
+        area=(x[:, 1]-x[:, 0])*(y[:, 2]-y[:, 0])-(x[:, 2]-x[:, 0])*(y[:, 1]-y[:, 0])
+        keep=area < 0 if self.cull_back_faces else area != 0
+        xmin=np.maximum(np.ceil(x.min(axis=1)-0.5), 0).astype(np.int64)
+        xmax=np.minimum(np.floor(x.max(axis=1)-0.5), width-1).astype(np.int64)
+        ymin=np.maximum(np.ceil(y.min(axis=1)-0.5), 0).astype(np.int64)
+        ymax=np.minimum(np.floor(y.max(axis=1)-0.5), height-1).astype(np.int64)
+        keep&=(xmin <= xmax) & (ymin <= ymax)
+        x, y, z, area, world = x[keep], y[keep], z[keep], area[keep], world[keep]
+        xmin, xmax, ymin, ymax = xmin[keep], xmax[keep], ymin[keep], ymax[keep]
+        self.stats.rasterized+=len(x)
+        if not len(x):
+            return
+        colors=self._shade(world, color)
+        # Consecutive runs of triangles covering about FRAGMENT_BATCH
+        # candidate pixels each, a larger triangle gets a run to itself
+        columns=xmax-xmin+1
+        sizes=columns*(ymax-ymin+1)
+        ends=np.cumsum(sizes)
+        splits=np.searchsorted(ends, np.arange(self.FRAGMENT_BATCH, ends[-1], self.FRAGMENT_BATCH), side='right')
+        bounds=np.unique(np.concatenate(([0], splits, [len(x)])))
+        for start, stop in zip(bounds[:-1].tolist(), bounds[1:].tolist()):
+            chunk=slice(start, stop)
+            self._fragments(x[chunk], y[chunk], z[chunk], area[chunk], xmin[chunk], ymin[chunk], columns[chunk], sizes[chunk], colors[chunk])
+
+    def _fragments(self, x, y, z, area, xmin, ymin, columns, sizes, colors):
+        framebuffer=self.framebuffer
+        triangle=np.repeat(np.arange(len(x)), sizes)
+        local=np.arange(len(triangle))-np.repeat(np.cumsum(sizes)-sizes, sizes)
+        px=xmin[triangle]+local % columns[triangle]
+        py=ymin[triangle]+local // columns[triangle]
+        cx=px+0.5
+        cy=py+0.5
+        tx, ty, tz, inverse = x[triangle], y[triangle], z[triangle], 1.0/area[triangle]
+        # Barycentric weights from the edge functions, all positive inside
+        b0=((tx[:, 2]-tx[:, 1])*(cy-ty[:, 1])-(ty[:, 2]-ty[:, 1])*(cx-tx[:, 1]))*inverse
+        b1=((tx[:, 0]-tx[:, 2])*(cy-ty[:, 2])-(ty[:, 0]-ty[:, 2])*(cx-tx[:, 2]))*inverse
+        b2=1.0-b0-b1
+        depth=b0*tz[:, 0]+b1*tz[:, 1]+b2*tz[:, 2]
+        inside=np.flatnonzero((b0 >= 0) & (b1 >= 0) & (b2 >= 0) & (depth >= 0) & (depth <= 1))
+        pixel=py[inside]*framebuffer.width+px[inside]
+        depth=depth[inside].astype(np.float32)
+        # Nearest fragment per pixel, ties go to the earlier triangle
+        order=np.lexsort((depth, pixel))
+        pixel, depth, inside = pixel[order], depth[order], inside[order]
+        first=np.ones(len(pixel), dtype=bool)
+        first[1:]=pixel[1:] != pixel[:-1]
+        pixel, depth, inside = pixel[first], depth[first], inside[first]
+        passed=depth < framebuffer.depth.reshape(-1)[pixel]
+        pixel=pixel[passed]
+        framebuffer.depth.reshape(-1)[pixel]=depth[passed]
+        framebuffer.color.reshape((-1, 4))[pixel]=colors[triangle[inside[passed]]]
+        self.stats.fragments+=len(pixel)
+
+    def _shade(self, world, color):
+        # (T, 4) uint8 flat shaded color per triangle
+        normal=np.cross(world[:, 1]-world[:, 0], world[:, 2]-world[:, 0])
+        length=np.linalg.norm(normal, axis=1)
+        np.place(length, length == 0, 1)
+        light=np.maximum(-(normal @ self.light)/length, 0.0)
+        intensity=self.ambient+(1.0-self.ambient)*light
+        colors=np.empty((len(world), 4), dtype=np.uint8)
+        colors[:, :3]=np.clip(np.rint(color[:3]*intensity[:, np.newaxis]), 0, 255)
+        colors[:, 3]=color[3]
+        return colors
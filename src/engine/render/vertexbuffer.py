@@ -0,0 +1,214 @@
+import numpy as np
+
+from ..maths import Mat4, Vec2Array, Vec3Array, Vec4Array
+from ..profiler import profile
+
+class VertexAttribute():
+    #   One named, fixed width field of a vertex. wrapper is the maths
+    #   array type attribute() hands the column out as.
+    __slots__=('name', 'components', 'dtype', 'normalized', 'wrapper')
+
+    def __init__(self, name, components, dtype=np.float32, normalized=False, wrapper=None):
+        self.name=name
+        self.components=components
+        self.dtype=np.dtype(dtype)
+        self.normalized=normalized
+        self.wrapper=wrapper
+
+    @property
+    def field(self):
+        return (self.name, self.dtype, (self.components,))
+
+    def __repr__(self):
+        return "<VertexAttribute %s %sx%s>"%(self.name, self.components, self.dtype)
+
+POSITION=VertexAttribute('position', 3, wrapper=Vec3Array)
+NORMAL=VertexAttribute('normal', 3, wrapper=Vec3Array)
+UV=VertexAttribute('uv', 2, wrapper=Vec2Array)
+COLOR=VertexAttribute('color', 4, wrapper=Vec4Array)
+
+class VertexLayout():
+    #   Ordered attributes packed into one interleaved record, with no
+    #   padding, as glVertexAttribPointer expects them. offset() and stride
+    #   are the values to pass it.
+    def __init__(self, *attributes):
+        assert attributes, "A VertexLayout needs at least one attribute."
+        self.attributes=attributes
+        self.dtype=np.dtype([a.field for a in attributes])
+        self.names=tuple(a.name for a in attributes)
+
+    @property
+    def stride(self):
+        return self.dtype.itemsize
+
+    def offset(self, name):
+        return self.dtype.fields[name][1]
+
+    def attribute(self, name):
+        for a in self.attributes:
+            if a.name == name:
+                return a
+        raise Exception("VertexLayout has no %s attribute!"%name)
+
+    def __contains__(self, name):
+        return name in self.dtype.fields
+
+    def __eq__(self, other):
+        return isinstance(other, VertexLayout) and self.dtype == other.dtype
+
+    def __hash__(self):
+        return hash(self.dtype)
+
+    def __repr__(self):
+        return "<VertexLayout %s stride %s>"%(', '.join(self.names), self.stride)
+
+VertexLayout.POSITION=VertexLayout(POSITION)
+VertexLayout.STANDARD=VertexLayout(POSITION, NORMAL, UV)
+VertexLayout.FULL=VertexLayout(POSITION, NORMAL, UV, COLOR)
+
+class VertexBuffer():
+    #   Vertices in one contiguous structured array laid out by a
+    #   VertexLayout, ready to hand to the GPU as is. attribute() returns
+    #   views into it, so filling or transforming a column writes straight
+    #   into the upload buffer.
+    def __init__(self, layout, vertices):
+        # vertices is a count, or a structured array matching layout
+        assert isinstance(layout, VertexLayout), "layout must be an instance of VertexLayout."
+        self.layout=layout
+        if isinstance(vertices, int):
+            self.data=np.zeros(vertices, dtype=layout.dtype)
+        else:
+            assert isinstance(vertices, np.ndarray) and vertices.dtype == layout.dtype, "vertices must be a structured NDARRAY matching the layout."
+            self.data=np.ascontiguousarray(vertices)
+
+    @classmethod
+    def from_arrays(cls, layout=None, **columns):
+        # from_arrays(position=..., uv=...), layout defaults to the given
+        # columns from the FULL attribute set, in that order
+        if layout is None:
+            layout=VertexLayout(*[a for a in VertexLayout.FULL.attributes if a.name in columns])
+        count=None
+        for name, values in columns.items():
+            values=values.value if hasattr(values, 'value') else np.asarray(values)
+            count=len(values) if count is None else count
+            assert len(values) == count, "Every column must have the same number of vertices."
+        buffer=cls(layout, count or 0)
+        for name, values in columns.items():
+            buffer.set_attribute(name, values)
+        return buffer
+
+    ########################################
+    #   Attributes, views not copies
+    ########################################
+
+    def attribute(self, name):
+        view=self.data[name]
+        wrapper=self.layout.attribute(name).wrapper
+        return wrapper._wrap(view) if wrapper is not None else view
+
+    def set_attribute(self, name, values):
+        self.data[name]=values.value if hasattr(values, 'value') else values
+
+    @property
+    def positions(self):
+        return self.attribute('position')
+
+    @property
+    def normals(self):
+        return self.attribute('normal')
+
+    ########################################
+    #   Upload
+    ########################################
+
+    def buffer(self):
+        # Flat byte memoryview over the vertices, no copy
+        return memoryview(self.data.view(np.uint8))
+
+    @property
+    def nbytes(self):
+        return self.data.nbytes
+
+    @property
+    def stride(self):
+        return self.layout.stride
+
+    ########################################
+    #   Transformation
+    ########################################
+
+    @profile('VertexBuffer.transform')
+    def transform(self, matrix, out=None):
+        #   Positions by the full matrix, normals by the inverse transpose
+        #   of its 3x3 part then renormalized. Other attributes are copied.
+        #   out may be self to transform in place
+        assert isinstance(matrix, Mat4), "matrix must be an instance of Mat4."
+        if out is None:
+            out=VertexBuffer(self.layout, self.data.copy())
+        elif out is not self:
+            out.data[...]=self.data
+        m=matrix.value
+        if 'position' in self.layout:
+            p=self.data['position']
+            out.data['position']=p @ m[:3, :3].T.astype(p.dtype)+m[:3, 3].astype(p.dtype)
+        if 'normal' in self.layout:
+            n=self.data['normal'] @ np.linalg.inv(m[:3, :3]).astype(self.data['normal'].dtype)
+            length=np.linalg.norm(n, axis=1, keepdims=True)
+            np.place(length, length == 0, 1)
+            out.data['normal']=n/length
+        return out
+
+    def bounds(self):
+        # (2, 3) minimum and maximum corner of the positions
+        p=self.data['position']
+        return np.stack((p.min(axis=0), p.max(axis=0)))
+
+    def __len__(self):
+        return len(self.data)
+
+    def __repr__(self):
+        return "<VertexBuffer %s vertices %s>"%(len(self.data), self.layout)
+
+class Mesh():
+    #   A VertexBuffer and triangle indices, uint32 and contiguous so both
+    #   upload without conversion
+    def __init__(self, vertices, indices=None):
+        assert isinstance(vertices, VertexBuffer), "vertices must be an instance of VertexBuffer."
+        self.vertices=vertices
+        if indices is None:
+            indices=np.arange(len(vertices), dtype=np.uint32)
+        self.indices=np.ascontiguousarray(indices, dtype=np.uint32).reshape(-1)
+        assert len(self.indices) % 3 == 0, "indices must describe whole triangles."
+
+    @property
+    def triangles(self):
+        # (T, 3) view of the indices
+        return self.indices.reshape((-1, 3))
+
+    def index_buffer(self):
+        return memoryview(self.indices.view(np.uint8))
+
+    def compute_normals(self):
+        # Area weighted vertex normals, written into the normal attribute
+        assert 'normal' in self.vertices.layout, "The mesh's layout has no normal attribute."
+        p=self.vertices.data['position'].astype(np.float64)
+        t=self.triangles
+        face=np.cross(p[t[:, 1]]-p[t[:, 0]], p[t[:, 2]]-p[t[:, 0]])
+        normals=np.zeros_like(p)
+        for corner in range(0, 3):
+            np.add.at(normals, t[:, corner], face)
+        length=np.linalg.norm(normals, axis=1, keepdims=True)
+        np.place(length, length == 0, 1)
+        self.vertices.data['normal']=normals/length
+
+    def transform(self, matrix, out=None):
+        if out is None:
+            return Mesh(self.vertices.transform(matrix), self.indices)
+        self.vertices.transform(matrix, out.vertices)
+        return out
+
+    def bounds(self):
+        return self.vertices.bounds()
+
+    def __repr__(self):
+        return "<Mesh %s vertices %s triangles>"%(len(self.vertices), len(self.indices)//3)
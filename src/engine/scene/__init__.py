@@ -0,0 +1 @@
+from .transform import Transform, TransformHierarchy
@@ -0,0 +1,280 @@
+import numpy as np
+
+from ..maths import Vec3, Vec3Array, Quat, QuatArray, Mat4, Mat4Array
+from ..profiler import profile
+
+class TransformHierarchy():
+    #   Every node's position, rotation and scale live in shared arrays,
+    #   with local and world matrices cached in Mat4Array buffers. Setting
+    #   a value only flags the node, update() rebuilds the flagged local
+    #   matrices and walks the tree one depth level at a time, so each
+    #   level is a single batched matmul over just the nodes whose world
+    #   matrix actually changed. Nothing dirty means update() is free.
+    def __init__(self, capacity=64):
+        self.count=0
+        self.positions=np.zeros((capacity, 3))
+        self.rotations=np.zeros((capacity, 4))
+        self.rotations[:, 3]=1.0
+        self.scales=np.ones((capacity, 3))
+        self.local=Mat4Array(capacity)
+        self.world=Mat4Array(capacity)
+        self.parents=np.full(capacity, -1, dtype=np.int64)
+        self.active=np.zeros(capacity, dtype=bool)
+        # Bumped when a slot is destroyed, so handles to it go stale
+        self.generations=np.zeros(capacity, dtype=np.int64)
+        self.local_dirty=np.zeros(capacity, dtype=bool)
+        self.children=[[] for i in range(0, capacity)]
+        self.free=[]
+        self.levels=[]
+        self.scratch=Mat4Array._wrap(np.empty((capacity, 4, 4)))
+        self.dirty=False
+        self.structure_dirty=False
+
+    ########################################
+    #   Node management
+    ########################################
+
+    def create(self, parent=None, position=None, rotation=None, scale=None):
+        if self.free:
+            index=self.free.pop()
+        else:
+            if self.count == len(self.parents):
+                self._grow(len(self.parents)*2)
+            index=self.count
+            self.count+=1
+        self.positions[index]=position.value if position is not None else 0.0
+        self.rotations[index]=rotation.value if rotation is not None else (0.0, 0.0, 0.0, 1.0)
+        self.scales[index]=scale.value if scale is not None else 1.0
+        self.parents[index]=-1
+        self.active[index]=True
+        self.children[index]=[]
+        transform=Transform(self, index)
+        if parent is not None:
+            self.set_parent(index, parent.index)
+        self._mark(index)
+        self.structure_dirty=True
+        return transform
+
+    def destroy(self, index):
+        # Removes the node and its whole subtree
+        self._check(index)
+        self._detach(index)
+        stack=[index]
+        while stack:
+            i=stack.pop()
+            stack.extend(self.children[i])
+            self.children[i]=[]
+            self.active[i]=False
+            self.generations[i]+=1
+            self.local_dirty[i]=False
+            self.parents[i]=-1
+            self.free.append(i)
+        self.structure_dirty=True
+
+    def set_parent(self, index, parent):
+        self._check(index)
+        if parent is not None and parent >= 0:
+            self._check(parent)
+            p=parent
+            while p >= 0:
+                if p == index:
+                    raise Exception("Transform %s cannot be parented to its own descendant %s!"%(index, parent))
+                p=self.parents[p]
+        self._detach(index)
+        if parent is not None and parent >= 0:
+            self.parents[index]=parent
+            self.children[parent].append(index)
+        self._mark(index)
+        self.structure_dirty=True
+
+    ########################################
+    #   Batched setters, mark nodes dirty
+    ########################################
+
+    def set_positions(self, indices, positions):
+        self.positions[indices]=positions.value if isinstance(positions, Vec3Array) else positions
+        self._mark(indices)
+
+    def set_rotations(self, indices, rotations):
+        self.rotations[indices]=rotations.value if isinstance(rotations, QuatArray) else rotations
+        self._mark(indices)
+
+    def set_scales(self, indices, scales):
+        self.scales[indices]=scales.value if isinstance(scales, Vec3Array) else scales
+        self._mark(indices)
+
+    ########################################
+    #   Update
+    ########################################
+
+    @profile('TransformHierarchy.update')
+    def update(self):
+        if not self.dirty:
+            return
+        if self.structure_dirty:
+            self._build_levels()
+        n=self.count
+        dirty=self.local_dirty[:n]
+        changed=np.flatnonzero(dirty)
+        if len(changed):
+            scratch=self._scratch(len(changed))
+            QuatArray._wrap(self.rotations[changed]).to_mat4array(self.positions[changed], self.scales[changed], out=scratch)
+            self.local.value[changed]=scratch.value
+        # A node's world matrix changes when its local matrix or any
+        # ancestor's world matrix changed, resolved level by level
+        world_dirty=dirty.copy()
+        for depth, level in enumerate(self.levels):
+            if depth > 0:
+                world_dirty[level]|=world_dirty[self.parents[level]]
+            idx=level[world_dirty[level]]
+            if not len(idx):
+                continue
+            if depth == 0:
+                self.world.value[idx]=self.local.value[idx]
+            else:
+                self.world.value[idx]=np.matmul(self.world.value[self.parents[idx]], self.local.value[idx])
+        dirty[...]=False
+        self.dirty=False
+
+    def _build_levels(self):
+        n=self.count
+        levels=[]
+        level=[i for i in range(0, n) if self.active[i] and self.parents[i] < 0]
+        while level:
+            levels.append(np.array(level, dtype=np.int64))
+            level=[c for i in level for c in self.children[i]]
+        self.levels=levels
+        self.structure_dirty=False
+
+    def _scratch(self, count):
+        # Reused buffer for rebuilding local matrices, grown as needed
+        if len(self.scratch) < count:
+            self.scratch=Mat4Array._wrap(np.empty((count, 4, 4)))
+        return Mat4Array._wrap(self.scratch.value[:count])
+
+    def _check(self, index):
+        if not (0 <= index < self.count and self.active[index]):
+            raise Exception("Transform %s does not exist!"%index)
+
+    def _mark(self, indices):
+        self.local_dirty[indices]=True
+        self.dirty=True
+
+    def _detach(self, index):
+        parent=self.parents[index]
+        if parent >= 0:
+            self.children[parent].remove(index)
+            self.parents[index]=-1
+
+    def _grow(self, capacity):
+        extra=capacity-len(self.parents)
+        self.positions=np.concatenate((self.positions, np.zeros((extra, 3))))
+        rotations=np.zeros((extra, 4))
+        rotations[:, 3]=1.0
+        self.rotations=np.concatenate((self.rotations, rotations))
+        self.scales=np.concatenate((self.scales, np.ones((extra, 3))))
+        self.local=Mat4Array._wrap(np.concatenate((self.local.value, Mat4Array(extra).value)))
+        self.world=Mat4Array._wrap(np.concatenate((self.world.value, Mat4Array(extra).value)))
+        self.parents=np.concatenate((self.parents, np.full(extra, -1, dtype=np.int64)))
+        self.active=np.concatenate((self.active, np.zeros(extra, dtype=bool)))
+        self.generations=np.concatenate((self.generations, np.zeros(extra, dtype=np.int64)))
+        self.local_dirty=np.concatenate((self.local_dirty, np.zeros(extra, dtype=bool)))
+        self.children.extend([] for i in range(0, extra))
+
+class Transform():
+    #   Handle to one node of a TransformHierarchy. Values read back are
+    #   views into the hierarchy's arrays, write through the setters so
+    #   the node gets marked dirty. A handle remembers its node's
+    #   generation and raises once the node is destroyed, even if the
+    #   slot has been reused.
+    __slots__=('hierarchy', 'index', 'generation')
+
+    def __init__(self, hierarchy, index):
+        self.hierarchy=hierarchy
+        self.index=index
+        self.generation=int(hierarchy.generations[index])
+
+    @property
+    def alive(self):
+        return int(self.hierarchy.generations[self.index]) == self.generation
+
+    def _index(self):
+        if not self.alive:
+            raise Exception("Transform %s has been destroyed!"%self.index)
+        return self.index
+
+    @property
+    def position(self):
+        index=self._index()
+        return Vec3._wrap(self.hierarchy.positions[index])
+    @position.setter
+    def position(self, vector):
+        assert isinstance(vector, Vec3), "position must be an instance of Vec3."
+        index=self._index()
+        self.hierarchy.positions[index]=vector.value
+        self.hierarchy._mark(index)
+
+    @property
+    def rotation(self):
+        index=self._index()
+        return Quat._wrap(self.hierarchy.rotations[index])
+    @rotation.setter
+    def rotation(self, quat):
+        assert isinstance(quat, Quat), "rotation must be an instance of Quat."
+        index=self._index()
+        self.hierarchy.rotations[index]=quat.value
+        self.hierarchy._mark(index)
+
+    @property
+    def scale(self):
+        index=self._index()
+        return Vec3._wrap(self.hierarchy.scales[index])
+    @scale.setter
+    def scale(self, vector):
+        assert isinstance(vector, Vec3), "scale must be an instance of Vec3."
+        index=self._index()
+        self.hierarchy.scales[index]=vector.value
+        self.hierarchy._mark(index)
+
+    @property
+    def parent(self):
+        index=self._index()
+        p=self.hierarchy.parents[index]
+        return Transform(self.hierarchy, int(p)) if p >= 0 else None
+    @parent.setter
+    def parent(self, transform):
+        index=self._index()
+        self.hierarchy.set_parent(index, transform._index() if transform is not None else None)
+
+    @property
+    def local_matrix(self):
+        index=self._index()
+        self.hierarchy.update()
+        return Mat4._wrap(self.hierarchy.local.value[index])
+
+    @property
+    def world_matrix(self):
+        index=self._index()
+        self.hierarchy.update()
+        return Mat4._wrap(self.hierarchy.world.value[index])
+
+    def translate(self, vector):
+        assert isinstance(vector, Vec3), "vector must be an instance of Vec3."
+        index=self._index()
+        self.hierarchy.positions[index]+=vector.value
+        self.hierarchy._mark(index)
+
+    def rotate(self, quat):
+        # Applies quat on top of the current rotation
+        assert isinstance(quat, Quat), "quat must be an instance of Quat."
+        index=self._index()
+        rotation=Quat._wrap(self.hierarchy.rotations[index])
+        quat.multiply(rotation, out=rotation)
+        self.hierarchy._mark(index)
+
+    def destroy(self):
+        index=self._index()
+        self.hierarchy.destroy(index)
+
+    def __repr__(self):
+        return "<Transform %s>"%self.index
@@ -0,0 +1,4 @@
+from .grid import SpatialHash
+from .volumes import AABBArray, SphereArray
+from .frustum import Frustum
+from .bvh import DynamicBVH
@@ -0,0 +1,321 @@
+import numpy as np
+
+from ..profiler import profile
+from .frustum import Frustum
+from .volumes import AABBArray, _points
+
+class DynamicBVH():
+    #   Bounding volume hierarchy over moving boxes. Leaves keep the exact
+    #   box and a fattened copy grown by margin, a leaf is only relinked
+    #   once its box leaves the fat one. Single inserts descend by the
+    #   surface area heuristic, update_many() refits the whole tree in one
+    #   vectorized pass per height and rebuilds it top down once its
+    #   surface area has grown past rebuild_ratio times what it was after
+    #   the last rebuild. Queries walk the tree a level at a time, testing
+    #   every node of a level in one call, and return the items stored
+    #   with each leaf (by default the leaf's proxy id).
+    def __init__(self, capacity=64, margin=0.1, rebuild_ratio=1.5):
+        self.margin=margin
+        self.rebuild_ratio=rebuild_ratio
+        # Fat boxes for leaves, bounds of the children for internal nodes
+        self.boxes=np.zeros((capacity, 2, 3))
+        self.tight=np.zeros((capacity, 2, 3))
+        self.items=np.full(capacity, -1, dtype=np.int64)
+        self.parent=np.full(capacity, -1, dtype=np.int64)
+        self.left=np.full(capacity, -1, dtype=np.int64)
+        self.right=np.full(capacity, -1, dtype=np.int64)
+        self.height=np.zeros(capacity, dtype=np.int64)
+        self.active=np.zeros(capacity, dtype=bool)
+        self.free=[]
+        self.count=0
+        self.root=-1
+        self.leaves=0
+        self.base_cost=0.0
+
+    ########################################
+    #   Leaves
+    ########################################
+
+    def insert(self, minimum, maximum, item=None):
+        # Returns the proxy id used to update or remove the box
+        leaf=self._allocate()
+        self.tight[leaf, 0]=_points(minimum)[0]
+        self.tight[leaf, 1]=_points(maximum)[0]
+        self._fatten(leaf)
+        self.items[leaf]=leaf if item is None else item
+        self.left[leaf]=self.right[leaf]=-1
+        self.height[leaf]=0
+        self._insert_leaf(leaf)
+        self.leaves+=1
+        return leaf
+
+    @profile('DynamicBVH.insert_many')
+    def insert_many(self, boxes, items=None):
+        # Adds every box then rebuilds, returns the proxy ids
+        value=boxes.value if isinstance(boxes, AABBArray) else np.asarray(boxes, dtype=np.float64).reshape((-1, 2, 3))
+        proxies=np.array([self._allocate() for i in range(0, len(value))], dtype=np.int64)
+        self.tight[proxies]=value
+        self._fatten(proxies)
+        self.items[proxies]=proxies if items is None else items
+        self.left[proxies]=-1
+        self.right[proxies]=-1
+        self.height[proxies]=0
+        self.leaves+=len(proxies)
+        self.rebuild()
+        return proxies
+
+    def remove(self, proxy):
+        if not self.active[proxy] or self.left[proxy] >= 0:
+            raise Exception("Proxy %s is not in the DynamicBVH!"%proxy)
+        self._remove_leaf(proxy)
+        self._release(proxy)
+        self.leaves-=1
+
+    def update(self, proxy, minimum, maximum):
+        # True when the box escaped its fat box and the leaf was relinked
+        self.tight[proxy, 0]=_points(minimum)[0]
+        self.tight[proxy, 1]=_points(maximum)[0]
+        if np.all(self.tight[proxy, 0] >= self.boxes[proxy, 0]) and np.all(self.tight[proxy, 1] <= self.boxes[proxy, 1]):
+            return False
+        self._remove_leaf(proxy)
+        self._fatten(proxy)
+        self._insert_leaf(proxy)
+        return True
+
+    @profile('DynamicBVH.update_many')
+    def update_many(self, proxies, boxes):
+        # Returns how many boxes escaped their fat boxes
+        proxies=np.asarray(proxies, dtype=np.int64)
+        value=boxes.value if isinstance(boxes, AABBArray) else np.asarray(boxes, dtype=np.float64).reshape((-1, 2, 3))
+        self.tight[proxies]=value
+        fat=self.boxes[proxies]
+        escaped=proxies[~np.all((value[:, 0] >= fat[:, 0]) & (value[:, 1] <= fat[:, 1]), axis=1)]
+        if len(escaped):
+            self._fatten(escaped)
+            self.refit()
+            if self.cost() > self.rebuild_ratio*self.base_cost:
+                self.rebuild()
+        return len(escaped)
+
+    ########################################
+    #   Whole tree
+    ########################################
+
+    @profile('DynamicBVH.refit')
+    def refit(self):
+        # Recomputes every internal box from its children, lowest first
+        internal=self._internal()
+        if not len(internal):
+            return
+        heights=self.height[internal]
+        order=np.argsort(heights, kind='stable')
+        internal=internal[order]
+        bounds=np.flatnonzero(np.diff(heights[order]))+1
+        for nodes in np.split(internal, bounds):
+            l=self.boxes[self.left[nodes]]
+            r=self.boxes[self.right[nodes]]
+            self.boxes[nodes, 0]=np.minimum(l[:, 0], r[:, 0])
+            self.boxes[nodes, 1]=np.maximum(l[:, 1], r[:, 1])
+
+    @profile('DynamicBVH.rebuild')
+    def rebuild(self):
+        # Top down median split along the widest axis of the leaf centers
+        for node in self._internal().tolist():
+            self._release(node)
+        leaves=np.flatnonzero(self.active[:self.count])
+        if not len(leaves):
+            self.root=-1
+            self.base_cost=0.0
+            return
+        self.root=self._build(leaves)
+        self.parent[self.root]=-1
+        self.base_cost=self.cost()
+
+    def cost(self):
+        # Total surface area of the internal nodes
+        internal=self._internal()
+        if not len(internal):
+            return 0.0
+        return float(AABBArray._wrap(self.boxes[internal]).surface_areas().sum())
+
+    ########################################
+    #   Queries, return NDARRAY of items
+    ########################################
+
+    @profile('DynamicBVH.query_aabb')
+    def query_aabb(self, minimum, maximum):
+        minimum=_points(minimum)[0]
+        maximum=_points(maximum)[0]
+        found=[]
+        nodes=self._roots()
+        while len(nodes):
+            b=self.boxes[nodes]
+            nodes=nodes[np.all((b[:, 0] <= maximum) & (b[:, 1] >= minimum), axis=1)]
+            leaf=self.left[nodes] < 0
+            leaves=nodes[leaf]
+            t=self.tight[leaves]
+            found.append(leaves[np.all((t[:, 0] <= maximum) & (t[:, 1] >= minimum), axis=1)])
+            nodes=self._children(nodes[~leaf])
+        return self._items(found)
+
+    @profile('DynamicBVH.query_frustum')
+    def query_frustum(self, frustum):
+        # Subtrees entirely inside the frustum are taken without testing
+        # anything below them
+        found=[]
+        inside=[]
+        nodes=self._roots()
+        while len(nodes):
+            b=self.boxes[nodes]
+            state=frustum._classify((b[:, 0]+b[:, 1])*0.5, (b[:, 1]-b[:, 0])*0.5)
+            inside.append(nodes[state == Frustum.INSIDE])
+            nodes=nodes[state == Frustum.INTERSECTING]
+            leaf=self.left[nodes] < 0
+            leaves=nodes[leaf]
+            t=self.tight[leaves]
+            found.append(leaves[frustum._classify((t[:, 0]+t[:, 1])*0.5, (t[:, 1]-t[:, 0])*0.5) != Frustum.OUTSIDE])
+            nodes=self._children(nodes[~leaf])
+        # Nothing was classified on an empty tree
+        nodes=np.concatenate(inside) if inside else np.zeros(0, dtype=np.int64)
+        while len(nodes):
+            leaf=self.left[nodes] < 0
+            found.append(nodes[leaf])
+            nodes=self._children(nodes[~leaf])
+        return self._items(found)
+
+    ########################################
+    #   Internals
+    ########################################
+
+    def _insert_leaf(self, leaf):
+        if self.root < 0:
+            self.root=leaf
+            self.parent[leaf]=-1
+            return
+        box=self.boxes[leaf]
+        index=self.root
+        # Descend towards the child whose box grows the least, stop when
+        # pairing with the current node is cheaper than going further
+        while self.left[index] >= 0:
+            nodes=np.array((index, self.left[index], self.right[index]))
+            b=self.boxes[nodes]
+            merged=AABBArray._wrap(np.stack((np.minimum(b[:, 0], box[0]), np.maximum(b[:, 1], box[1])), axis=1)).surface_areas()
+            areas=AABBArray._wrap(b).surface_areas()
+            cost=2.0*merged[0]
+            inherited=2.0*(merged[0]-areas[0])
+            child_costs=merged[1:]+inherited-np.where(self.left[nodes[1:]] >= 0, areas[1:], 0.0)
+            if cost < child_costs[0] and cost < child_costs[1]:
+                break
+            index=int(nodes[1] if child_costs[0] <= child_costs[1] else nodes[2])
+        sibling=index
+        old_parent=self.parent[sibling]
+        node=self._allocate()
+        self.parent[node]=old_parent
+        self.left[node]=sibling
+        self.right[node]=leaf
+        self.parent[sibling]=node
+        self.parent[leaf]=node
+        self.items[node]=-1
+        if old_parent < 0:
+            self.root=node
+        elif self.left[old_parent] == sibling:
+            self.left[old_parent]=node
+        else:
+            self.right[old_parent]=node
+        self._fix_upwards(node)
+
+    def _remove_leaf(self, leaf):
+        if leaf == self.root:
+            self.root=-1
+            return
+        parent=self.parent[leaf]
+        grandparent=self.parent[parent]
+        sibling=self.right[parent] if self.left[parent] == leaf else self.left[parent]
+        self.parent[sibling]=grandparent
+        if grandparent < 0:
+            self.root=sibling
+        else:
+            if self.left[grandparent] == parent:
+                self.left[grandparent]=sibling
+            else:
+                self.right[grandparent]=sibling
+            self._fix_upwards(grandparent)
+        self._release(parent)
+        self.parent[leaf]=-1
+
+    def _fix_upwards(self, index):
+        while index >= 0:
+            l=self.left[index]
+            r=self.right[index]
+            self.boxes[index, 0]=np.minimum(self.boxes[l, 0], self.boxes[r, 0])
+            self.boxes[index, 1]=np.maximum(self.boxes[l, 1], self.boxes[r, 1])
+            self.height[index]=1+max(self.height[l], self.height[r])
+            index=self.parent[index]
+
+    def _build(self, leaves):
+        if len(leaves) == 1:
+            return int(leaves[0])
+        b=self.boxes[leaves]
+        centers=b[:, 0]+b[:, 1]
+        axis=int(np.argmax(centers.max(axis=0)-centers.min(axis=0)))
+        half=len(leaves)//2
+        order=np.argpartition(centers[:, axis], half)
+        left=self._build(leaves[order[:half]])
+        right=self._build(leaves[order[half:]])
+        node=self._allocate()
+        self.left[node]=left
+        self.right[node]=right
+        self.parent[left]=node
+        self.parent[right]=node
+        self.items[node]=-1
+        self.boxes[node, 0]=np.minimum(self.boxes[left, 0], self.boxes[right, 0])
+        self.boxes[node, 1]=np.maximum(self.boxes[left, 1], self.boxes[right, 1])
+        self.height[node]=1+max(self.height[left], self.height[right])
+        return node
+
+    def _fatten(self, leaves):
+        self.boxes[leaves, 0]=self.tight[leaves, 0]-self.margin
+        self.boxes[leaves, 1]=self.tight[leaves, 1]+self.margin
+
+    def _internal(self):
+        n=self.count
+        return np.flatnonzero(self.active[:n] & (self.left[:n] >= 0))
+
+    def _roots(self):
+        return np.array([self.root] if self.root >= 0 else [], dtype=np.int64)
+
+    def _children(self, nodes):
+        return np.concatenate((self.left[nodes], self.right[nodes]))
+
+    def _items(self, found):
+        return self.items[np.concatenate(found)] if found else np.zeros(0, dtype=np.int64)
+
+    def _allocate(self):
+        if self.free:
+            index=self.free.pop()
+        else:
+            if self.count == len(self.active):
+                self._grow(len(self.active)*2)
+            index=self.count
+            self.count+=1
+        self.active[index]=True
+        return index
+
+    def _release(self, index):
+        self.active[index]=False
+        self.left[index]=self.right[index]=self.parent[index]=-1
+        self.free.append(index)
+
+    def _grow(self, capacity):
+        extra=capacity-len(self.active)
+        self.boxes=np.concatenate((self.boxes, np.zeros((extra, 2, 3))))
+        self.tight=np.concatenate((self.tight, np.zeros((extra, 2, 3))))
+        self.items=np.concatenate((self.items, np.full(extra, -1, dtype=np.int64)))
+        self.parent=np.concatenate((self.parent, np.full(extra, -1, dtype=np.int64)))
+        self.left=np.concatenate((self.left, np.full(extra, -1, dtype=np.int64)))
+        self.right=np.concatenate((self.right, np.full(extra, -1, dtype=np.int64)))
+        self.height=np.concatenate((self.height, np.zeros(extra, dtype=np.int64)))
+        self.active=np.concatenate((self.active, np.zeros(extra, dtype=bool)))
+
+    def __len__(self):
+        return self.leaves
@@ -0,0 +1,63 @@
+import numpy as np
+
+from ..maths import Mat4
+from ..profiler import profile
+from .volumes import _points
+
+class Frustum():
+    #   The six clip planes of a view-projection matrix, as a (6, 4) array
+    #   of unit normals pointing inwards and offsets, in the order left,
+    #   right, bottom, top, near, far. A point p is inside plane i when
+    #   dot(planes[i, :3], p)+planes[i, 3] >= 0. Matches the column vector
+    #   layout of Mat4.perspective and Mat4.orthographic (clip z in -w..w).
+    #   The tests return masks over the volumes, so culling is one
+    #   vectorized call per batch rather than per object.
+    OUTSIDE=0
+    INTERSECTING=1
+    INSIDE=2
+
+    def __init__(self, view_projection):
+        assert isinstance(view_projection, (Mat4, np.ndarray)), "view_projection must be an instance of Mat4 or a (4, 4) NDARRAY."
+        self.planes=np.empty((6, 4))
+        self.set_matrix(view_projection)
+
+    def set_matrix(self, view_projection):
+        # Rows of the matrix added to and subtracted from the w row
+        m=view_projection.value if isinstance(view_projection, Mat4) else view_projection
+        planes=self.planes
+        planes[0::2]=m[3]+m[:3]
+        planes[1::2]=m[3]-m[:3]
+        planes/=np.linalg.norm(planes[:, :3], axis=1)[:, np.newaxis]
+
+    def contains_points(self, points):
+        d=_points(points) @ self.planes[:, :3].T+self.planes[:, 3]
+        return np.all(d >= 0.0, axis=1)
+
+    @profile('Frustum.test_spheres')
+    def test_spheres(self, spheres):
+        # Mask of spheres at least partly inside
+        d=spheres.centers @ self.planes[:, :3].T+self.planes[:, 3]
+        return np.all(d >= -spheres.radii[:, np.newaxis], axis=1)
+
+    @profile('Frustum.test_aabbs')
+    def test_aabbs(self, boxes):
+        # Mask of boxes at least partly inside. Conservative, a box near a
+        # corner of the frustum can pass without touching it
+        d, r = self._box_distances(boxes.centers, boxes.extents)
+        return np.all(d >= -r, axis=1)
+
+    def classify_aabbs(self, boxes):
+        # OUTSIDE, INTERSECTING or INSIDE for each box
+        return self._classify(boxes.centers, boxes.extents)
+
+    def _box_distances(self, centers, extents):
+        # Signed distance of each center to each plane and the box's reach
+        # along that plane's normal, both (N, 6)
+        return centers @ self.planes[:, :3].T+self.planes[:, 3], extents @ np.abs(self.planes[:, :3]).T
+
+    def _classify(self, centers, extents):
+        d, r = self._box_distances(centers, extents)
+        result=np.full(len(d), Frustum.INTERSECTING, dtype=np.int8)
+        result[np.all(d >= r, axis=1)]=Frustum.INSIDE
+        result[np.any(d < -r, axis=1)]=Frustum.OUTSIDE
+        return result
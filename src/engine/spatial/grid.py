@@ -0,0 +1,259 @@
+import numpy as np
+
+from ..maths import Vec3, Vec3Array
+from ..profiler import profile
+
+# Cell coordinates are packed into one int64 key, 21 bits per axis, so
+# about a million cells either side of the origin on each axis
+_BITS=21
+_MASK=(1 << _BITS)-1
+
+# Neighbouring cells that come after (0, 0, 0), each unordered pair of
+# cells is visited once when looking for pairs
+_HALF_NEIGHBOURS=np.array([(x, y, z) for x in (-1, 0, 1) for y in (-1, 0, 1) for z in (-1, 0, 1) if (x, y, z) > (0, 0, 0)], dtype=np.int64)
+
+def _pack(coords):
+    return ((coords[..., 0] & _MASK) << 2*_BITS) | ((coords[..., 1] & _MASK) << _BITS) | (coords[..., 2] & _MASK)
+
+def _point(position):
+    if isinstance(position, Vec3):
+        return position.value
+    return np.asarray(position, dtype=np.float64).reshape(3)
+
+def _points(positions):
+    if isinstance(positions, Vec3Array):
+        return positions.value
+    if isinstance(positions, list) and positions and isinstance(positions[0], Vec3):
+        return np.array([p.value for p in positions])
+    return np.asarray(positions, dtype=np.float64).reshape((-1, 3))
+
+class SpatialHash():
+    #   Uniform grid over 3D points, for proximity queries without testing
+    #   every pair. Each cell holds the ids of the items inside it, ids are
+    #   handles returned by insert and reused after remove. Positions live
+    #   in one (N, 3) buffer so the exact distance test after the cell
+    #   lookup is a single vectorized call. cell_size should be about the
+    #   typical query radius.
+    def __init__(self, cell_size, capacity=256):
+        assert cell_size > 0, "cell_size must be positive."
+        self.cell_size=float(cell_size)
+        self.positions=np.zeros((capacity, 3))
+        self.keys=np.zeros(capacity, dtype=np.int64)
+        self.active=np.zeros(capacity, dtype=bool)
+        # Cell key -> list of ids
+        self.cells={}
+        self.free=[]
+        self.count=0
+        self.size=0
+
+    ########################################
+    #   Insert, move and remove
+    ########################################
+
+    def insert(self, position):
+        if self.free:
+            index=self.free.pop()
+        else:
+            if self.count == len(self.active):
+                self._grow(len(self.active)*2)
+            index=self.count
+            self.count+=1
+        point=_point(position)
+        key=int(_pack(self._coords(point)))
+        self.positions[index]=point
+        self.keys[index]=key
+        self.active[index]=True
+        self.cells.setdefault(key, []).append(index)
+        self.size+=1
+        return index
+
+    @profile('SpatialHash.insert_many')
+    def insert_many(self, positions):
+        # Returns the ids, in the order of positions
+        points=_points(positions)
+        n=len(points)
+        reused=self.free[-n:][::-1] if n else []
+        del self.free[len(self.free)-len(reused):]
+        if self.count+n-len(reused) > len(self.active):
+            self._grow(max(len(self.active)*2, self.count+n-len(reused)))
+        ids=np.array(reused+list(range(self.count, self.count+n-len(reused))), dtype=np.int64)
+        self.count+=n-len(reused)
+        keys=_pack(self._coords(points))
+        self.positions[ids]=points
+        self.keys[ids]=keys
+        self.active[ids]=True
+        cells=self.cells
+        for index, key in zip(ids.tolist(), keys.tolist()):
+            cell=cells.get(key)
+            if cell is None:
+                cells[key]=[index]
+            else:
+                cell.append(index)
+        self.size+=n
+        return ids
+
+    def move(self, index, position):
+        if not self.active[index]:
+            raise Exception("Item %s is not in the SpatialHash!"%index)
+        point=_point(position)
+        key=int(_pack(self._coords(point)))
+        self.positions[index]=point
+        old=int(self.keys[index])
+        if key != old:
+            self._relink(index, old, key)
+
+    @profile('SpatialHash.move_many')
+    def move_many(self, ids, positions):
+        # Only items that crossed into another cell touch the cell lists
+        ids=np.asarray(ids, dtype=np.int64)
+        missing=np.flatnonzero(~self.active[ids])
+        if len(missing):
+            raise Exception("Item %s is not in the SpatialHash!"%ids[missing[0]])
+        points=_points(positions)
+        keys=_pack(self._coords(points))
+        self.positions[ids]=points
+        moved=np.flatnonzero(keys != self.keys[ids])
+        for index, old, key in zip(ids[moved].tolist(), self.keys[ids[moved]].tolist(), keys[moved].tolist()):
+            self._relink(index, old, key)
+
+    def remove(self, index):
+        if not self.active[index]:
+            raise Exception("Item %s is not in the SpatialHash!"%index)
+        key=int(self.keys[index])
+        cell=self.cells[key]
+        cell.remove(index)
+        if not cell:
+            del self.cells[key]
+        self.active[index]=False
+        self.free.append(index)
+        self.size-=1
+
+    def position(self, index):
+        return Vec3._wrap(self.positions[index])
+
+    ########################################
+    #   Queries, return NDARRAY of ids
+    ########################################
+
+    @profile('SpatialHash.query_radius')
+    def query_radius(self, center, radius):
+        return self._radius(_point(center), radius)[0]
+
+    @profile('SpatialHash.query_aabb')
+    def query_aabb(self, minimum, maximum):
+        minimum=_point(minimum)
+        maximum=_point(maximum)
+        ids=self._candidates(minimum, maximum)
+        p=self.positions[ids]
+        return ids[np.all((p >= minimum) & (p <= maximum), axis=1)]
+
+    @profile('SpatialHash.query_knn')
+    def query_knn(self, center, k, max_radius=None):
+        # The k nearest ids, closest first. The search radius doubles until
+        # it holds k items or covers everything
+        center=_point(center)
+        radius=self.cell_size
+        while True:
+            if max_radius is not None:
+                radius=min(radius, max_radius)
+            ids, d2 = self._radius(center, radius)
+            if len(ids) >= k or len(ids) == self.size or radius == max_radius:
+                break
+            radius*=2
+        nearest=np.argsort(d2, kind='stable')[:k]
+        return ids[nearest]
+
+    @profile('SpatialHash.query_pairs')
+    def query_pairs(self, radius):
+        #   Every pair of items within radius of each other, as an (M, 2)
+        #   array of ids with the smaller id first. Items are sorted by cell
+        #   and each one is matched against its own and the 13 following
+        #   neighbouring cells, all vectorized, so this is the broadphase
+        #   replacement for testing all N*N pairs.
+        ids=np.flatnonzero(self.active[:self.count])
+        if len(ids) < 2:
+            return np.zeros((0, 2), dtype=np.int64)
+        points=self.positions[ids]
+        size=max(self.cell_size, radius)
+        coords=np.floor(points/size).astype(np.int64)
+        keys=_pack(coords)
+        order=np.argsort(keys, kind='stable')
+        ids, points, coords, keys = ids[order], points[order], coords[order], keys[order]
+        n=len(ids)
+        first=[]
+        second=[]
+        # Same cell, each later item in the cell
+        hi=np.searchsorted(keys, keys, side='right')
+        self._expand(np.arange(1, n+1), hi, first, second)
+        for offset in _HALF_NEIGHBOURS:
+            neighbour=_pack(coords+offset)
+            self._expand(np.searchsorted(keys, neighbour, side='left'), np.searchsorted(keys, neighbour, side='right'), first, second)
+        if not first:
+            return np.zeros((0, 2), dtype=np.int64)
+        a=np.concatenate(first)
+        b=np.concatenate(second)
+        d=points[a]-points[b]
+        close=np.einsum('ij,ij->i', d, d) <= radius*radius
+        pairs=np.stack((ids[a[close]], ids[b[close]]), axis=1)
+        pairs.sort(axis=1)
+        return pairs
+
+    ########################################
+    #   Internals
+    ########################################
+
+    def _coords(self, points):
+        return np.floor(points/self.cell_size).astype(np.int64)
+
+    def _radius(self, center, radius):
+        # (ids, squared distances) of items within radius of center
+        ids=self._candidates(center-radius, center+radius)
+        d=self.positions[ids]-center
+        d2=np.einsum('ij,ij->i', d, d)
+        inside=d2 <= radius*radius
+        return ids[inside], d2[inside]
+
+    def _candidates(self, minimum, maximum):
+        # Ids in every cell overlapping the box. A box covering more cells
+        # than are occupied falls back to scanning all items
+        lo=self._coords(minimum).tolist()
+        hi=self._coords(maximum).tolist()
+        if (hi[0]-lo[0]+1)*(hi[1]-lo[1]+1)*(hi[2]-lo[2]+1) > len(self.cells):
+            return np.flatnonzero(self.active[:self.count])
+        cells=self.cells
+        found=[]
+        for x in range(lo[0], hi[0]+1):
+            for y in range(lo[1], hi[1]+1):
+                for z in range(lo[2], hi[2]+1):
+                    cell=cells.get(((x & _MASK) << 2*_BITS) | ((y & _MASK) << _BITS) | (z & _MASK))
+                    if cell:
+                        found.extend(cell)
+        return np.array(found, dtype=np.int64)
+
+    def _expand(self, lo, hi, first, second):
+        # Pairs (i, j) for every j in lo[i]:hi[i], without a Python loop
+        counts=np.maximum(hi-lo, 0)
+        total=int(counts.sum())
+        if not total:
+            return
+        a=np.repeat(np.arange(len(lo)), counts)
+        starts=np.cumsum(counts)-counts
+        first.append(a)
+        second.append(np.repeat(lo, counts)+np.arange(total)-np.repeat(starts, counts))
+
+    def _relink(self, index, old, key):
+        cell=self.cells[old]
+        cell.remove(index)
+        if not cell:
+            del self.cells[old]
+        self.cells.setdefault(key, []).append(index)
+        self.keys[index]=key
+
+    def _grow(self, capacity):
+        extra=capacity-len(self.active)
+        self.positions=np.concatenate((self.positions, np.zeros((extra, 3))))
+        self.keys=np.concatenate((self.keys, np.zeros(extra, dtype=np.int64)))
+        self.active=np.concatenate((self.active, np.zeros(extra, dtype=bool)))
+
+    def __len__(self):
+        return self.size
@@ -0,0 +1,152 @@
+import numpy as np
+
+from ..maths import Vec3, Vec3Array, Mat4, Mat4Array
+
+def _points(values):
+    if isinstance(values, (Vec3, Vec3Array)):
+        values=values.value
+    return np.asarray(values, dtype=np.float64).reshape((-1, 3))
+
+def _matrices(matrices):
+    if isinstance(matrices, (Mat4, Mat4Array)):
+        matrices=matrices.value
+    return np.asarray(matrices, dtype=np.float64).reshape((-1, 4, 4))
+
+class AABBArray():
+    #   Axis aligned boxes as one (N, 2, 3) buffer, [:, 0] the minimum and
+    #   [:, 1] the maximum corner.
+    __slots__=('value',)
+
+    def __init__(self, minimums, maximums=None):
+        # An int makes that many empty boxes, otherwise (N, 3) corners or
+        # an (N, 2, 3) array when maximums is left out
+        if isinstance(minimums, int):
+            self.value=np.zeros((minimums, 2, 3))
+        elif maximums is None:
+            self.value=np.ascontiguousarray(minimums, dtype=np.float64).reshape((-1, 2, 3))
+        else:
+            self.value=np.stack((_points(minimums), _points(maximums)), axis=1)
+
+    @classmethod
+    def _wrap(cls, value):
+        boxes=cls.__new__(cls)
+        boxes.value=value
+        return boxes
+
+    @classmethod
+    def from_spheres(cls, spheres):
+        c=spheres.centers
+        r=spheres.radii[:, np.newaxis]
+        return cls._wrap(np.stack((c-r, c+r), axis=1))
+
+    @property
+    def minimums(self):
+        return self.value[:, 0]
+
+    @property
+    def maximums(self):
+        return self.value[:, 1]
+
+    @property
+    def centers(self):
+        return (self.value[:, 0]+self.value[:, 1])*0.5
+
+    @property
+    def extents(self):
+        # Half sizes
+        return (self.value[:, 1]-self.value[:, 0])*0.5
+
+    def surface_areas(self):
+        d=self.value[:, 1]-self.value[:, 0]
+        return 2.0*(d[:, 0]*d[:, 1]+d[:, 1]*d[:, 2]+d[:, 2]*d[:, 0])
+
+    def union(self):
+        # Single (2, 3) box around all of them
+        return np.stack((self.value[:, 0].min(axis=0), self.value[:, 1].max(axis=0)))
+
+    def overlaps(self, minimum, maximum):
+        # Mask of boxes touching the box minimum..maximum
+        minimum=_points(minimum)[0]
+        maximum=_points(maximum)[0]
+        return np.all((self.value[:, 0] <= maximum) & (self.value[:, 1] >= minimum), axis=1)
+
+    def contains_points(self, points):
+        # Mask, point i inside box i
+        points=_points(points)
+        return np.all((points >= self.value[:, 0]) & (points <= self.value[:, 1]), axis=1)
+
+    def transform(self, matrices):
+        #   Boxes around the transformed boxes, one matrix for all or one
+        #   per box. Uses the center and extents, with the extents taken
+        #   through the absolute rotation and scale part, so no corners
+        #   are generated
+        m=_matrices(matrices)
+        c=self.centers
+        e=self.extents
+        centers=np.matmul(m[:, :3, :3], c[..., np.newaxis])[..., 0]+m[:, :3, 3]
+        extents=np.matmul(np.abs(m[:, :3, :3]), e[..., np.newaxis])[..., 0]
+        return AABBArray._wrap(np.stack((centers-extents, centers+extents), axis=1))
+
+    def __getitem__(self, index):
+        return self.value[index]
+
+    def __len__(self):
+        return len(self.value)
+
+    def __repr__(self):
+        return "<%s \n%s\n>"%(self.__class__.__name__, self.value)
+
+class SphereArray():
+    #   Bounding spheres as one (N, 4) buffer of center x, y, z and radius
+    __slots__=('value',)
+
+    def __init__(self, centers, radii=None):
+        if isinstance(centers, int):
+            self.value=np.zeros((centers, 4))
+        elif radii is None:
+            self.value=np.ascontiguousarray(centers, dtype=np.float64).reshape((-1, 4))
+        else:
+            centers=_points(centers)
+            self.value=np.empty((len(centers), 4))
+            self.value[:, :3]=centers
+            self.value[:, 3]=radii
+
+    @classmethod
+    def _wrap(cls, value):
+        spheres=cls.__new__(cls)
+        spheres.value=value
+        return spheres
+
+    @classmethod
+    def from_aabbs(cls, boxes):
+        # Spheres through the corners of each box
+        value=np.empty((len(boxes), 4))
+        value[:, :3]=boxes.centers
+        value[:, 3]=np.linalg.norm(boxes.extents, axis=1)
+        return cls._wrap(value)
+
+    @property
+    def centers(self):
+        return self.value[:, :3]
+
+    @property
+    def radii(self):
+        return self.value[:, 3]
+
+    def transform(self, matrices):
+        # Radii grow by the largest axis scale of each matrix, exact for
+        # rotation and scale, a sheared matrix can need more
+        m=_matrices(matrices)
+        value=np.empty((len(self.value), 4))
+        value[:, :3]=np.matmul(m[:, :3, :3], self.value[:, :3, np.newaxis])[..., 0]+m[:, :3, 3]
+        value[:, 3]=self.value[:, 3]*np.sqrt(np.max(np.sum(m[:, :3, :3]**2, axis=1), axis=1))
+        return SphereArray._wrap(value)
+
+    def __getitem__(self, index):
+        return self.value[index]
+
+    def __len__(self):
+        return len(self.value)
+
+    def __repr__(self):
+        return "<%s \n%s\n>"%(self.__class__.__name__, self.value)